@@ -1,8 +1,9 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
+import functools
 import json
 import threading
-import types
+import weakref
 
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
@@ -23,9 +24,9 @@ class ChangeLogger:
     """
     !!! Bulk operations are not supported by this implementation !!!
 
-    TODO: Fix ManyToManyRel and ManyToOneRel to be logged,
-          for now we have a workaround. In the serializers of the signal project we add the many to many relations
-          and also call the save method. This way the ChangeLogger will be able to activate the tracker.
+    Creating an instance of the model is query free, the tracker stores the state of the concrete fields of the
+    instance. The state of the relations is only fetched when a relation of an instance changes (see the
+    BaseChangeTracker).
     """
     # The ChangeLoggerMiddleware will place the request on this thread so that we can get the user from it
     thread = threading.local()
@@ -34,6 +35,11 @@ class ChangeLogger:
         self._tracker_class = tracker_class or ChangeTracker
         self._track_fields = track_fields
 
+        # The trackers of the instances that are alive, used to find the trackers when a relation changes
+        self._trackers = weakref.WeakSet()
+        self._trackers_lock = threading.Lock()
+        self._relations = None  # The tracked relations, determined when the first instance is created
+
     def contribute_to_class(self, cls, name, **kwargs):
         """
         The Django model will call the 'contribute_to_class' method for each of the attributes ending up in the model.
@@ -48,48 +54,120 @@ class ChangeLogger:
         setattr(cls, name, self)
         setattr(cls, 'logs', logs)
 
-        models.signals.post_init.connect(self.initialize_logger)
+        self.patch_save(cls)
+
+        # Only receive the post_init signal for the model the logger is declared on
+        models.signals.post_init.connect(self.initialize_logger, sender=cls)
+
+    def get_tracked_relations(self):
+        """
+        Returns the ManyToMany and ManyToOne relations of the model that are tracked
+        """
+        relations = []
+        for field in self.model._meta.get_fields():
+            if isinstance(field, (models.ManyToManyRel, models.ManyToOneRel)):
+                field_name = field.get_accessor_name()
+            elif isinstance(field, models.ManyToManyField):
+                field_name = field.name
+            else:
+                continue
+
+            if self._track_fields == '__all__' or field_name in self._track_fields:
+                relations.append(field)
+        return relations
+
+    def _get_through(self, field):
+        return field.remote_field.through if isinstance(field, models.ManyToManyField) else field.through
+
+    def connect_relation_receivers(self):
+        """
+        Connect the receivers that keep track of changes to the tracked relations of the model. The related models are
+        not necessarily loaded when 'contribute_to_class' is called, so this is done when the first instance is created.
+        """
+        self._relations = self.get_tracked_relations()
+        for field in self._relations:
+            if isinstance(field, models.ManyToOneRel):
+                models.signals.post_save.connect(self.related_saved, sender=field.related_model)
+            else:
+                models.signals.m2m_changed.connect(self.m2m_changed, sender=self._get_through(field))
 
     def initialize_logger(self, sender, instance, **kwargs):
-        if not isinstance(instance, self.model):
-            # Only initialize for instances that are an instance of the model that the logger is declared on
-            return
+        if self._relations is None:
+            self.connect_relation_receivers()
 
         tracker = self._tracker_class(instance=instance, track_fields=self._track_fields)
         setattr(instance, '_change_tracker', tracker)
         tracker.store_state()
 
-        self.patch_save(instance)
+        with self._trackers_lock:
+            self._trackers.add(tracker)
 
-    def patch_save(self, instance):
-        # We keep the original save because we still call it to store data. We only add the functionality that will
-        # add the row in the change_log table
-        original_save = instance.save
+    def _get_trackers(self, pks=None):
+        """
+        Returns the trackers of the instances that are alive with one of the given pk's (Default: all saved instances)
+        """
+        with self._trackers_lock:
+            trackers = list(self._trackers)
+        return [tracker for tracker in trackers if tracker.instance is not None and tracker.instance.pk is not None
+                and (pks is None or tracker.instance.pk in pks)]
+
+    def m2m_changed(self, sender, instance, action, model, pk_set, **kwargs):
+        if action not in ('pre_add', 'pre_remove', 'pre_clear'):
+            return
 
-        who = None
+        if isinstance(instance, self.model):
+            pks = {instance.pk}
+        else:
+            # The relation is changed from the other side, a clear from the other side can affect any instance
+            pks = pk_set
+
+        for tracker in self._get_trackers(pks):
+            for field in self._relations:
+                if not isinstance(field, models.ManyToOneRel) and self._get_through(field) is sender:
+                    tracker.store_relation_state(field=field)
+
+    def related_saved(self, sender, instance, created, **kwargs):
+        if not created:
+            # Only new related objects are registered, moving an existing object to another instance is not tracked
+            return
+
+        for field in self._relations:
+            if isinstance(field, models.ManyToOneRel) and field.related_model is sender:
+                for tracker in self._get_trackers({getattr(instance, field.field.attname)}):
+                    tracker.add_related(field=field, pk=instance.pk)
+
+    def get_who(self):
         if hasattr(self.thread, 'request') and hasattr(self.thread.request, 'user'):
-            who = self.thread.request.user.username if hasattr(self.thread.request.user, 'username') else None
+            return self.thread.request.user.username if hasattr(self.thread.request.user, 'username') else None
+        return None
+
+    def patch_save(self, cls):
+        # We keep the original save because we still call it to store data. We only add the functionality that will
+        # add the row in the change_log table
+        original_save = cls.save
+        logger = self
 
-        def save(self, **kwargs):
+        @functools.wraps(original_save)
+        def save(self, *args, **kwargs):
             # Check to see if the object is inserted or updated
-            created = instance.pk is None
+            created = self.pk is None
 
             # Call the original save function
-            original_save_return = original_save(**kwargs)
+            original_save_return = original_save(self, *args, **kwargs)
 
-            if created:
+            tracker = getattr(self, '_change_tracker', None)
+            if created or tracker is None:
                 return original_save_return
 
-            tracker = getattr(instance, '_change_tracker')
-            instance_changed = tracker.instance_changed
-            if instance_changed:
+            changed_data = tracker.changed_data()
+            if changed_data:
                 Log.objects.create(
-                    object=instance,
+                    object=self,
                     action='U',
-                    who=who,
-                    data=json.dumps(tracker.changed_data())
+                    who=logger.get_who(),
+                    data=json.dumps(changed_data)
                 )
 
             return original_save_return
 
-        instance.save = types.MethodType(save, instance)
+        cls.save = save
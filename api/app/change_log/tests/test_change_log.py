@@ -1,10 +1,14 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 
 from change_log.tests.models import TestModel
+from signals.apps.signals.factories import CategoryFactory, ServiceLevelObjectiveFactory
+from signals.apps.signals.models import Category, ServiceLevelObjective
 
 
 class TestChangeLog(TestCase):
@@ -59,3 +63,41 @@ class TestChangeLog(TestCase):
             self.assertEqual(log_item.data['title'], test_instance.title)
             self.assertEqual(log_item.data['text'], test_instance.text)
             self.assertEqual(log_item.data['active'], test_instance.active)
+
+    def test_initialize_logger_query_free(self):
+        TestModel.objects.create(title='The title')
+        CategoryFactory.create_batch(3)
+
+        # Only the query to retrieve the instances, the state of the "slo" relation of the Category is not fetched
+        with self.assertNumQueries(1):
+            self.assertEqual(1, len(list(TestModel.objects.all())))
+        with self.assertNumQueries(1):
+            categories = list(Category.objects.filter(parent__isnull=False))
+        self.assertEqual(3, len(categories))
+
+        # Saving an instance without changes to the relations does not fetch the state of the relations
+        category = categories[0]
+        category.name = 'Changed name'
+        with CaptureQueriesContext(connection) as context:
+            category.save()
+        slo_table = ServiceLevelObjective._meta.db_table
+        self.assertFalse(any(slo_table in query['sql'] for query in context.captured_queries))
+
+        log_item = category.logs.first()
+        self.assertEqual({'name': 'Changed name'}, log_item.data)
+
+    def test_log_many_to_one_relation(self):
+        category = CategoryFactory.create()
+        category = Category.objects.get(pk=category.pk)
+
+        slo = ServiceLevelObjectiveFactory.create(category=category)
+        category.save()
+
+        self.assertEqual(1, category.logs.count())
+        log_item = category.logs.first()
+        self.assertEqual({'slo': [slo.pk]}, log_item.data)
+
+        # Saving again without changes does not log anything
+        category = Category.objects.get(pk=category.pk)
+        category.save()
+        self.assertEqual(1, category.logs.count())
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
+import weakref
 from copy import deepcopy
 
 from django.contrib.gis.db import models
@@ -9,17 +10,27 @@ class BaseChangeTracker:
     """
     !!! Bulk operations are not supported by this implementation !!!
 
-    TODO: Fix ManyToManyRel and ManyToOneRel to be logged,
-          for now we have a workaround. In the serializers of the signal project we add the many to many relations
-          and also call the save/update methods. This way the ChangeLogger will be able to activate the tracker. The
-          tracker needs to store and check the relations on init and save to see if it has changed or not.
+    The state of the concrete fields is stored on init, this is done without querying the database. The state of the
+    relations is only fetched when a relation is about to change:
+
+    * ManyToManyField/ManyToManyRel, the current state is stored when the ChangeLogger receives a "pre_add",
+      "pre_remove" or "pre_clear" m2m_changed signal for the instance
+    * ManyToOneRel, the ChangeLogger registers the related objects that are created for the instance
+
+    Relations that did not change are never queried, also not when saving the instance.
     """
     _track_fields = '__all__'  # By default track all fields
 
     def __init__(self, instance, track_fields='__all__'):
-        self.instance = instance  # This contains the instance we are tracking
+        # Only a weak reference to the instance we are tracking, the instance itself holds the tracker
+        self._instance = weakref.ref(instance)
         self._track_fields = track_fields
         self.data = {}
+        self.added = {}  # The pk's of the objects that are added to a ManyToOneRel since init
+
+    @property
+    def instance(self):
+        return self._instance()
 
     def _track_field(self, field):
         return self._track_fields == '__all__' or self._get_field_name(field=field) in self._track_fields
@@ -32,57 +43,93 @@ class BaseChangeTracker:
             return field.get_accessor_name()
         return field.name
 
+    def _is_relation(self, field):
+        return isinstance(field, (models.ManyToManyRel, models.ManyToOneRel, models.ManyToManyField))
+
+    def _get_tracked_fields(self):
+        return [field for field in self.instance._meta.get_fields() if self._track_field(field=field)]
+
     def _get_current_value(self, field):
-        field_name = self._get_field_name(field=field)
-        if isinstance(field, (models.OneToOneRel)):
-            field_name = field.get_accessor_name()
-            try:
-                self.data[field_name] = getattr(self.instance, field_name).pk
-            except Exception:
-                self.data[field_name] = None
-        elif isinstance(field, (models.ManyToManyRel, models.ManyToOneRel, models.ManyToManyField)):
-            if self.instance.pk:
-                return list(getattr(self.instance, field_name).values_list('pk', flat=True))
-            return None
-        return getattr(self.instance, field_name)
+        if self._is_relation(field):
+            if not self.instance.pk:
+                return None
+            if isinstance(field, models.ManyToOneRel):
+                # Also works for a OneToOneRel, the accessor of a OneToOneRel returns an object instead of a manager
+                queryset = field.related_model._default_manager.filter(**{field.field.attname: self.instance.pk})
+            else:
+                queryset = getattr(self.instance, self._get_field_name(field=field))
+            return list(queryset.values_list('pk', flat=True))
+
+        # For foreign keys we use the pk (attname) so that the related object is not fetched
+        value = self.instance.__dict__.get(field.attname)
+        return deepcopy(value) if isinstance(value, (dict, list)) else value
 
     def _get_previous_value(self, field):
         return self.data.get(self._get_field_name(field=field))
 
     def store_state(self):
         """
-        Stores the current state of an instance. Is called in the ChangeLogger when initializing the logger.
+        Stores the current state of the concrete fields of an instance. Is called in the ChangeLogger when initializing
+        the logger.
+        """
+        for field in self._get_tracked_fields():
+            if not self._is_relation(field):
+                self.data[self._get_field_name(field=field)] = self._get_current_value(field=field)
+
+    def store_relation_state(self, field):
+        """
+        Stores the current state of a many to many relation, is called in the ChangeLogger before the relation changes
+        """
+        field_name = self._get_field_name(field=field)
+        if self._track_field(field=field) and field_name not in self.data:
+            self.data[field_name] = self._get_current_value(field=field)
+
+    def add_related(self, field, pk):
+        """
+        Registers an object that is added to a ManyToOneRel, is called in the ChangeLogger after the object is created
         """
-        for field in self.instance._meta.get_fields():
-            if self._track_field(field=field):
-                field_name = self._get_field_name(field=field)
-                self.data[field_name] = deepcopy(self._get_current_value(field=field))
+        if self._track_field(field=field):
+            self.added.setdefault(self._get_field_name(field=field), set()).add(pk)
 
     @property
     def instance_changed(self):
         return bool(self.changed_data())
 
+    def _relation_changed_data(self, field):
+        field_name = self._get_field_name(field=field)
+        if not isinstance(field, models.ManyToOneRel):
+            if field_name not in self.data:
+                return None  # The relation did not change since init
+
+            current_value = self._get_current_value(field=field)
+            if current_value == self._get_previous_value(field=field):
+                return None
+            if isinstance(field, models.ManyToManyRel):
+                return list(set(current_value or []) - set(self._get_previous_value(field=field) or [])) or None
+            return current_value
+
+        if not self.added.get(field_name):
+            return None  # No objects added to the relation since init
+
+        # Only the added objects that are (still) related to the instance
+        changes = set(self._get_current_value(field=field) or []) & self.added[field_name]
+        return list(changes) or None
+
     def changed_data(self):
         """
         Returns the diff of the state stored on init and the state after saving
         """
         _changed_data = {}
-        for field in self.instance._meta.get_fields():
-            if self._skip_field(field=field):
+        for field in self._get_tracked_fields():
+            field_name = self._get_field_name(field=field)
+            if self._is_relation(field):
+                changes = self._relation_changed_data(field=field)
+                if changes is not None:
+                    _changed_data[field_name] = changes
                 continue
 
             current_value = self._get_current_value(field=field)
-            previous_value = self._get_previous_value(field=field)
-
-            if current_value == previous_value:
-                continue
-
-            field_name = self._get_field_name(field=field)
-            if isinstance(field, (models.ManyToManyRel, models.ManyToOneRel)):
-                changes = set(current_value or []) - set(previous_value or [])
-                if changes:
-                    _changed_data[field_name] = list(changes)
-            else:
+            if current_value != self._get_previous_value(field=field):
                 _changed_data[field_name] = current_value
 
         return _changed_data
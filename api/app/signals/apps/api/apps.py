@@ -6,3 +6,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     name = 'signals.apps.api'
     verbose_name = 'REST API App'
+
+    def ready(self):
+        # Import Django signals to connect receiver functions.
+        import signals.apps.api.signal_receivers  # noqa
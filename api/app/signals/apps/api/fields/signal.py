@@ -29,7 +29,8 @@ class PrivateSignalLinksFieldWithArchives(serializers.HyperlinkedIdentityField):
                 dict(href=self.get_url(value.parent, "private-signals-detail", request, None))
             })
 
-        if value.is_parent:
+        # The "has_children" annotation is added by the PrivateSignalViewSet queryset
+        if value.has_children if hasattr(value, 'has_children') else value.is_parent:
             result.update({'sia:children': [
                 dict(href=self.get_url(child, "private-signals-detail", request, None))
                 for child in value.children.all()
@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
 from django.conf import settings
-from django.db.models import Count, F, Max, Min, Q
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q
 from django.utils.timezone import now
 from django_filters.rest_framework import FilterSet, filters
 
@@ -23,7 +23,7 @@ from signals.apps.api.filters.utils import (
     status_choices
 )
 from signals.apps.signals import workflow
-from signals.apps.signals.models import Category, Priority, Type
+from signals.apps.signals.models import Category, Note, Priority, Type
 
 
 class SignalFilterSet(FilterSet):
@@ -229,7 +229,8 @@ class SignalFilterSet(FilterSet):
         return queryset.filter(q_filter).distinct() if q_filter else queryset
 
     def note_keyword_filter(self, queryset, name, value):
-        return queryset.filter(notes__text__icontains=value).distinct()
+        # EXISTS instead of a join, no DISTINCT needed (uses the trigram index on the text of the notes)
+        return queryset.filter(Exists(Note.objects.filter(_signal_id=OuterRef('pk'), text__icontains=value)))
 
     def assigned_user_email_filter(self, queryset, name, value):
         if value == 'null':
@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
+import threading
+from functools import wraps
+
 from signals.apps.signals.models import (
     STADSDELEN,
     Area,
@@ -11,23 +14,99 @@ from signals.apps.signals.models import (
     ExpressionType,
     Source
 )
+from signals.apps.signals.utils.cache import VersionStamp
 from signals.apps.signals.workflow import STATUS_CHOICES
 
+CHOICES_VERSION_CACHE_KEY = 'signals.api.filters.choices.version'
+CHOICES_VERSION = VersionStamp(CHOICES_VERSION_CACHE_KEY)
+
+
+def get_choices_version():
+    """
+    Returns the current version stamp of the choices, a new stamp is generated if there is none
+    """
+    return CHOICES_VERSION.get()
+
+
+def bump_choices_version():
+    """
+    Invalidate the cached choices of all processes, must be called whenever one of the models of the registered choices
+    is added, changed or removed
+    """
+    CHOICES_VERSION.bump()
+
+
+class ChoiceRegistry:
+    """
+    Process local cache of the choices that are loaded from the database.
+
+    The choices are only loaded when they are used, Django evaluates callable choices when a value is validated (so
+    only for the query parameters that are actually present). All cached choices are dropped when the version stamp
+    changes, the stamp is stored in the shared cache so a change made in another process is seen, see
+    `bump_choices_version`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._choices = {}
+        self.models = set()
+
+    def register(self, *models):
+        """
+        Decorator, caches the choices returned by the decorated function. The given models are the models the choices
+        are loaded from, changing one of these models invalidates the choices.
+        """
+        def decorator(func):
+            self.models.update(models)
+
+            @wraps(func)
+            def wrapper():
+                return self.get(func)
+            return wrapper
+        return decorator
+
+    def get(self, func):
+        version = get_choices_version()
+        with self._lock:
+            if version != self._version:
+                self._choices = {}
+                self._version = version
+
+            choices = self._choices.get(func)
+        if choices is None:
+            choices = tuple(func())  # Immutable, the same choices are shared by all requests
+            with self._lock:
+                if version == self._version:
+                    self._choices[func] = choices
+        return choices
+
+    def clear(self):
+        with self._lock:
+            self._choices = {}
+            self._version = None
+
+
+choice_registry = ChoiceRegistry()
+
 # Helper functions to to determine available choices used for filtering
 
 
+@choice_registry.register(Area)
 def area_code_choices():
     return [(area.code, area.code) for area in Area.objects.only('code').all().distinct()]
 
 
+@choice_registry.register(AreaType)
 def area_type_code_choices():
     return [(area_type.code, area_type.code) for area_type in AreaType.objects.only('code').all().distinct()]
 
 
+@choice_registry.register(AreaType)
 def area_type_choices():
     return [(c, f'{n} ({c})') for c, n in AreaType.objects.values_list('code', 'name')]
 
 
+@choice_registry.register(Area, AreaType)
 def area_choices():
     return [
         ('null', 'null'),
@@ -39,6 +118,7 @@ boolean_false_choices = [(False, 'False'), ('false', 'false'), ('False', 'False'
 boolean_choices = boolean_true_choices + boolean_false_choices
 
 
+@choice_registry.register(Buurt)
 def buurt_choices():
     return [(c, f'{n} ({c})') for c, n in Buurt.objects.values_list('vollcode', 'naam')]
 
@@ -47,12 +127,14 @@ def contact_details_choices():
     return (('none', 'none'), ('email', 'email'), ('phone', 'phone'), )
 
 
+@choice_registry.register(Department)
 def department_choices():
     return [
         ('null', 'null'),
     ] + [(department.code, f'{department.code}') for department in Department.objects.only('code').all()]
 
 
+@choice_registry.register(Expression)
 def expression_choices():
     """
     Helper function to determine available expressions
@@ -60,6 +142,7 @@ def expression_choices():
     return [(expr.name, expr.name) for expr in Expression.objects.only('name').all().distinct()]
 
 
+@choice_registry.register(ExpressionType)
 def expression_type_choices():
     """
     Helper function to determine available expression types
@@ -84,6 +167,7 @@ def status_choices():
     return [(c, f'{n} ({c})') for c, n in STATUS_CHOICES]
 
 
+@choice_registry.register(Source)
 def source_choices():
     return [(choice, f'{choice}') for choice in Source.objects.order_by('name').values_list('name', flat=True).distinct()]  # noqa
 
@@ -103,5 +187,6 @@ def _get_parent_category_queryset():
     return Category.objects.filter(parent__isnull=True)
 
 
+@choice_registry.register(Category)
 def category_choices():
     return [(category.id, f'{category.name}') for category in Category.objects.all()]
@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Server-side clustering of the signals shown on a map.
+
+The locations are snapped to a grid in Web Mercator, the cell size depends on the zoom level. For every cell the
+database returns a GeoJSON Feature with the centroid of the locations in the cell, the number of locations and the
+number of locations per group (for example per status).
+"""
+from django.conf import settings
+from django.contrib.gis.db.models.functions import SnapToGrid, Transform
+from django.contrib.gis.geos import Polygon
+from django.db import connections
+from django.db.models import F
+from rest_framework import serializers
+
+from signals.apps.signals.utils.tiles import WEB_MERCATOR_MAX
+
+WEB_MERCATOR_SRID = 3857
+TILE_SIZE = 256  # pixels
+
+# The locations in a cluster are counted per status or per main category
+CLUSTER_GROUP_BY_FIELDS = {
+    'status': 'status__state',
+    'main_category': 'category_assignment__category__parent__slug',
+}
+
+
+class ClusterQueryParamsSerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the cluster mode, for example: ?cluster=grid&zoom=12&bbox=4.8,52.3,5.0,52.4
+    """
+    cluster = serializers.ChoiceField(choices=['grid'])
+    zoom = serializers.IntegerField(min_value=0)
+    bbox = serializers.CharField(required=False)
+    group_by = serializers.ChoiceField(choices=list(CLUSTER_GROUP_BY_FIELDS.keys()), default='status')
+
+    def validate_zoom(self, value):
+        if value > settings.SIGNAL_TILES_MAX_ZOOM:
+            raise serializers.ValidationError(f'Ensure this value is less than or equal to '
+                                              f'{settings.SIGNAL_TILES_MAX_ZOOM}.')
+        return value
+
+    def validate_bbox(self, value):
+        try:
+            bbox = [float(coordinate) for coordinate in value.split(',')]
+        except ValueError:
+            bbox = []
+
+        if len(bbox) != 4 or bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+            raise serializers.ValidationError('Expected "lon_min,lat_min,lon_max,lat_max" (WGS84).')
+
+        polygon = Polygon.from_bbox(bbox)
+        polygon.srid = 4326
+        return polygon
+
+
+def grid_cell_size(zoom):
+    """
+    Returns the size of a grid cell (in Web Mercator meters) at the given zoom level
+    """
+    return 2 * WEB_MERCATOR_MAX / (TILE_SIZE * 2 ** zoom) * settings.SIGNAL_CLUSTER_GRID_SIZE
+
+
+def cluster_feature_collection(queryset, geometry, group_by, zoom, bbox=None, **kwargs):
+    """
+    Returns the GeoJSON FeatureCollection (as text) of the grid clusters of the given queryset
+
+    :param geometry: name of the geometry field (in WGS84)
+    :param group_by: key of CLUSTER_GROUP_BY_FIELDS, the locations in a cluster are counted per group
+    :param zoom: zoom level, determines the size of the grid cells
+    :param bbox: optional Polygon (in WGS84), only the locations in the bbox are clustered
+    """
+    if bbox is not None:
+        queryset = queryset.filter(**{f'{geometry}__intersects': bbox})
+
+    points = queryset.order_by().values(
+        cluster_cell=SnapToGrid(Transform(geometry, WEB_MERCATOR_SRID), grid_cell_size(zoom)),
+        cluster_group=F(CLUSTER_GROUP_BY_FIELDS[group_by]),
+        cluster_geometry=F(geometry),
+    )
+    points_sql, params = points.query.sql_with_params()
+
+    sql = f"""
+        SELECT jsonb_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(jsonb_agg(clusters.feature), '[]'::jsonb)
+        )::text FROM (
+            SELECT jsonb_build_object(
+                'type', 'Feature',
+                'geometry', ST_AsGeoJSON(ST_Centroid(ST_Collect(groups.geometry)))::jsonb,
+                'properties', jsonb_build_object(
+                    'count', SUM(groups.count),
+                    'counts', jsonb_object_agg(COALESCE(groups.cluster_group::text, ''), groups.count)
+                )
+            ) AS feature FROM (
+                SELECT points.cluster_cell, points.cluster_group, COUNT(*) AS count,
+                       ST_Collect(points.cluster_geometry) AS geometry
+                FROM ({points_sql}) AS points
+                GROUP BY points.cluster_cell, points.cluster_group
+            ) AS groups
+            GROUP BY groups.cluster_cell
+        ) AS clusters
+    """
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
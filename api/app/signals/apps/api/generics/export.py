@@ -0,0 +1,42 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Streams the rows of a queryset as newline delimited JSON or as CSV.
+
+The rows are read in chunks with a server-side cursor, so the memory usage does not depend on the number of rows. The
+queryset must be a values() queryset, the projection is done by the database.
+"""
+import csv
+from typing import Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    File-like object that returns the written value, used to let the csv writer return the formatted row
+    """
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(queryset: QuerySet) -> Iterator[str]:
+    """
+    Yields every row of the given values() queryset as a JSON object on a separate line
+    """
+    encoder = DjangoJSONEncoder()
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield f'{encoder.encode(row)}\n'
+
+
+def stream_csv(queryset: QuerySet, field_names: List[str]) -> Iterator[str]:
+    """
+    Yields the header and every row of the given values() queryset as a line of CSV
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(field_names)
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield writer.writerow([row[field_name] for field_name in field_names])
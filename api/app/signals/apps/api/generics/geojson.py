@@ -0,0 +1,47 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Build GeoJSON in PostgreSQL instead of serializing model instances with Django REST Framework.
+
+Every row of the queryset is annotated with its GeoJSON Feature, built by the database using JSONB_BUILD_OBJECT and
+ST_AsGeoJSON. The Features are returned as text so that they can be joined into a FeatureCollection without
+(de)serializing them in Python.
+"""
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.db.models import CharField, JSONField, TextField, Value
+from django.db.models.functions import Cast, JSONObject
+
+
+def _json_object(properties):
+    return JSONObject(**{
+        key: _json_object(value) if isinstance(value, dict) else value
+        for key, value in properties.items()
+    })
+
+
+def geojson_feature(geometry, properties):
+    """
+    Returns an expression that builds the GeoJSON Feature of a row
+
+    :param geometry: name of (or expression for) the geometry field
+    :param properties: dict mapping the property names to field names or expressions, a dict becomes a nested object
+    """
+    return JSONObject(
+        type=Value('Feature', output_field=CharField()),
+        geometry=Cast(AsGeoJSON(geometry), JSONField()),
+        properties=_json_object(properties),
+    )
+
+
+def annotate_geojson_feature(queryset, geometry, properties, name='geojson_feature'):
+    """
+    Annotate the queryset with the GeoJSON Feature (as text) of every row
+    """
+    return queryset.annotate(**{name: Cast(geojson_feature(geometry, properties), TextField())})
+
+
+def geojson_feature_collection(features):
+    """
+    Returns the GeoJSON FeatureCollection (as text) of the given GeoJSON Features (as text)
+    """
+    return '{"type": "FeatureCollection", "features": [' + ', '.join(features) + ']}'
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Build Mapbox Vector Tiles in PostgreSQL using ST_AsMVTGeom and ST_AsMVT.
+
+The tile of a queryset is cached in the shared cache per (tile SQL, z/x/y), the SQL contains all filters applied to the
+queryset. Cached tiles are invalidated using the version stamps of the tiles (see signals.apps.signals.utils.tiles).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.db import connections
+from django.db.models import F, Func, Value
+
+from signals.apps.signals.utils.cache import get_shared_cache
+from signals.apps.signals.utils.tiles import get_tile_version, tile_bounds, tile_bounds_wgs84
+
+WEB_MERCATOR_SRID = 3857
+MVT_EXTENT = 4096
+
+
+def _vector_tile_sql(queryset, geometry, properties, z, x, y, layer):
+    """
+    Returns the SQL and params of the query that builds the vector tile of the given queryset
+    """
+    envelope = Func(*[Value(bound) for bound in tile_bounds(z, x, y)], Value(WEB_MERCATOR_SRID),
+                    function='ST_MakeEnvelope', output_field=GeometryField(srid=WEB_MERCATOR_SRID))
+
+    bbox = Polygon.from_bbox(tile_bounds_wgs84(z, x, y))
+    bbox.srid = 4326
+
+    expressions = {
+        f'mvt_property_{i}': F(value) if isinstance(value, str) else value
+        for i, value in enumerate(properties.values())
+    }
+    expressions['mvt_geom'] = Func(Transform(geometry, WEB_MERCATOR_SRID), envelope, Value(MVT_EXTENT),
+                                   function='ST_AsMVTGeom', output_field=GeometryField(srid=WEB_MERCATOR_SRID))
+
+    features = queryset.filter(**{f'{geometry}__intersects': bbox}).order_by().values(**expressions)
+    features_sql, features_params = features.query.sql_with_params()
+
+    quote_name = connections[queryset.db].ops.quote_name
+    columns = ', '.join(
+        [quote_name('mvt_geom')] +
+        [f'{quote_name(f"mvt_property_{i}")} AS {quote_name(name)}' for i, name in enumerate(properties.keys())]
+    )
+    sql = (f'SELECT ST_AsMVT(tile, %s, {MVT_EXTENT}, %s) FROM '
+           f'(SELECT {columns} FROM ({features_sql}) AS features) AS tile')
+    return sql, (layer, 'mvt_geom', *features_params)
+
+
+def vector_tile(queryset, geometry, properties, z, x, y, layer='signals'):
+    """
+    Returns the Mapbox Vector Tile (bytes) z/x/y of the given queryset
+
+    :param geometry: name of the geometry field (in WGS84)
+    :param properties: dict mapping the property names to field names or expressions
+    """
+    sql, params = _vector_tile_sql(queryset, geometry, properties, z, x, y, layer)
+
+    cache_key = None
+    if z <= settings.SIGNAL_TILES_CACHE_MAX_ZOOM:
+        tile_hash = hashlib.sha1(f'{sql}{params}'.encode('utf-8')).hexdigest()
+        cache_key = f'signals.tiles.{tile_hash}.{get_tile_version(z, x, y)}.{z}.{x}.{y}'
+        tile = get_shared_cache().get(cache_key)
+        if tile is not None:
+            return tile
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    tile = bytes(row[0]) if row and row[0] is not None else b''
+
+    if cache_key:
+        get_shared_cache().set(cache_key, tile, settings.SIGNAL_TILES_CACHE_TIMEOUT)
+    return tile
@@ -1,7 +1,19 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from datapunt_api.rest import HALPagination
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 
 class LinkHeaderPagination(PageNumberPagination):
@@ -34,3 +46,181 @@ class LinkHeaderPagination(PageNumberPagination):
 
     def get_paginated_response(self, data):
         return Response(data, headers=self.get_pagination_headers())
+
+
+def estimate_count(queryset):
+    """
+    Returns the number of rows the PostgreSQL planner expects the given queryset to return, no rows are counted
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset (cursor) pagination, activated by adding the cursor query parameter (`?cursor=` for the first page).
+
+    The queryset is ordered on the (single) ordering field and the pk, the next page is selected using a filter
+    on the values of these fields of the last row of the current page. So unlike the OFFSET used by the page number
+    pagination, the cost of a page does not grow with the depth of the page. Only a "next" link is provided.
+
+    The total count is skipped in cursor mode, use `?count=exact` to count the rows or `?count=estimate` to use the
+    estimate of the PostgreSQL planner.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_ordering_message = 'Ordering on more than one field is not supported in combination with a cursor'
+
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view=view)
+
+        self.request = request
+        self.keyset_page_size = self.get_page_size(request) or api_settings.PAGE_SIZE
+        self.keyset_field, self.keyset_descending = self.get_keyset_ordering(queryset)
+        self.keyset_count = self.get_keyset_count(queryset, request)
+
+        ordering = [self.keyset_field, 'pk'] if self.keyset_field != 'pk' else ['pk']
+        queryset = queryset.annotate(
+            keyset_value=F(self.keyset_field)
+        ).order_by(
+            *[f'-{field}' if self.keyset_descending else field for field in ordering]
+        )
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.get_keyset_filter(queryset.model, value, pk))
+
+        # Fetch one extra row to determine if there is a next page
+        results = list(queryset[:self.keyset_page_size + 1])
+        self.keyset_has_next = len(results) > self.keyset_page_size
+        self.keyset_results = results[:self.keyset_page_size]
+        return self.keyset_results
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Returns the active ordering field and the direction, the pk is used if the queryset is not ordered.
+
+        Only one ordering field (and the pk) is used for the keyset, an ordering on more than one field or on an
+        expression is rejected instead of silently ignoring part of the ordering.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if len(ordering) > 1 or (ordering and not isinstance(ordering[0], str)):
+            raise ValidationError({'ordering': [self.invalid_ordering_message]})
+        field = ordering[0] if ordering else 'pk'
+        descending = field.startswith('-')
+        field = field.lstrip('-')
+        return ('pk' if field == queryset.model._meta.pk.name else field), descending
+
+    def get_keyset_count(self, queryset, request):
+        count = request.query_params.get(self.count_query_param)
+        if count == 'exact':
+            return queryset.count()
+        elif count == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def _is_nullable(self, model, field_path):
+        """
+        Returns False if the field and all relations in the path to the field can never be NULL
+        """
+        for name in field_path.split(LOOKUP_SEP):
+            field = model._meta.get_field(name)
+            if field.null or (field.is_relation and not field.concrete):
+                return True
+            model = field.related_model if field.is_relation else model
+        return False
+
+    def get_keyset_filter(self, model, value, pk):
+        """
+        Select the rows after the row with the given value of the ordering field and pk.
+
+        NULL values are sorted last in an ascending and first in a descending ordering (the PostgreSQL default).
+        """
+        gt, gte = ('lt', 'lte') if self.keyset_descending else ('gt', 'gte')
+        field = self.keyset_field
+        if field == 'pk':
+            return Q(**{f'pk__{gt}': pk})
+
+        if value is None:
+            after = Q(**{f'{field}__isnull': True, f'pk__{gt}': pk})
+            return after | Q(**{f'{field}__isnull': False}) if self.keyset_descending else after
+
+        # The redundant "gte" makes it possible to use an index on the ordering field
+        after = Q(**{f'{field}__{gte}': value}) & (Q(**{f'{field}__{gt}': value}) | Q(**{f'pk__{gt}': pk}))
+        if not self.keyset_descending and self._is_nullable(model, field):
+            after |= Q(**{f'{field}__isnull': True})
+        return after
+
+    def encode_cursor(self, obj):
+        data = json.dumps([obj.keyset_value, obj.pk], cls=DjangoJSONEncoder)
+        return b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+        if type(pk) is not int:
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return value, pk
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+
+        if not self.keyset_has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.keyset_results[-1]))
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        return None
+
+
+class KeysetHALPagination(KeysetPaginationMixin, HALPagination):
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        next_link = self.get_next_link()
+        headers = {'Link': f'<{next_link}>; rel="next"'} if next_link else None
+        return Response(OrderedDict([
+            ('_links', OrderedDict([
+                ('self', dict(href=self.request.build_absolute_uri())),
+                ('next', dict(href=next_link)),
+                ('previous', dict(href=None)),
+            ])),
+            ('count', self.keyset_count),
+            ('results', data),
+        ]), headers=headers)
+
+
+class KeysetLinkHeaderPagination(KeysetPaginationMixin, LinkHeaderPagination):
+    def get_pagination_headers(self):
+        if not self.keyset:
+            return super().get_pagination_headers()
+
+        header_links = [f'<{self.request.build_absolute_uri()}>; rel="self"']
+        next_link = self.get_next_link()
+        if next_link:
+            header_links.append(f'<{next_link}>; rel="next"')
+
+        headers = {'Link': ','.join(header_links)}
+        if self.keyset_count is not None:
+            headers['X-Total-Count'] = self.keyset_count
+        return headers
@@ -96,6 +96,14 @@ class SignalChangeCategoryPermission(SIABasePermission):
     }
 
 
+class SignalExportPermission(SIABasePermission):
+    perms_map = {
+        'GET': ['signals.sia_read', 'signals.sia_signal_export'],
+        'OPTIONS': [],
+        'HEAD': [],
+    }
+
+
 class ModelWritePermissions(DjangoModelPermissions):
     """
     In SIA we have binary permissions instead of the default add, change, delete permissions
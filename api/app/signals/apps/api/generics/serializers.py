@@ -1,10 +1,39 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
+from django.db import models
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.fields import empty
 
 
+def get_sparse_fields(request):
+    """
+    Returns the names of the fields requested with the "fields" query parameter (comma separated), None if all fields
+    are requested. Only used when reading, when writing all fields are used.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that only serializes the fields requested with the "fields" query parameter, the "_links" are
+    always serialized
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        sparse_fields = get_sparse_fields(self.context.get('request'))
+        if sparse_fields:
+            for field_name in set(self.fields) - sparse_fields - {'_links'}:
+                self.fields.pop(field_name)
+
+
 class SIAModelSerializer(serializers.ModelSerializer):
     permission_classes = None
 
@@ -39,3 +68,15 @@ class SIAModelSerializer(serializers.ModelSerializer):
         self.check_permissions()
 
         return super().validate(attrs=attrs)
+
+
+class PrepareInstancesListSerializer(serializers.ListSerializer):
+    """
+    Calls "prepare_instances" of the child serializer with all instances (of a page) before they are serialized. Used
+    to retrieve the data that is needed to serialize the instances in one query, instead of one query per instance.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        instances = list(iterable)
+        self.child.prepare_instances(instances)
+        return super().to_representation(instances)
@@ -20,3 +20,42 @@ class SerializedJsonRenderer(BaseRenderer):
             # This code path indents the JSON string for use in browsable API.
             return json.dumps(json.loads(data), indent=renderer_context['indent'])
         return data
+
+
+class MVTRenderer(BaseRenderer):
+    """
+    Renders Mapbox Vector Tiles, the data is the tile (bytes) generated by Postgres.
+    """
+    format = 'pbf'
+    media_type = 'application/vnd.mapbox-vector-tile'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        # For example the details of an exception
+        return json.dumps(data).encode('utf-8')
+
+
+class _StreamingExportRenderer(BaseRenderer):
+    """
+    Exports are streamed by the view (see signals.apps.api.generics.export), the renderer is only used to render
+    errors, for example the details of an invalid filter.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data).encode('utf-8')
+
+
+class NDJSONRenderer(_StreamingExportRenderer):
+    format = 'ndjson'
+    media_type = 'application/x-ndjson'
+
+
+class CSVRenderer(_StreamingExportRenderer):
+    format = 'csv'
+    media_type = 'text/csv'
@@ -23,6 +23,7 @@ from signals.apps.api.generics.permissions import (
     SignalCreateInitialPermission,
     SignalCreateNotePermission
 )
+from signals.apps.api.generics.serializers import PrepareInstancesListSerializer, SparseFieldsMixin
 from signals.apps.api.generics.validators import SignalSourceValidator
 from signals.apps.api.serializers.nested import (
     _NestedCategoryModelSerializer,
@@ -103,8 +104,22 @@ class _SignalListSerializer(serializers.ListSerializer):
 
         return attrs
 
+    def create(self, validated_data):
+        """
+        Create all given Signals at once using `SignalManager.create_initial_bulk`.
+        """
+        prepared = [self.child.get_create_initial_data(attrs) for attrs in validated_data]
+        signals = Signal.actions.create_initial_bulk([create_initial_data for create_initial_data, _ in prepared])
+
+        for signal, (_, attachments) in zip(signals, prepared):
+            if attachments:
+                Signal.actions.copy_attachments(data=attachments, signal=signal)
+
+        # Retrieve the Signals again so that changes made by the create_initial receivers are included
+        return list(Signal.objects.filter(pk__in=[signal.pk for signal in signals]).order_by('pk'))
+
 
-class PrivateSignalSerializerDetail(HALSerializer, AddressValidationMixin):
+class PrivateSignalSerializerDetail(SparseFieldsMixin, HALSerializer, AddressValidationMixin):
     """
     This serializer is used for the detail endpoint and when updating the instance
     """
@@ -213,7 +228,8 @@ class PrivateSignalSerializerDetail(HALSerializer, AddressValidationMixin):
         )
 
     def get_has_attachments(self, obj):
-        return obj.attachments.exists()
+        # Annotated by the PrivateSignalViewSet queryset
+        return obj.has_attachments if hasattr(obj, 'has_attachments') else obj.attachments.exists()
 
     def update(self, instance, validated_data): # noqa
         """
@@ -256,7 +272,7 @@ class PrivateSignalSerializerDetail(HALSerializer, AddressValidationMixin):
         return signal
 
 
-class PrivateSignalSerializerList(SignalValidationMixin, HALSerializer):
+class PrivateSignalSerializerList(SparseFieldsMixin, SignalValidationMixin, HALSerializer):
     """
     This serializer is used for the list endpoint and when creating a new instance
     """
@@ -388,13 +404,15 @@ class PrivateSignalSerializerList(SignalValidationMixin, HALSerializer):
         }
 
     def get_has_attachments(self, obj):
-        return obj.attachments.exists()
+        # Annotated by the PrivateSignalViewSet queryset
+        return obj.has_attachments if hasattr(obj, 'has_attachments') else obj.attachments.exists()
 
     def get_has_parent(self, obj):
         return obj.parent_id is not None  # True is a parent_id is set, False if not
 
     def get_has_children(self, obj):
-        return obj.children.exists()
+        # Annotated by the PrivateSignalViewSet queryset
+        return obj.has_children if hasattr(obj, 'has_children') else obj.children.exists()
 
     def validate(self, attrs):
         errors = {}
@@ -428,7 +446,10 @@ class PrivateSignalSerializerList(SignalValidationMixin, HALSerializer):
 
         return super().validate(attrs=attrs)
 
-    def create(self, validated_data):
+    def get_create_initial_data(self, validated_data):
+        """
+        Split the validated data in the arguments for `SignalManager.create_initial` and the attachments to copy.
+        """
         # Set default status
         logged_in_user = self.context['request'].user
         INITIAL_STATUS = {
@@ -456,15 +477,21 @@ class PrivateSignalSerializerList(SignalValidationMixin, HALSerializer):
 
         attachments = validated_data.pop('attachments') if 'attachments' in validated_data else None
 
-        signal = Signal.actions.create_initial(
-            validated_data,
-            location_data,
-            INITIAL_STATUS,
-            category_assignment_data,
-            reporter_data,
-            priority_data,
-            type_data
-        )
+        create_initial_data = {
+            'signal_data': validated_data,
+            'location_data': location_data,
+            'status_data': INITIAL_STATUS,
+            'category_assignment_data': category_assignment_data,
+            'reporter_data': reporter_data,
+            'priority_data': priority_data,
+            'type_data': type_data,
+        }
+        return create_initial_data, attachments
+
+    def create(self, validated_data):
+        create_initial_data, attachments = self.get_create_initial_data(validated_data)
+
+        signal = Signal.actions.create_initial(**create_initial_data)
 
         if attachments:
             Signal.actions.copy_attachments(data=attachments, signal=signal)
@@ -576,7 +603,27 @@ class SignalGeoSerializer(GeoFeatureModelSerializer):
         fields = ['id', 'created_at']
 
 
-class AbridgedChildSignalSerializer(HALSerializer):
+class CanViewSignalMixin:
+    """
+    Determines whether the user of the request can view the serialized Signals, the Signals of a list are checked in
+    one query (the list serializer of the serializer must be a PrepareInstancesListSerializer)
+    """
+    def prepare_instances(self, instances):
+        user = self.context['request'].user
+        accessible_signal_ids = set(Signal.objects.filter(
+            pk__in=[instance.pk for instance in instances]
+        ).filter_for_user(user).values_list('pk', flat=True))
+
+        for instance in instances:
+            instance.can_view = instance.pk in accessible_signal_ids
+
+    def get_can_view_signal(self, obj):
+        if not hasattr(obj, 'can_view'):
+            self.prepare_instances([obj])
+        return obj.can_view
+
+
+class AbridgedChildSignalSerializer(CanViewSignalMixin, HALSerializer):
     serializer_url_field = PrivateSignalLinksField
 
     status = serializers.SerializerMethodField()
@@ -594,6 +641,7 @@ class AbridgedChildSignalSerializer(HALSerializer):
             'updated_at',
             'can_view_signal'
         )
+        list_serializer_class = PrepareInstancesListSerializer
 
     def get_status(self, obj):
         return {
@@ -603,9 +651,8 @@ class AbridgedChildSignalSerializer(HALSerializer):
 
     def get_category(self, obj):
         departments = ', '.join(
-            obj.category_assignment.category.departments.filter(
-                categorydepartment__is_responsible=True
-            ).values_list('code', flat=True)
+            category_department.department.code
+            for category_department in obj.category_assignment.category.responsible_category_departments
         )
         return {
             'sub': obj.category_assignment.category.name,
@@ -614,6 +661,3 @@ class AbridgedChildSignalSerializer(HALSerializer):
             'main': obj.category_assignment.category.parent.name,
             'main_slug': obj.category_assignment.category.parent.slug,
         }
-
-    def get_can_view_signal(self, obj):
-        return Signal.objects.filter(pk=obj.pk).filter_for_user(self.context['request'].user).exists()
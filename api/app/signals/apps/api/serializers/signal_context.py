@@ -1,8 +1,7 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2021 Gemeente Amsterdam
 from datapunt_api.rest import HALSerializer
-from django.contrib.gis.db.models.functions import Distance
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q, Subquery
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework_gis.fields import GeometryField
@@ -10,11 +9,56 @@ from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
 from signals.apps.api import app_settings
 from signals.apps.api.fields import PrivateSignalWithContextLinksField
-from signals.apps.signals import workflow
+from signals.apps.api.generics.serializers import PrepareInstancesListSerializer
+from signals.apps.api.serializers.signal import CanViewSignalMixin
+from signals.apps.feedback.models import Feedback
 from signals.apps.signals.models import Signal
-
-
-class SignalContextReporterSerializer(serializers.ModelSerializer):
+from signals.apps.signals.utils.reporter_context import get_reporter_summary
+
+
+def get_signals_near(signal):
+    """
+    Returns the Signals in the same category near the location of the given Signal, created in the last weeks
+
+    Parent Signals are left out, their children are included.
+    """
+    return Signal.objects.filter_near(
+        signal.location.geometrie, app_settings.SIGNAL_CONTEXT_GEOGRAPHY_RADIUS
+    ).filter(
+        Q(parent__isnull=False) | Q(~Exists(Signal.objects.filter(parent_id=OuterRef('pk')))),
+        category_assignment__category_id=signal.category_assignment.category_id,
+        created_at__gte=(
+            timezone.now() - timezone.timedelta(weeks=app_settings.SIGNAL_CONTEXT_GEOGRAPHY_CREATED_DELTA_WEEKS)
+        ),
+    ).exclude(pk=signal.pk)
+
+
+def get_signals_for_reporter(signal):
+    """
+    Returns the Signals of the reporter of the given Signal, child Signals are left out
+
+    The latest feedback and whether the Signal has children are annotated, the responsible departments of the category
+    are prefetched.
+    """
+    latest_feedback = Feedback.objects.filter(_signal_id=OuterRef('pk')).order_by('-created_at')
+
+    return Signal.objects.select_related(
+        'category_assignment__category__parent',
+        'status',
+    ).prefetch_responsible_departments(
+    ).filter(
+        parent__isnull=True
+    ).filter_reporter(
+        email=signal.reporter.email
+    ).annotate(
+        feedback_created_at=Subquery(latest_feedback.values('created_at')[:1]),
+        feedback_is_satisfied=Subquery(latest_feedback.values('is_satisfied')[:1]),
+        feedback_submitted_at=Subquery(latest_feedback.values('submitted_at')[:1]),
+        has_children=Exists(Signal.objects.filter(parent_id=OuterRef('pk'))),
+    ).order_by('-created_at')
+
+
+class SignalContextReporterSerializer(CanViewSignalMixin, serializers.ModelSerializer):
     category = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     feedback = serializers.SerializerMethodField()
@@ -32,12 +76,12 @@ class SignalContextReporterSerializer(serializers.ModelSerializer):
             'can_view_signal',
             'has_children',
         )
+        list_serializer_class = PrepareInstancesListSerializer
 
     def get_category(self, obj):
         departments = ', '.join(
-            obj.category_assignment.category.departments.filter(
-                categorydepartment__is_responsible=True
-            ).values_list('code', flat=True)
+            category_department.department.code
+            for category_department in obj.category_assignment.category.responsible_category_departments
         )
         return {
             'sub': obj.category_assignment.category.name,
@@ -54,15 +98,11 @@ class SignalContextReporterSerializer(serializers.ModelSerializer):
         """
         Returns the lastest feedback object if it exists else None
         """
-        if obj.feedback.exists():
-            latest_feedback = obj.feedback.first()
-            return {'is_satisfied': latest_feedback.is_satisfied, 'submitted_at': latest_feedback.submitted_at, }
-
-    def get_can_view_signal(self, obj):
-        return Signal.objects.filter(pk=obj.pk).filter_for_user(self.context['request'].user).exists()
+        if obj.feedback_created_at is not None:
+            return {'is_satisfied': obj.feedback_is_satisfied, 'submitted_at': obj.feedback_submitted_at, }
 
     def get_has_children(self, obj):
-        return obj.children.exists()
+        return obj.has_children
 
 
 class SignalContextSerializer(HALSerializer):
@@ -80,42 +120,20 @@ class SignalContextSerializer(HALSerializer):
         )
 
     def get_near(self, obj):
-        signals_for_geography_qs = Signal.objects.annotate(
-            distance_from_point=Distance('location__geometrie', obj.location.geometrie),
-        ).filter(
-            (Q(parent__isnull=True) & Q(children__isnull=True)) | Q(parent__isnull=False),
-            distance_from_point__lte=app_settings.SIGNAL_CONTEXT_GEOGRAPHY_RADIUS,
-            category_assignment__category_id=obj.category_assignment.category.pk,
-            created_at__gte=(
-                timezone.now() - timezone.timedelta(weeks=app_settings.SIGNAL_CONTEXT_GEOGRAPHY_CREATED_DELTA_WEEKS)
-            ),
-        ).exclude(pk=obj.pk)
-
         return {
-            'signal_count': signals_for_geography_qs.count(),
+            'signal_count': get_signals_near(obj).count(),
         }
 
     def get_reporter(self, obj):
         if not obj.reporter.email:
             return None
 
-        reporter_email = obj.reporter.email
-
-        signals_for_reporter_count = Signal.objects.filter_reporter(
-            email=reporter_email
-        ).filter(parent__isnull=True).count()
-        open_signals_for_reporter_count = Signal.objects.filter_reporter(email=reporter_email).exclude(
-            status__state__in=[workflow.GEANNULEERD, workflow.AFGEHANDELD, workflow.GESPLITST]
-        ).filter(parent__isnull=True).count()
-        # Not filtering parent__isnull=True, as feedback is not requested for child signals.
-        satisfied_count = Signal.objects.reporter_feedback_satisfied_count(email=reporter_email)
-        not_satisfied_count = Signal.objects.reporter_feedback_not_satisfied_count(email=reporter_email)
-
+        summary = get_reporter_summary(obj.reporter.email)
         return {
-            'signal_count': signals_for_reporter_count,
-            'open_count': open_signals_for_reporter_count,
-            'positive_count': satisfied_count,
-            'negative_count': not_satisfied_count,
+            'signal_count': summary['signal_count'],
+            'open_count': summary['open_count'],
+            'positive_count': summary['positive_count'],
+            'negative_count': summary['negative_count'],
         }
 
 
@@ -3,26 +3,18 @@
 from datapunt_api.rest import HALSerializer
 from rest_framework import serializers
 
-from signals.apps.signals.models import History, Signal
+from signals.apps.signals.models import HistoryEvent, Signal
 
 
 class HistoryHalSerializer(HALSerializer):
     _signal = serializers.PrimaryKeyRelatedField(queryset=Signal.objects.all())
     who = serializers.SerializerMethodField()
-    description = serializers.SerializerMethodField()
-    action = serializers.SerializerMethodField()
 
     def get_who(self, obj):
         return obj.get_who()
 
-    def get_description(self, obj):
-        return obj.get_description()
-
-    def get_action(self, obj):
-        return obj.get_action()
-
     class Meta:
-        model = History
+        model = HistoryEvent
         fields = (
             'identifier',
             'when',
@@ -0,0 +1,19 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.db.models.signals import post_delete, post_save
+
+from signals.apps.api.filters.utils import bump_choices_version, choice_registry
+from signals.apps.signals.utils.transaction import on_commit_once
+
+
+def choices_changed_handler(sender, instance, *args, **kwargs):
+    # The cached choices used for filtering are outdated, bumped once per transaction after the commit (the dataset
+    # loaders save thousands of Areas in one transaction)
+    on_commit_once(bump_choices_version)
+
+
+for model in choice_registry.models:
+    post_save.connect(choices_changed_handler, sender=model,
+                      dispatch_uid=f'signals_api_choices_saved_{model._meta.label_lower}')
+    post_delete.connect(choices_changed_handler, sender=model,
+                        dispatch_uid=f'signals_api_choices_deleted_{model._meta.label_lower}')
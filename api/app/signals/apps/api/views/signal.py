@@ -3,8 +3,10 @@
 import logging
 
 from datapunt_api.rest import DatapuntViewSet, HALPagination
-from django.db import connection
-from django.http import Http404
+from django.conf import settings
+from django.db.models import Exists, F, FloatField, Func, OuterRef, TextField
+from django.db.models.functions import Cast
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
@@ -15,14 +17,28 @@ from rest_framework.viewsets import GenericViewSet, ViewSet
 
 from signals.apps.api.filters import SignalFilterSet, SignalPromotedToParentFilter
 from signals.apps.api.generics import mixins
+from signals.apps.api.generics.clustering import (
+    ClusterQueryParamsSerializer,
+    cluster_feature_collection
+)
+from signals.apps.api.generics.export import stream_csv, stream_ndjson
 from signals.apps.api.generics.filters import FieldMappingOrderingFilter
-from signals.apps.api.generics.pagination import LinkHeaderPagination
+from signals.apps.api.generics.geojson import annotate_geojson_feature, geojson_feature_collection
+from signals.apps.api.generics.mvt import vector_tile
+from signals.apps.api.generics.pagination import KeysetHALPagination, KeysetLinkHeaderPagination
 from signals.apps.api.generics.permissions import (
     SIAPermissions,
     SignalCreateInitialPermission,
+    SignalExportPermission,
     SignalViewObjectPermission
 )
-from signals.apps.api.renderers import SerializedJsonRenderer
+from signals.apps.api.generics.serializers import get_sparse_fields
+from signals.apps.api.renderers import (
+    CSVRenderer,
+    MVTRenderer,
+    NDJSONRenderer,
+    SerializedJsonRenderer
+)
 from signals.apps.api.serializers import (
     AbridgedChildSignalSerializer,
     HistoryHalSerializer,
@@ -30,12 +46,17 @@ from signals.apps.api.serializers import (
     PrivateSignalSerializerList,
     PublicSignalCreateSerializer,
     PublicSignalSerializerDetail,
-    SignalGeoSerializer,
     SignalIdListSerializer
 )
 from signals.apps.api.views._base import PublicSignalGenericViewSet
 from signals.apps.signals import workflow
-from signals.apps.signals.models import Signal
+from signals.apps.signals.models import Attachment, Signal
+from signals.apps.signals.utils.cache import get_shared_cache
+from signals.apps.signals.utils.public_map import (
+    PUBLIC_MAP_PAYLOAD_CACHE_KEY,
+    get_public_map_version
+)
+from signals.apps.signals.utils.tiles import is_valid_tile
 from signals.auth.backend import JWTAuthBackend
 from signals.throttling import PostOnlyNoUserRateThrottle
 
@@ -69,52 +90,78 @@ class PublicSignalMapViewSet(ViewSet):
     # django-drf has too much overhead with these kinds of 'fast' request.
     # When implemented using django-drf, retrieving a large number of elements cost around 4s (profiled)
     # Using pgsql ability to generate geojson, the request time reduces to 30ms (> 130x speedup!)
-    # The downside is that this query has to be (potentially) maintained when changing one of the
-    # following models: signal, categoryassignment, category, location, status
+    # The GeoJSON is built by the database, see signals.apps.api.generics.geojson
+
+    def get_queryset(self):
+        return Signal.objects.filter(
+            location__isnull=False,
+            status__isnull=False,
+        ).exclude(
+            status__state__in=[workflow.AFGEHANDELD, workflow.AFGEHANDELD_EXTERN, workflow.GEANNULEERD,
+                               workflow.VERZOEK_TOT_HEROPENEN],
+        ).only(
+            'id'
+        ).order_by(
+            '-id'
+        )
 
-    def list(self, *args, **kwargs):
-        fast_query = f"""
-        select jsonb_build_object(
-            'type', 'FeatureCollection',
-            'features', json_agg(features.feature)
-        ) as result from (
-            select json_build_object(
-                'type', 'Feature',
-                'geometry', st_asgeojson(l.geometrie)::jsonb,
-                'properties', json_build_object(
-                    'id', to_jsonb(s.id),
-                    'created_at', to_jsonb(s.created_at),
-                    'status', to_jsonb(status.state),
-                    'category', json_build_object(
-                        'sub', to_jsonb(cat.name),
-                        'main', to_jsonb(maincat.name)
-                    )
-                )
-            ) as feature
-            from
-                signals_signal s
-                left join signals_categoryassignment ca on s.category_assignment_id = ca.id
-                left join signals_category cat on ca.category_id = cat.id
-                left join signals_category maincat on cat.parent_id = maincat.id,
-                signals_location l,
-                signals_status status
-            where
-                s.location_id = l.id
-                and s.status_id = status.id
-                and status.state not in ('{workflow.AFGEHANDELD}', '{workflow.AFGEHANDELD_EXTERN}', '{workflow.GEANNULEERD}', '{workflow.VERZOEK_TOT_HEROPENEN}')
-            order by s.id desc
-            limit 4000 offset 0
-        ) as features
-        """ # noqa
-
-        cursor = connection.cursor()
-        try:
-            cursor.execute(fast_query)
-            row = cursor.fetchone()
-            return Response(row[0])
-        except Exception as e:
-            cursor.close
-            logger.error('failed to retrieve signals json from db', exc_info=e)
+    def list(self, request, *args, **kwargs):
+        if 'cluster' in request.query_params:
+            serializer = ClusterQueryParamsSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            return Response(cluster_feature_collection(self.get_queryset(), geometry='location__geometrie',
+                                                       **serializer.validated_data))
+
+        version = get_public_map_version()
+        headers = {'ETag': f'"{version}"'}
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if headers['ETag'] in [etag.strip() for etag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+            response['ETag'] = headers['ETag']
+            return response
+
+        cache_key = PUBLIC_MAP_PAYLOAD_CACHE_KEY.format(version=version)
+        shared_cache = get_shared_cache()
+        payload = shared_cache.get(cache_key)
+        if payload is None:
+            payload = self.get_payload()
+            shared_cache.set(cache_key, payload, settings.PUBLIC_MAP_CACHE_TIMEOUT)
+
+        return Response(payload, headers=headers)
+
+    def get_payload(self):
+        """
+        The GeoJSON FeatureCollection of the (latest 4000) signals shown on the public map
+        """
+        queryset = annotate_geojson_feature(self.get_queryset(), geometry='location__geometrie', properties={
+            'id': 'id',
+            'created_at': 'created_at',
+            'status': 'status__state',
+            'category': {
+                'sub': 'category_assignment__category__name',
+                'main': 'category_assignment__category__parent__name',
+            },
+        })
+
+        features = queryset.values_list('geojson_feature', flat=True)[:4000]
+        return geojson_feature_collection(features)
+
+    @action(detail=False, url_path=r'tiles/(?P<z>[0-9]+)/(?P<x>[0-9]+)/(?P<y>[0-9]+)', renderer_classes=[MVTRenderer])
+    def tiles(self, request, z, x, y, format=None):
+        """
+        Mapbox Vector Tile of the Signals shown on the public map
+        """
+        z, x, y = int(z), int(x), int(y)
+        if not is_valid_tile(z, x, y):
+            raise NotFound(detail=f'Tile {z}/{x}/{y} does not exist.')
+
+        tile = vector_tile(self.get_queryset(), geometry='location__geometrie', properties={
+            'id': 'id',
+            'status': 'status__state',
+            'category_sub': 'category_assignment__category__name',
+            'category_main': 'category_assignment__category__parent__name',
+        }, z=z, x=x, y=y)
+        return Response(tile)
 
     def get_view_name(self):
         # Overridden to avoid: "Public Signal Map List" that is the default behavior here.
@@ -132,30 +179,56 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
         'priority',
         'parent',
         'type_assignment',
+        'directing_departments_assignment',
+        'routing_assignment',
+        'user_assignment__user',
     ).prefetch_related(
         'category_assignment__category__departments',
-        'children',
-        'attachments',
         'notes',
-        'signal_departments',
-        'user_assignment',
+        'directing_departments_assignment__departments',
+        'routing_assignment__departments',
+    ).annotate(
+        # Used by the serializers instead of an EXISTS query per Signal
+        has_attachments=Exists(Attachment.objects.filter(_signal_id=OuterRef('pk'))),
+        has_children=Exists(Signal.objects.filter(parent_id=OuterRef('pk'))),
     ).all()
 
-    # Geography queryset to reduce the complexity of the query
-    geography_queryset = Signal.objects.select_related(
-        'location',  # We only need the location for now
-    ).filter(
+    # The related objects and annotations used by the fields of the list serializer. When only some of the fields are
+    # requested (?fields=) only the related objects and annotations of these fields are used.
+    field_select_related = {
+        '_display': ['status', 'location'],
+        'location': ['location'],
+        'status': ['status'],
+        'category': ['category_assignment__category__parent'],
+        'reporter': ['reporter'],
+        'priority': ['priority'],
+        'type': ['type_assignment'],
+        'directing_departments': ['directing_departments_assignment'],
+        'routing_departments': ['routing_assignment'],
+        'assigned_user_email': ['user_assignment__user'],
+    }
+    field_prefetch_related = {
+        'category': ['category_assignment__category__departments'],
+        'notes': ['notes'],
+        'directing_departments': ['directing_departments_assignment__departments'],
+        'routing_departments': ['routing_assignment__departments'],
+    }
+    field_annotations = {
+        'has_attachments': Exists(Attachment.objects.filter(_signal_id=OuterRef('pk'))),
+        'has_children': Exists(Signal.objects.filter(parent_id=OuterRef('pk'))),
+    }
+
+    # Geography queryset to reduce the complexity of the query, the GeoJSON is built by the database
+    geography_queryset = Signal.objects.filter(
         location__isnull=False  # We can only show signals on a map that have a location
-    ).only(  # No need to select anything else than the id, created and the location for now
-        'id',
-        'created_at',
-        'location'
+    ).only(
+        'id'
     ).all()
 
     serializer_class = PrivateSignalSerializerList
     serializer_detail_class = PrivateSignalSerializerDetail
 
-    pagination_class = HALPagination
+    pagination_class = KeysetHALPagination
 
     authentication_classes = (JWTAuthBackend,)
     permission_classes = (SignalCreateInitialPermission,)
@@ -190,15 +263,59 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
         'assigned_user_email': 'user_assignment__user__email',
     }
 
+    # The flat projection of the Signals used by the export, the names of the expressions may not clash with the names
+    # of the fields of the Signal
+    export_fields = (
+        'id',
+        'created_at',
+        'updated_at',
+        'incident_date_start',
+        'incident_date_end',
+        'source',
+        'text',
+        'text_extra',
+        'parent_id',
+    )
+    export_expressions = {
+        'signal_uuid': F('uuid'),
+        'state': F('status__state'),
+        'main_category': F('category_assignment__category__parent__slug'),
+        'sub_category': F('category_assignment__category__slug'),
+        'priority_level': F('priority__priority'),
+        'type': F('type_assignment__name'),
+        'address': F('location__address_text'),
+        'stadsdeel': F('location__stadsdeel'),
+        'buurt_code': F('location__buurt_code'),
+        'lon': Func('location__geometrie', function='ST_X', output_field=FloatField()),
+        'lat': Func('location__geometrie', function='ST_Y', output_field=FloatField()),
+        'assigned_user_email': F('user_assignment__user__email'),
+    }
+
     http_method_names = ['get', 'post', 'patch', 'head', 'options', 'trace']
 
     def get_queryset(self, *args, **kwargs):
         if self._is_request_to_detail_endpoint():
             return super().get_queryset(*args, **kwargs)
         else:
-            qs = super().get_queryset(*args, **kwargs)
+            sparse_fields = get_sparse_fields(self.request)
+            if sparse_fields:
+                qs = self.get_sparse_queryset(sparse_fields)
+            else:
+                qs = super().get_queryset(*args, **kwargs)
             return qs.filter_for_user(user=self.request.user)
 
+    def get_sparse_queryset(self, fields):
+        """
+        Queryset with only the related objects and annotations needed to serialize the given fields
+        """
+        return Signal.objects.select_related(
+            *{related for field in fields for related in self.field_select_related.get(field, [])}
+        ).prefetch_related(
+            *{related for field in fields for related in self.field_prefetch_related.get(field, [])}
+        ).annotate(
+            **{field: self.field_annotations[field] for field in fields if field in self.field_annotations}
+        )
+
     def check_object_permissions(self, request, obj):
         for permission_class in self.object_permission_classes:
             permission = permission_class()
@@ -211,7 +328,7 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
     def history(self, *args, **kwargs):
         """History endpoint filterable by action."""
         signal = self.get_object()
-        history_entries = signal.history.all()
+        history_entries = signal.history_events.all()
         what = self.request.query_params.get('what', None)
         if what:
             history_entries = history_entries.filter(what=what)
@@ -219,7 +336,7 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
         serializer = HistoryHalSerializer(history_entries, many=True)
         return Response(serializer.data)
 
-    @action(detail=False, url_path=r'geography/?$')
+    @action(detail=False, url_path=r'geography/?$', renderer_classes=[SerializedJsonRenderer, BrowsableAPIRenderer])
     def geography(self, request):
         # Makes use of the optimised queryset
         filtered_qs = self.filter_queryset(
@@ -229,15 +346,66 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
         ).order_by(
             'id'  # Oldest Signals first
         )
-
-        paginator = LinkHeaderPagination(page_query_param='geopage', page_size=4000)  # noqa page_size = 2.5 times the average signals made in a day, at this moment the highest average is 1600
+        if 'cluster' in request.query_params:
+            serializer = ClusterQueryParamsSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            return Response(cluster_feature_collection(filtered_qs, geometry='location__geometrie',
+                                                       **serializer.validated_data))
+
+        filtered_qs = annotate_geojson_feature(filtered_qs, geometry='location__geometrie', properties={
+            'id': 'id',
+            'created_at': 'created_at',
+        })
+
+        paginator = KeysetLinkHeaderPagination(page_query_param='geopage', page_size=4000)  # noqa page_size = 2.5 times the average signals made in a day, at this moment the highest average is 1600
         page = paginator.paginate_queryset(filtered_qs, self.request, view=self)
         if page is not None:
-            serializer = SignalGeoSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            feature_collection = geojson_feature_collection(signal.geojson_feature for signal in page)
+            return paginator.get_paginated_response(feature_collection)
 
-        serializer = SignalGeoSerializer(filtered_qs, many=True)
-        return Response(serializer.data)
+        feature_collection = geojson_feature_collection(filtered_qs.values_list('geojson_feature', flat=True))
+        return Response(feature_collection)
+
+    @action(detail=False, url_path=r'tiles/(?P<z>[0-9]+)/(?P<x>[0-9]+)/(?P<y>[0-9]+)', renderer_classes=[MVTRenderer])
+    def tiles(self, request, z, x, y, format=None):
+        """
+        Mapbox Vector Tile of the Signals the user is allowed to see, filterable like the geography endpoint
+        """
+        z, x, y = int(z), int(x), int(y)
+        if not is_valid_tile(z, x, y):
+            raise NotFound(detail=f'Tile {z}/{x}/{y} does not exist.')
+
+        filtered_qs = self.filter_queryset(
+            self.geography_queryset.filter_for_user(
+                user=self.request.user
+            )
+        )
+        tile = vector_tile(filtered_qs, geometry='location__geometrie', properties={
+            'id': 'id',
+            'created_at': Cast('created_at', output_field=TextField()),
+        }, z=z, x=x, y=y)
+        return Response(tile)
+
+    @action(detail=False, url_path=r'export/?$', renderer_classes=[NDJSONRenderer, CSVRenderer],
+            permission_classes=(SignalExportPermission,))
+    def export(self, request):
+        """
+        Streams all Signals the user is allowed to see as newline delimited JSON (?format=ndjson, the default) or as CSV
+        (?format=csv), filterable and orderable like the list endpoint
+        """
+        filtered_qs = self.filter_queryset(
+            Signal.objects.filter_for_user(user=self.request.user)
+        ).values(
+            *self.export_fields,
+            **self.export_expressions
+        )
+        field_names = [*self.export_fields, *self.export_expressions]
+
+        if request.accepted_renderer.format == 'csv':
+            response = StreamingHttpResponse(stream_csv(filtered_qs, field_names), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="signals.csv"'
+            return response
+        return StreamingHttpResponse(stream_ndjson(filtered_qs), content_type='application/x-ndjson')
 
     @action(detail=True, url_path=r'children/?$')
     def children(self, request, pk=None):
@@ -258,8 +426,11 @@ class PrivateSignalViewSet(mixins.CreateModelMixin, mixins.UpdateModelMixin, Dat
 
         # Return the child signals for a parent signal in an abridged version
         # of the usual serialization.
-        paginator = HALPagination()
-        child_qs = signal.children.all()
+        paginator = KeysetHALPagination()
+        child_qs = signal.children.select_related(
+            'category_assignment__category__parent',
+            'status',
+        ).prefetch_responsible_departments()
         page = paginator.paginate_queryset(child_qs, self.request, view=self)
 
         if page is not None:
@@ -3,14 +3,10 @@
 import logging
 
 from datapunt_api.rest import HALPagination
-from django.contrib.gis.db.models.functions import Distance
-from django.db.models import Q
-from django.utils import timezone
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from signals.apps.api import app_settings
 from signals.apps.api.generics import mixins
 from signals.apps.api.generics.pagination import LinkHeaderPagination
 from signals.apps.api.generics.permissions import SIAPermissions
@@ -19,6 +15,7 @@ from signals.apps.api.serializers import (
     SignalContextReporterSerializer,
     SignalContextSerializer
 )
+from signals.apps.api.serializers.signal_context import get_signals_for_reporter, get_signals_near
 from signals.apps.signals.models import Signal
 from signals.auth.backend import JWTAuthBackend
 
@@ -40,16 +37,7 @@ class SignalContextViewSet(mixins.RetrieveModelMixin, GenericViewSet):
     def near(self, request, pk=None):
         signal = self.get_object()
 
-        signals_for_geography_qs = Signal.objects.annotate(
-            distance_from_point=Distance('location__geometrie', signal.location.geometrie),
-        ).filter(
-            (Q(parent__isnull=True) & Q(children__isnull=True)) | Q(parent__isnull=False),
-            distance_from_point__lte=app_settings.SIGNAL_CONTEXT_GEOGRAPHY_RADIUS,
-            category_assignment__category_id=signal.category_assignment.category.pk,
-            created_at__gte=(
-                timezone.now() - timezone.timedelta(weeks=app_settings.SIGNAL_CONTEXT_GEOGRAPHY_CREATED_DELTA_WEEKS)
-            ),
-        ).exclude(pk=signal.pk)
+        signals_for_geography_qs = get_signals_near(signal).select_related('location')
 
         paginator = LinkHeaderPagination(page_query_param='geopage', page_size=4000)
         page = paginator.paginate_queryset(signals_for_geography_qs, self.request, view=self)
@@ -63,18 +51,7 @@ class SignalContextViewSet(mixins.RetrieveModelMixin, GenericViewSet):
     def reporter(self, request, pk=None):
         signal = self.get_object()
         if signal.reporter.email:
-            signals_for_reporter_qs = Signal.objects.select_related(
-                'category_assignment',
-                'category_assignment__category',
-                'status',
-            ).prefetch_related(
-                'feedback',
-                'category_assignment__category__departments'
-            ).filter(
-                parent__isnull=True
-            ).filter_reporter(
-                email=signal.reporter.email
-            ).order_by('-created_at')
+            signals_for_reporter_qs = get_signals_for_reporter(signal)
         else:
             raise NotFound(detail=f'Signal {pk} has no reporter contact detail.')
 
@@ -16,6 +16,8 @@ from requests.packages.urllib3.util.retry import Retry
 
 from signals.apps.dataset.base import AreaLoader
 from signals.apps.signals.models import Area, AreaType
+from signals.apps.signals.utils.area_index import bump_area_index_version
+from signals.apps.signals.utils.transaction import on_commit_once
 
 
 class GebiedenAPIGeometryLoader:
@@ -114,3 +116,6 @@ class APIGebiedenLoader(AreaLoader):
 
             # Fix any invalid geometries
             Area.objects.filter(_type=self.area_type).update(geometry=MakeValid('geometry'))
+
+            # Make sure all processes rebuild their Area index
+            on_commit_once(bump_area_index_version)
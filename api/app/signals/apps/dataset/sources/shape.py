@@ -11,6 +11,8 @@ from django.db import transaction
 
 from signals.apps.dataset.base import AreaLoader
 from signals.apps.signals.models import Area, AreaType
+from signals.apps.signals.utils.area_index import bump_area_index_version
+from signals.apps.signals.utils.transaction import on_commit_once
 
 
 class ShapeBoundariesLoader(AreaLoader):
@@ -99,6 +101,9 @@ class ShapeBoundariesLoader(AreaLoader):
                     geometry=geos_geometry
                 )
 
+            # Make sure all processes rebuild their Area index
+            on_commit_once(bump_area_index_version)
+
     def load(self):
         split_url = urlsplit(self.DATASET_URL)
         zip_name = os.path.split(split_url.path)[-1]
@@ -15,6 +15,8 @@ from django.utils.text import slugify
 
 from signals.apps.dataset.base import AreaLoader
 from signals.apps.signals.models import Area, AreaType
+from signals.apps.signals.utils.area_index import bump_area_index_version
+from signals.apps.signals.utils.transaction import on_commit_once
 
 THIS_DIR = os.path.dirname(__file__)
 
@@ -104,6 +106,9 @@ class SIAStadsdeelLoader(AreaLoader):
                 geometry=diff
             )
 
+            # Make sure all processes rebuild their Area index
+            on_commit_once(bump_area_index_version)
+
             # # Special case for Weesp (we want it as a sia-stadsdeel as well)
             # weesp = Area.objects.get(_type__code='cbs-gemeente-2019', name__iexact='weesp')
             # Area.objects.create(
@@ -0,0 +1,44 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from collections.abc import Mapping
+
+from signals.apps.signals.utils.area_index import AreaTypeIndex
+
+
+class AreaTypeGeometries(Mapping):
+    """
+    The geometries of the Areas of an AreaType by Area code, as used in the "in" expressions of the DSL:
+
+        location in areas."stadsdeel"."centrum"
+
+    Besides the geometries the Areas are kept in an AreaTypeIndex (prepared geometries indexed in a uniform grid). The
+    compiled "in" expressions use `contains`, which searches the index once per location and answers the following
+    expressions for the same location with a set lookup.
+    """
+    def __init__(self, areas):
+        # When several Areas have the same code the last one is used, the same as the plain geometries dict
+        areas = list({area.code: area for area in areas}.values())
+        self._geometries = {area.code: area.geometry for area in areas}
+        self._index = AreaTypeIndex(areas)
+        self._last = (None, frozenset())  # The last location and the codes of the Areas that contain it
+
+    def __getitem__(self, code):
+        return self._geometries[code]
+
+    def __iter__(self):
+        return iter(self._geometries)
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def contains(self, code, point):
+        """
+        Returns True if the Area with the given code contains the given point, raises a KeyError for an unknown code
+        """
+        if code not in self._geometries:
+            raise KeyError(code)
+
+        last = self._last
+        if last[0] is not point:
+            last = self._last = (point, frozenset(area.code for area in self._index.find_all(point)))
+        return code in last[1]
@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Compiles the textX model of an expression into a tree of Python closures.
+
+The ExpressionEvaluator interprets the model on every evaluation: operators are looked up, time literals are parsed
+and every node is visited through a method call on the model. The ExpressionCompiler does this work once: literals
+are parsed at compile time, identifiers are bound to a lookup in the context and the geometries of "in" expressions
+are prepared once and reused for the following evaluations. The Areas of the SignalContext (AreaTypeGeometries) are
+searched using their spatial index.
+
+A compiled expression has the same interface as the model, `compiled.evaluate(ctx)`, and raises the same errors at
+runtime as the ExpressionEvaluator.
+"""
+import operator
+
+from django.contrib.gis import geos
+
+from signals.apps.dsl.areas import AreaTypeGeometries
+from signals.apps.dsl.evaluators.equality_evaluator import EqualityEvaluator
+from signals.apps.dsl.evaluators.in_evaluator import InEvaluator
+from signals.apps.dsl.evaluators.logical_evaluator import LogicalEvaluator
+from signals.apps.dsl.evaluators.root_evaluator import RootEvaluator
+from signals.apps.dsl.evaluators.terminal_evaluator import TerminalEvaluator
+from signals.apps.dsl.ExpressionEvaluator import ExpressionEvaluator
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class CompiledExpression:
+    __slots__ = ('code', 'evaluate')
+
+    def __init__(self, code, evaluate):
+        self.code = code
+        self.evaluate = evaluate
+
+    def __call__(self, ctx):
+        return self.evaluate(ctx)
+
+
+def _and(operands):
+    def evaluate_and(ctx):
+        for operand in operands:
+            if not operand(ctx):
+                return False
+        return True
+    return evaluate_and
+
+
+def _or(operands):
+    def evaluate_or(ctx):
+        for operand in operands:
+            if operand(ctx):
+                return True
+        return False
+    return evaluate_or
+
+
+LOGICAL_OPERATORS = {
+    'and': _and,
+    'or': _or,
+}
+
+
+def _raise_type_error(exp, act):
+    raise Exception("Error: expected: '{exp}', actual: '{act}'".format(exp=exp, act=act))
+
+
+def _prepared_contains():
+    # The last geometry and its prepared geometry. The areas in the context are loaded once, so the geometry is only
+    # prepared again when the path resolves to another geometry.
+    prepared = (None, None)
+
+    def contains(geometry, point):
+        nonlocal prepared
+        current = prepared
+        if current[0] is not geometry:
+            current = prepared = (geometry, geometry.prepared)
+        return current[1].contains(point)
+    return contains
+
+
+def _raise_on_evaluate(message):
+    # An expression that is not supported raises when it is evaluated, like the ExpressionEvaluator
+    def evaluate_error(ctx):
+        raise Exception(message)
+    return evaluate_error
+
+
+class ExpressionCompiler:
+    mm = ExpressionEvaluator.mm
+
+    def __init__(self):
+        self._compilers = (
+            (RootEvaluator, self._compile_root),
+            (LogicalEvaluator, self._compile_logical),
+            (EqualityEvaluator, self._compile_equality),
+            (InEvaluator, self._compile_in),
+            (TerminalEvaluator, self._compile_terminal),
+        )
+
+    def compile(self, code):
+        return CompiledExpression(code, self.compile_node(self.mm.model_from_str(code)))
+
+    def compile_node(self, node):
+        for node_class, compiler in self._compilers:
+            if isinstance(node, node_class):
+                return compiler(node)
+        raise Exception("Could not compile node: '{}'".format(type(node).__name__))
+
+    def _compile_root(self, node):
+        return self.compile_node(node.expression)
+
+    def _compile_logical(self, node):
+        operands = tuple([self.compile_node(node.lhs)] + [self.compile_node(rhs) for rhs in node.rhs or []])
+        if len(operands) == 1:
+            return operands[0]
+
+        if node.op in LOGICAL_OPERATORS:
+            return LOGICAL_OPERATORS[node.op](operands)
+        return _raise_on_evaluate("logical operator: '{}' is not supported".format(node.op))
+
+    def _compile_equality(self, node):
+        if node.op not in OPERATORS:
+            return _raise_on_evaluate("Equality operator: '{}' is not supported".format(node.op))
+        op = OPERATORS[node.op]
+        lhs = self.compile_node(node.lhs)
+
+        is_literal, value = self._literal(node.rhs)
+        if is_literal:
+            # Most expressions compare an identifier with a literal, the literal is bound directly
+            return lambda ctx: op(lhs(ctx), value)
+
+        rhs = self.compile_node(node.rhs)
+        return lambda ctx: op(lhs(ctx), rhs(ctx))
+
+    def _compile_in(self, node):
+        lhs = self.compile_node(node.lhs)
+        rhs = self.compile_node(node.rhs)
+        contains = self._compile_geo_contains(node, rhs)
+
+        def evaluate_in(ctx):
+            lhs_val = lhs(ctx)
+            if isinstance(lhs_val, str):
+                rhs_val = rhs(ctx)
+                if type(rhs_val) is not set:
+                    _raise_type_error(exp=type(set), act=type(rhs_val))
+                return lhs_val in rhs_val
+            elif isinstance(lhs_val, geos.Point):
+                return contains(ctx, lhs_val)
+            raise Exception("No 'in' handler for type: 'unknown'")
+        return evaluate_in
+
+    def _compile_geo_contains(self, node, rhs):
+        props = tuple(self.compile_node(prop) for prop in node.rhs_prop or [])
+        parent_props, last_props = props[:-1], props[-1:]
+        path = '.'.join(prop.id_val or prop.str_val for prop in node.rhs_prop or [])
+        prepared_contains = _prepared_contains()
+
+        def contains(ctx, point):
+            try:
+                geometry = rhs(ctx)
+                for prop in parent_props:
+                    geometry = geometry[prop(ctx)]
+                for prop in last_props:
+                    if isinstance(geometry, AreaTypeGeometries):
+                        # The Areas of the SignalContext are searched using their spatial index, only when the last
+                        # prop of the path is the code of an Area
+                        return geometry.contains(prop(ctx), point)
+                    geometry = geometry[prop(ctx)]
+            except KeyError:
+                raise Exception('Could not resolve {prop}'.format(prop=path))
+            if type(geometry) is not geos.MultiPolygon:
+                _raise_type_error(exp=type(geos.MultiPolygon), act=type(geometry))
+            return prepared_contains(geometry, point)
+        return contains
+
+    def _compile_terminal(self, node):
+        if node.id_val:
+            ident = node.id_val
+
+            def resolve(ctx):
+                try:
+                    return ctx[ident]
+                except KeyError:
+                    raise Exception("Could not resolve ident: '{}'".format(ident))
+            return resolve
+
+        is_literal, value = self._literal(node)
+        if is_literal:
+            return lambda ctx: value
+
+        def no_value(ctx):
+            raise Exception('No value for term evaluator')
+        return no_value
+
+    def _literal(self, node):
+        """
+        Returns a tuple (is_literal, value), the value of a time literal is parsed once
+        """
+        if not isinstance(node, TerminalEvaluator) or node.id_val:
+            return False, None
+        if node.str_val:
+            return True, node.str_val
+        if node.time_val:
+            return True, node._convert(node.time_val)
+        if node.numeric_val is not None:
+            return True, node.numeric_val
+        return False, None
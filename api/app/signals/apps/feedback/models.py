@@ -65,8 +65,11 @@ class Feedback(models.Model):
 
 def _get_description_of_receive_feedback(feedback_id):
     """Given a history entry for submission of feedback create descriptive text."""
-    feedback = Feedback.objects.get(token=feedback_id)
+    return _get_description_of_feedback(Feedback.objects.get(token=feedback_id))
 
+
+def _get_description_of_feedback(feedback):
+    """Create descriptive text for the history entry of the given (submitted) feedback."""
     # Craft a message for UI
     desc = 'Ja, de melder is tevreden\n' if feedback.is_satisfied else \
         'Nee, de melder is ontevreden\n'
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Search backends used by the SearchView.
+
+The backend is selected with the SEARCH['BACKEND'] setting:
+
+* elasticsearch (default), the Signals are indexed as SignalDocument in Elasticsearch
+* postgres, the Signals are searched using the full-text search of PostgreSQL. The search document of a Signal is
+  stored in the "search_vector" column of the Signal and is updated when the Signal (or one of its notes) changes.
+"""
+from datapunt_api.pagination import HALPagination
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Max, Min, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Concat
+from elasticsearch_dsl.query import MultiMatch
+
+from signals.apps.search.documents.signal import SignalDocument
+from signals.apps.search.pagination import ElasticHALPagination
+from signals.apps.search.settings import app_settings
+from signals.apps.signals.models import CategoryAssignment, Note, Reporter, Signal
+
+
+class ElasticsearchBackend:
+    pagination_class = ElasticHALPagination
+
+    def ping(self):
+        return SignalDocument.ping()
+
+    def search(self, q, user):
+        multi_match = MultiMatch(
+            query=q or '*',
+            fields=[
+                'id',
+                'text',
+                'category_assignment.category.name',
+                'reporter.email',  # SIG-2058 [BE] email, telefoon aan vrij zoeken toevoegen
+                'reporter.phone'  # SIG-2058 [BE] email, telefoon aan vrij zoeken toevoegen
+            ]
+        )
+
+        s = SignalDocument.search().query(multi_match)
+        s.execute()
+        return s
+
+    def update_signal(self, signal_id):
+        signal = Signal.objects.get(id=signal_id)
+        signal_document = SignalDocument.create_document(signal)
+        signal_document.save()
+
+
+class PostgresBackend:
+    pagination_class = HALPagination
+
+    def ping(self):
+        return True
+
+    def search(self, q, user):
+        # The same related objects as the Elasticsearch backend, both are serialized with the same serializer
+        queryset = SignalDocument().get_queryset().filter_for_user(user)
+        if not q:
+            return queryset.order_by('-created_at')
+
+        query = SearchQuery(q, config=app_settings.TEXT_SEARCH_CONFIG, search_type='websearch')
+        condition = Q(search_vector=query)
+        if q.isdigit():
+            condition |= Q(id=int(q))
+
+        return queryset.filter(condition).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at')
+
+    def get_search_vector(self):
+        """
+        Returns the search document of a Signal as an expression, so the search documents of many Signals are updated
+        with a single UPDATE. The text of the Signal has the highest weight.
+        """
+        config = app_settings.TEXT_SEARCH_CONFIG
+        category_names = CategoryAssignment.objects.filter(
+            pk=OuterRef('category_assignment_id')
+        ).annotate(
+            names=Concat('category__name', Value(' '), 'category__parent__name', output_field=TextField())
+        ).values('names')
+        reporter = Reporter.objects.filter(
+            pk=OuterRef('reporter_id')
+        ).annotate(
+            contact=Concat('email', Value(' '), 'phone', output_field=TextField())
+        ).values('contact')
+        notes = Note.objects.filter(
+            _signal_id=OuterRef('pk')
+        ).order_by().values('_signal_id').annotate(
+            texts=StringAgg('text', delimiter=' ')
+        ).values('texts')
+
+        return (
+            SearchVector(F('text'), weight='A', config=config) +
+            SearchVector(Subquery(category_names), weight='B', config=config) +
+            # Email addresses and phone numbers are not stemmed
+            SearchVector(Subquery(reporter), weight='B', config='simple') +
+            SearchVector(Subquery(notes), weight='C', config=config)
+        )
+
+    def update_signal(self, signal_id):
+        Signal.objects.filter(id=signal_id).update(search_vector=self.get_search_vector())
+
+    def update_all_signals(self, batch_size=1000):
+        """
+        Updates the search documents of all Signals, with one UPDATE per range of batch_size ids
+        """
+        id_range = Signal.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if id_range['min_id'] is None:
+            return
+
+        search_vector = self.get_search_vector()
+        for start in range(id_range['min_id'], id_range['max_id'] + 1, batch_size):
+            Signal.objects.filter(id__gte=start, id__lt=start + batch_size).update(search_vector=search_vector)
+
+
+SEARCH_BACKENDS = {
+    'elasticsearch': ElasticsearchBackend,
+    'postgres': PostgresBackend,
+}
+
+
+def get_search_backend():
+    return SEARCH_BACKENDS[app_settings.BACKEND]()
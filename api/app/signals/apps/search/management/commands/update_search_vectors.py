@@ -0,0 +1,21 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from timeit import default_timer as timer
+
+from django.core.management import BaseCommand
+
+from signals.apps.search.tasks import rebuild_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Update the search documents of all Signals, used by the postgres search backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of Signals updated per batch')
+
+    def handle(self, *args, **options):
+        start = timer()
+        rebuild_search_vectors(batch_size=options['batch_size'])
+        stop = timer()
+        self.stdout.write(f'Time: {stop - start:.2f} second(s)')
+        self.stdout.write('Done!')
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.test.signals import setting_changed
 
 DEFAULTS = dict(
+    BACKEND='elasticsearch',  # elasticsearch or postgres, see signals.apps.search.backends
+    TEXT_SEARCH_CONFIG='dutch',  # The text search configuration used by the postgres backend
     PAGE_SIZE=100,
     CONNECTION=dict(
         HOST='http://127.0.0.1:9200',
@@ -2,13 +2,16 @@
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
 from django.dispatch import receiver
 
-from signals.apps.search.tasks import save_to_elastic
+from signals.apps.search.settings import app_settings
+from signals.apps.search.tasks import save_to_elastic, update_search_vector
 from signals.apps.signals.managers import (
     create_child,
     create_initial,
+    create_note,
     update_category_assignment,
     update_location,
     update_priority,
+    update_reporter,
     update_type
 )
 
@@ -20,5 +23,21 @@ from signals.apps.signals.managers import (
            update_priority,
            update_type], dispatch_uid='search_add_to_elastic')
 def add_to_elastic_handler(sender, signal_obj, **kwargs):
+    if app_settings.BACKEND != 'elasticsearch':
+        return
+
     # Add to elastic
     save_to_elastic.delay(signal_id=signal_obj.id)
+
+
+@receiver([create_initial,
+           create_child,
+           update_category_assignment,
+           update_reporter,
+           create_note], dispatch_uid='search_update_search_vector')
+def update_search_vector_handler(sender, signal_obj, **kwargs):
+    if app_settings.BACKEND != 'postgres':
+        return
+
+    # The search document contains the text, category, reporter and notes of the Signal
+    update_search_vector.delay(signal_id=signal_obj.id)
@@ -2,6 +2,7 @@
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
 import logging
 
+from signals.apps.search.backends import PostgresBackend
 from signals.apps.search.documents.signal import SignalDocument
 from signals.apps.signals.models import Signal
 from signals.celery import app
@@ -19,6 +20,11 @@ def save_to_elastic(signal_id):
     signal_document.save()
 
 
+@app.task
+def update_search_vector(signal_id):
+    PostgresBackend().update_signal(signal_id=signal_id)
+
+
 @app.task
 def rebuild_index():
     log.info('rebuild_index - start')
@@ -28,3 +34,11 @@ def rebuild_index():
 
     SignalDocument.index_documents()
     log.info('rebuild_index - done!')
+
+
+@app.task
+def rebuild_search_vectors(batch_size=1000):
+    log.info('rebuild_search_vectors - start')
+
+    PostgresBackend().update_all_signals(batch_size=batch_size)
+    log.info('rebuild_search_vectors - done!')
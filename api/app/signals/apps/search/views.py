@@ -1,13 +1,11 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
 from datapunt_api.rest import DatapuntViewSet
-from elasticsearch_dsl.query import MultiMatch
 
 from signals.apps.api.generics.exceptions import GatewayTimeoutException
 from signals.apps.api.generics.permissions import SIAPermissions
 from signals.apps.api.serializers import PrivateSignalSerializerDetail, PrivateSignalSerializerList
-from signals.apps.search.documents.signal import SignalDocument
-from signals.apps.search.pagination import ElasticHALPagination
+from signals.apps.search.backends import get_search_backend
 from signals.apps.signals.models import Signal
 from signals.auth.backend import JWTAuthBackend
 
@@ -21,30 +19,15 @@ class SearchView(DatapuntViewSet):
 
     queryset = Signal.objects.none()
 
-    pagination_class = ElasticHALPagination
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.search_backend = get_search_backend()
+        self.pagination_class = self.search_backend.pagination_class
 
     def get_queryset(self, *args, **kwargs):
-        if 'q' in self.request.query_params:
-            q = self.request.query_params['q']
-        else:
-            q = '*'
-
-        multi_match = MultiMatch(
-            query=q,
-            fields=[
-                'id',
-                'text',
-                'category_assignment.category.name',
-                'reporter.email',  # SIG-2058 [BE] email, telefoon aan vrij zoeken toevoegen
-                'reporter.phone'  # SIG-2058 [BE] email, telefoon aan vrij zoeken toevoegen
-            ]
-        )
-
-        s = SignalDocument.search().query(multi_match)
-        s.execute()
-        return s
+        return self.search_backend.search(q=self.request.query_params.get('q'), user=self.request.user)
 
     def list(self, request, *args, **kwargs):
-        if not SignalDocument.ping():
+        if not self.search_backend.ping():
             raise GatewayTimeoutException(detail='The elastic cluster is unreachable')
         return super().list(request=request, *args, **kwargs)
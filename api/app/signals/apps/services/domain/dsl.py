@@ -1,21 +1,36 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Vereniging van Nederlandse Gemeenten, Gemeente Amsterdam
 import time
+from collections import defaultdict
 
-from signals.apps.dsl.ExpressionEvaluator import ExpressionEvaluator
+from signals.apps.dsl.areas import AreaTypeGeometries
+from signals.apps.dsl.compiler import ExpressionCompiler
 from signals.apps.signals.managers import SignalManager
-from signals.apps.signals.models import Area, AreaType, RoutingExpression, Signal
+from signals.apps.signals.models import Area, RoutingExpression, Signal
+from signals.apps.signals.utils.area_index import get_area_index_version
 
 
 class DslService:
-    compiler = ExpressionEvaluator()
+    compiler = ExpressionCompiler()
     _code_cache = {}
+    _expression_cache = {}
 
     def _compile(self, code):
         if code not in self._code_cache:
             self._code_cache[code] = self.compiler.compile(code)
         return self._code_cache[code]
 
+    def _compile_expression(self, expression):
+        """
+        Returns the compiled code of the given Expression, the compiled code is versioned by the id and updated_at of
+        the Expression so it is compiled again once the Expression is changed
+        """
+        updated_at, compiled = self._expression_cache.get(expression.pk, (None, None))
+        if compiled is None or updated_at != expression.updated_at:
+            compiled = self.compiler.compile(expression.code)
+            self._expression_cache[expression.pk] = (expression.updated_at, compiled)
+        return compiled
+
     def evaluate(self, context, code):
         evaluator = self._compile(code)
         return evaluator.evaluate(context)
@@ -31,21 +46,32 @@ class DslService:
 # maps signal object to context dictionary
 class SignalContext:
     _areas = None
+    _areas_version = None
 
     def _init_areas(self):
-        tmp = {}
-        for area_type in AreaType.objects.all():
-            tmp[area_type.name] = {
-                area.code: area.geometry for area in Area.objects.filter(_type=area_type).all()
-            }
-        return tmp
+        areas_per_type = defaultdict(list)
+        for area in Area.objects.select_related('_type').order_by('pk'):
+            areas_per_type[area._type.name].append(area)
+        return {
+            area_type_name: AreaTypeGeometries(areas) for area_type_name, areas in areas_per_type.items()
+        }
 
     @property
     def areas(self):
-        if not self._areas:
+        # The Areas are loaded again when they are changed, see bump_area_index_version
+        version = get_area_index_version()
+        if self._areas is None or self._areas_version != version:
             self._areas = self._init_areas()
+            self._areas_version = version
         return self._areas
 
+    def clear(self):
+        """
+        Drops the loaded Areas, they are loaded again when they are used
+        """
+        self._areas = None
+        self._areas_version = None
+
     def __call__(self, signal: Signal):
 
         t = signal.incident_date_start.strftime("%H:%M:%S")
@@ -88,7 +114,7 @@ class SignalDslService(DslService):
         for rule in rules.filter(is_active=True, _expression___type__name='routing').order_by('order'):
             evaluator = None
             try:
-                evaluator = self._compile(rule._expression.code)
+                evaluator = self._compile_expression(rule._expression)
             except Exception:
                 # compilation failed, invalidate rule
                 rule.is_active = False
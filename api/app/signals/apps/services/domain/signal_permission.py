@@ -1,58 +1,72 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Vereniging van Nederlandse Gemeenten, Gemeente Amsterdam
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 
 class SignalPermissionService:
 
-    def make_permisson_condition_for_user(self, user):
-        category_ids = user.profile.departments.prefetch_related(
-            'categorydepartment_set'
-        ).filter(
+    def get_user_scope(self, user):
+        """
+        Returns the ids of the categories and the ids of the departments of a user
+
+        The scope is not cached across requests, a change of the departments of a user or a category must be seen by
+        all processes at once. The scope is queried once and memoized on the user instance, which lives for the
+        duration of a request. The JWTAuthBackend reads the scope from the auth bundle of the user (see
+        signals.auth.bundle), which is invalidated in the shared cache.
+
+        :returns: tuple of a frozenset of category ids and a frozenset of department ids
+        """
+        if hasattr(user, 'signal_permission_scope'):
+            # Memoized, or read from the auth bundle of the user by the JWTAuthBackend
+            return user.signal_permission_scope
+
+        department_ids = frozenset(user.profile.departments.values_list('id', flat=True))
+        category_ids = frozenset(user.profile.departments.filter(
             Q(categorydepartment__is_responsible=True) |
             Q(categorydepartment__can_view=True)
         ).values_list(
             'categorydepartment__category_id',
             flat=True
-        )
+        ))
+        user.signal_permission_scope = (category_ids, department_ids)
+        return user.signal_permission_scope
+
+    def make_permisson_condition_for_user(self, user):
+        """
+        The Signals in one of the categories of the user, or routed to one of the departments of the user.
 
-        department_ids = user.profile.departments.values_list('id', flat=True)
+        The routing is checked using an EXISTS so that the Signals are not duplicated by joining the departments.
+        """
+        from signals.apps.signals.models import SignalDepartments
+
+        category_ids, department_ids = self.get_user_scope(user)
+
+        routed_to_departments = SignalDepartments.departments.through.objects.filter(
+            signaldepartments_id=OuterRef('routing_assignment_id'),
+            department_id__in=sorted(department_ids),
+        )
 
         return (
-            Q(category_assignment__category_id__in=category_ids) |
-            Q(routing_assignment__departments__id__in=department_ids)
+            Q(category_assignment__category_id__in=sorted(category_ids)) |
+            Q(Exists(routed_to_departments))
         )
 
     def has_permission_via_routing(self, user, signal):
+        _, department_ids = self.get_user_scope(user)
+        if not department_ids:
+            return False
 
-        has_read_permission_via_routing = set(
-            user.profile.departments.values_list(
-                'pk',
-                flat=True
-            )
-        ).intersection(
-            signal.signal_departments.filter(
-                relation_type='routing',
-            ).values_list(
-                'departments__pk',
-                flat=True
-            )
-        )
-
-        return bool(has_read_permission_via_routing)
+        return signal.signal_departments.filter(
+            relation_type='routing',
+            departments__pk__in=department_ids
+        ).exists()
 
     def has_permission_via_category(self, user, signal):
-        has_category_read_permission = set(
-            user.profile.departments.values_list(
-                'pk',
-                flat=True
-            )
-        ).intersection(
-            signal.category_assignment.category.departments.filter(
-                categorydepartment__can_view=True
-            ).values_list(
-                'pk',
-                flat=True
-            )
-        )
-        return bool(has_category_read_permission)
+        _, department_ids = self.get_user_scope(user)
+        if not department_ids:
+            return False
+
+        return signal.category_assignment.category.departments.filter(
+            categorydepartment__can_view=True,
+            pk__in=department_ids
+        ).exists()
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+This management command copies the history of the existing signals/complaints
+from the History view ("signals_history_view") to the HistoryEvent table. The
+HistoryEvents of new changes are written when the change is made, this command
+only needs to run once after the HistoryEvent table is created.
+
+The command can safely be run more than once, events that are already present
+are skipped.
+"""
+from django.core.management import BaseCommand
+
+from signals.apps.signals.models import History, HistoryEvent, Signal
+
+
+class Command(BaseCommand):
+    help = 'Copy the history of the existing Signals from the History view to the HistoryEvent table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of Signals per batch')
+
+    def _backfill(self, signal_ids):
+        events = [
+            HistoryEvent(
+                identifier=entry.identifier,
+                _signal_id=entry._signal_id,
+                when=entry.when,
+                what=entry.what,
+                who=entry.who,
+                extra=entry.extra,
+                action=entry.get_action(),
+                description=entry.get_description(),
+            )
+            for entry in History.objects.filter(_signal_id__in=signal_ids)
+        ]
+        HistoryEvent.objects.bulk_create(events, ignore_conflicts=True)
+        return len(events)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        signal_ids = list(Signal.objects.order_by('id').values_list('id', flat=True))
+
+        n_events = 0
+        for start in range(0, len(signal_ids), batch_size):
+            n_events += self._backfill(signal_ids[start:start + batch_size])
+            self.stdout.write(f'{min(start + batch_size, len(signal_ids))}/{len(signal_ids)} Signals')
+
+        self.stdout.write(f'Copied {n_events} history entries (existing entries are skipped)')
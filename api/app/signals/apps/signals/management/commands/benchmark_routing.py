@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Benchmark of the routing expressions, compares the interpreted (ExpressionEvaluator) and the compiled
+(ExpressionCompiler) expressions.
+
+The rules and the context are generated, no database is needed. Every routing evaluates all rules (none of the rules
+match), which is the worst case of SignalDslService.process_routing_rules.
+
+    python manage.py benchmark_routing --rules 500 --repeat 100
+"""
+import time
+import timeit
+
+from django.contrib.gis import geos
+from django.core.management import BaseCommand
+
+from signals.apps.dsl.areas import AreaTypeGeometries
+from signals.apps.dsl.compiler import ExpressionCompiler
+from signals.apps.dsl.ExpressionEvaluator import ExpressionEvaluator
+from signals.apps.signals.models import Area
+
+
+def generate_areas(count, vertices=1000):
+    """
+    Returns the given number of (unsaved) square Areas, the geometries are polygons with the given number of vertices
+    """
+    areas = []
+    for i in range(count):
+        x, y = 4.8 + (i % 10) * 0.01, 52.3 + (i // 10) * 0.01
+        ring = [(x + 0.005 * (n / vertices), y) for n in range(vertices)]
+        ring += [(x + 0.005, y), (x + 0.005, y + 0.005), (x, y + 0.005), (x, y)]
+        areas.append(Area(code=f'area-{i}', geometry=geos.MultiPolygon(geos.Polygon(ring), srid=4326)))
+    return areas
+
+
+def generate_rules(count, area_count):
+    """
+    Returns the given number of routing expressions, a mix of category, time and area rules
+    """
+    rules = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            rules.append(f'main == "main-{i}" and sub == "sub-{i}"')
+        elif kind == 1:
+            rules.append(f'sub == "sub-{i}" and (time > 08:00 and time < 17:30) or day == "Day-{i}"')
+        else:
+            rules.append(f'location in areas."stadsdeel"."area-{i % area_count}" and main == "main-{i}"')
+    return rules
+
+
+class Command(BaseCommand):
+    help = 'Compares the interpreted and the compiled routing expressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=500, help='Number of rules (default: 500)')
+        parser.add_argument('--areas', type=int, default=50, help='Number of areas (default: 50)')
+        parser.add_argument('--repeat', type=int, default=100, help='Number of routings (default: 100)')
+
+    def handle(self, *args, **options):
+        rules = generate_rules(options['rules'], options['areas'])
+        ctx = {
+            'main': 'main',
+            'sub': 'sub',
+            'time': time.strptime('12:00:00', '%H:%M:%S'),
+            'day': 'Monday',
+            'areas': {'stadsdeel': AreaTypeGeometries(generate_areas(options['areas']))},
+        }
+
+        evaluators = {
+            'interpreted': [ExpressionEvaluator().compile(code) for code in rules],
+            'compiled': [ExpressionCompiler().compile(code) for code in rules],
+        }
+
+        results = {}
+        for name, expressions in evaluators.items():
+            def route():
+                # Every routing is done for a new location, the same as for a new Signal
+                ctx['location'] = geos.Point(4.8421, 52.3421, srid=4326)
+                for expression in expressions:
+                    if expression.evaluate(ctx):
+                        return True
+                return False
+
+            route()  # Warm up, the compiled expressions prepare the geometries on the first evaluation
+            results[name] = min(timeit.repeat(route, number=1, repeat=options['repeat'])) * 1000
+            self.stdout.write(f'{name}: {results[name]:.3f} ms per routing of {len(rules)} rules')
+
+        self.stdout.write(f'speedup: {results["interpreted"] / results["compiled"]:.1f}x')
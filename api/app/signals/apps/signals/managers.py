@@ -1,7 +1,9 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2018 - 2021 Gemeente Amsterdam
 import os
+from collections import Counter
 
+from django.conf import settings
 from django.contrib.gis.db import models
 from django.core.exceptions import ValidationError
 from django.db import transaction
@@ -22,6 +24,21 @@ update_priority = DjangoSignal()
 create_note = DjangoSignal()
 update_type = DjangoSignal()
 
+# Mapping of names to the Django signals above, used to store and send the
+# Django signals using the outbox (see signals.apps.signals.outbox).
+DJANGO_SIGNALS = {
+    'create_initial': create_initial,
+    'create_child': create_child,
+    'add_attachment': add_attachment,
+    'update_location': update_location,
+    'update_status': update_status,
+    'update_category_assignment': update_category_assignment,
+    'update_reporter': update_reporter,
+    'update_priority': update_priority,
+    'create_note': create_note,
+    'update_type': update_type,
+}
+
 
 def send_signals(to_send):
     """
@@ -35,6 +52,22 @@ def send_signals(to_send):
 
 class SignalManager(models.Manager):
 
+    def _send_signals_on_commit(self, to_send):
+        """
+        Send the Django signals once the current transaction is committed.
+
+        If the outbox is enabled (feature flag SIGNAL_OUTBOX_ENABLED) the Django
+        signals are stored as `OutboxEvent` in the current transaction instead,
+        they are sent by the `dispatch_outbox_events` task.
+
+        :param to_send: list of tuples of django signal definition and keyword arguments
+        """
+        if settings.FEATURE_FLAGS.get('SIGNAL_OUTBOX_ENABLED', False):
+            from .outbox import store_outbox_events
+            store_outbox_events(to_send)
+        else:
+            transaction.on_commit(lambda: send_signals(to_send))
+
     def _create_initial_no_transaction(self, signal_data, location_data, status_data,
                                        category_assignment_data, reporter_data, priority_data=None, type_data=None):
         """Create a new `Signal` object with all related objects.
@@ -115,11 +148,139 @@ class SignalManager(models.Manager):
                 type_data=type_data,
             )
 
-            transaction.on_commit(lambda: create_initial.send_robust(sender=self.__class__,
-                                                                     signal_obj=signal))
+            self._send_signals_on_commit([(create_initial, {'sender': self.__class__, 'signal_obj': signal})])
 
         return signal
 
+    def _build_category_assignments_bulk(self, data, signals):
+        """Build (unsaved) `CategoryAssignment` objects for the given (saved) `Signal` objects.
+
+        Does what CategoryAssignment.save normally does, but retrieves the
+        ServiceLevelObjective only once per category.
+
+        :param data: list of dicts, each containing the keyword arguments accepted by create_initial
+        :param signals: list of Signal objects
+        :returns: list of CategoryAssignment objects
+        """
+        from signals.apps.services.domain.deadlines import DeadlineCalculationService
+
+        from .models import CategoryAssignment
+
+        slos = {}
+        category_assignments = []
+        for item, signal in zip(data, signals):
+            category_assignment = CategoryAssignment(**item['category_assignment_data'], _signal=signal)
+            category = category_assignment.category
+            if category.pk not in slos:
+                slos[category.pk] = category.slo.order_by('created_at').last()
+
+            slo = slos[category.pk]
+            if slo:
+                category_assignment.deadline = DeadlineCalculationService.get_deadline(
+                    signal.created_at, slo.n_days, slo.use_calendar_days, 1)
+                category_assignment.deadline_factor_3 = DeadlineCalculationService.get_deadline(
+                    signal.created_at, slo.n_days, slo.use_calendar_days, 3)
+            category_assignment.stored_handling_message = category.handling_message  # SIG-3555
+            category_assignments.append(category_assignment)
+
+        return category_assignments
+
+    def _create_initial_bulk_no_transaction(self, data):
+        """Create new `Signal` objects with all related objects using bulk inserts.
+            If a transaction is needed use SignalManager.create_initial_bulk
+
+        :param data: list of dicts, each containing the keyword arguments accepted by create_initial
+        :returns: list of Signal objects
+        """
+        from .models import CategoryAssignment, Location, Priority, Reporter, Status, Type
+        from .utils.history import create_history_events
+        from .utils.location import _get_areas, _get_stadsdeel_codes
+
+        signals = [self.model(**item['signal_data']) for item in data]
+        # The children of the same parent in this batch count towards the maximum number of children of the parent
+        new_children = Counter()
+        for signal in signals:
+            signal._validate(new_siblings=new_children[signal.parent_id])
+            new_children[signal.parent_id] += 1
+        self.bulk_create(signals)
+
+        # SIG-2513 Determine the stadsdeel, for all locations at once
+        location_data_list = [item['location_data'] for item in data]
+        geometries = [location_data['geometrie'] for location_data in location_data_list]
+        stadsdeel_codes = _get_stadsdeel_codes(
+            geometries, [location_data.get('stadsdeel', None) for location_data in location_data_list]
+        )
+
+        # set area_type and area_code if default area type is provided
+        areas = _get_areas(geometries, DEFAULT_SIGNAL_AREA_TYPE) if DEFAULT_SIGNAL_AREA_TYPE else []
+
+        locations = []
+        for i, (location_data, signal) in enumerate(zip(location_data_list, signals)):
+            location_data['stadsdeel'] = stadsdeel_codes[i]
+            if areas and areas[i]:
+                location_data['area_type_code'] = DEFAULT_SIGNAL_AREA_TYPE
+                location_data['area_code'] = areas[i].code
+
+            location = Location(**location_data, _signal_id=signal.pk)
+            location.set_address_text()  # Normally done in Location.save
+            locations.append(location)
+
+        category_assignments = self._build_category_assignments_bulk(data, signals)
+
+        types = []
+        for item, signal in zip(data, signals):
+            # If type_data is None a Type is created with the default "SIGNAL" value
+            signal_type = Type(**(item.get('type_data') or {}), _signal_id=signal.pk)
+            signal_type.full_clean(exclude=['_signal'])  # Normally done in Type.save
+            types.append(signal_type)
+
+        statuses = [Status(**item['status_data'], _signal_id=signal.pk) for item, signal in zip(data, signals)]
+        reporters = [Reporter(**item['reporter_data'], _signal_id=signal.pk) for item, signal in zip(data, signals)]
+        for reporter in reporters:
+            reporter.clear_anonymized()  # Normally done in Reporter.save
+        priorities = [Priority(**(item.get('priority_data') or {}), _signal_id=signal.pk)
+                      for item, signal in zip(data, signals)]
+
+        # Create dependent model instances with correct foreign keys to Signal
+        Location.objects.bulk_create(locations)
+        Status.objects.bulk_create(statuses)
+        CategoryAssignment.objects.bulk_create(category_assignments)
+        Reporter.objects.bulk_create(reporters)
+        Priority.objects.bulk_create(priorities)
+        Type.objects.bulk_create(types)
+
+        # Set Signal to dependent model instance foreign keys
+        for i, signal in enumerate(signals):
+            signal.location = locations[i]
+            signal.status = statuses[i]
+            signal.category_assignment = category_assignments[i]
+            signal.reporter = reporters[i]
+            signal.priority = priorities[i]
+            signal.type_assignment = types[i]
+        self.bulk_update(signals, fields=['location', 'status', 'category_assignment', 'reporter', 'priority',
+                                          'type_assignment'])
+
+        # Bulk inserts do not send the post_save signal, write the history of the Signals explicitly
+        create_history_events(signals + locations + statuses + category_assignments + priorities + types)
+
+        return signals
+
+    def create_initial_bulk(self, data):
+        """Create new `Signal` objects with all related objects in one transaction using bulk inserts.
+
+        :param data: list of dicts with the keys signal_data, location_data, status_data,
+                     category_assignment_data, reporter_data and optionally priority_data and type_data
+                     (see create_initial for their meaning)
+        :returns: list of Signal objects
+        """
+        with transaction.atomic():
+            signals = self._create_initial_bulk_no_transaction(data=data)
+
+            to_send = [(create_initial, {'sender': self.__class__, 'signal_obj': signal}) for signal in signals]
+            self._send_signals_on_commit(to_send)
+
+        return signals
+
     def add_image(self, image, signal):
         return self.add_attachment(image, signal)
 
@@ -138,14 +299,18 @@ class SignalManager(models.Manager):
             attachment.save()
 
             # SIG-2213 use transaction.on_commit to send relevant Django signals
-            transaction.on_commit(lambda: add_attachment.send_robust(
-                sender=self.__class__, signal_obj=signal, attachment=attachment))
+            self._send_signals_on_commit([(add_attachment, {
+                'sender': self.__class__,
+                'signal_obj': signal,
+                'attachment': attachment
+            })])
 
         return attachment
 
     def _update_location_no_transaction(self, data, signal):
         """Update (create new) `Location` object for given `Signal` object.
             If a transaction is needed use SignalManager.update_location
+            Note: the `Signal` object is not saved, the caller must save the "location" field
 
         :param data: deserialized data dict
         :param signal: Signal object
@@ -168,7 +333,6 @@ class SignalManager(models.Manager):
         prev_location = signal.location
         location = Location.objects.create(**data, _signal_id=signal.id)
         signal.location = location
-        signal.save()
 
         return location, prev_location
 
@@ -185,16 +349,20 @@ class SignalManager(models.Manager):
             locked_signal = Signal.objects.select_for_update(nowait=True).get(pk=signal.pk)  # Lock the Signal
 
             location, prev_location = self._update_location_no_transaction(data, locked_signal)
-            transaction.on_commit(lambda: update_location.send_robust(sender=self.__class__,
-                                                                      signal_obj=locked_signal,
-                                                                      location=location,
-                                                                      prev_location=prev_location))
+            locked_signal.save(update_fields=['location', 'updated_at'])
+            self._send_signals_on_commit([(update_location, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'location': location,
+                'prev_location': prev_location
+            })])
 
         return location
 
     def _update_status_no_transaction(self, data, signal):
         """Update (create new) `Status` object for given `Signal` object.
             If a transaction is needed use SignalManager.update_status
+            Note: the `Signal` object is not saved, the caller must save the "status" field
 
         :param data: deserialized data dict
         :param signal: Signal object
@@ -208,7 +376,6 @@ class SignalManager(models.Manager):
 
         prev_status = signal.status
         signal.status = status
-        signal.save()
 
         return status, prev_status
 
@@ -225,15 +392,19 @@ class SignalManager(models.Manager):
             locked_signal = Signal.objects.select_for_update(nowait=True).get(pk=signal.pk)  # Lock the Signal
 
             status, prev_status = self._update_status_no_transaction(data=data, signal=locked_signal)
-            transaction.on_commit(lambda: update_status.send_robust(sender=self.__class__,
-                                                                    signal_obj=locked_signal,
-                                                                    status=status,
-                                                                    prev_status=prev_status))
+            locked_signal.save(update_fields=['status', 'updated_at'])
+            self._send_signals_on_commit([(update_status, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'status': status,
+                'prev_status': prev_status
+            })])
         return status
 
     def _update_category_assignment_no_transaction(self, data, signal):
         """Update (create new) `CategoryAssignment` object for given `Signal` object.
             If a transaction is needed use SignalManager.update_category_assignment
+            Note: the `Signal` object is not saved, the caller must save the "category_assignment" field
 
         :param data: deserialized data dict
         :param signal: Signal object
@@ -244,7 +415,6 @@ class SignalManager(models.Manager):
         prev_category_assignment = signal.category_assignment
         category_assignment = CategoryAssignment.objects.create(**data, _signal_id=signal.id)
         signal.category_assignment = category_assignment
-        signal.save()
 
         return category_assignment, prev_category_assignment
 
@@ -270,11 +440,13 @@ class SignalManager(models.Manager):
 
             category_assignment, prev_category_assignment = \
                 self._update_category_assignment_no_transaction(data, locked_signal)
-            transaction.on_commit(lambda: update_category_assignment.send_robust(
-                sender=self.__class__,
-                signal_obj=locked_signal,
-                category_assignment=category_assignment,
-                prev_category_assignment=prev_category_assignment))
+            locked_signal.save(update_fields=['category_assignment', 'updated_at'])
+            self._send_signals_on_commit([(update_category_assignment, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'category_assignment': category_assignment,
+                'prev_category_assignment': prev_category_assignment
+            })])
 
         return category_assignment
 
@@ -296,16 +468,19 @@ class SignalManager(models.Manager):
             signal.reporter = reporter
             signal.save()
 
-            transaction.on_commit(lambda: update_reporter.send_robust(sender=self.__class__,
-                                                                      signal_obj=locked_signal,
-                                                                      reporter=reporter,
-                                                                      prev_reporter=prev_reporter))
+            self._send_signals_on_commit([(update_reporter, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'reporter': reporter,
+                'prev_reporter': prev_reporter
+            })])
 
         return reporter
 
     def _update_priority_no_transaction(self, data, signal):
         """Update (create new) `Priority` object for given `Signal` object.
            If a transaction is needed use SignalManager.update_priority
+           Note: the `Signal` object is not saved, the caller must save the "priority" field
 
         :param data: deserialized data dict
         :param signal: Signal object
@@ -317,7 +492,6 @@ class SignalManager(models.Manager):
 
         priority = Priority.objects.create(**data, _signal_id=signal.id)
         signal.priority = priority
-        signal.save()
 
         return priority, prev_priority
 
@@ -334,16 +508,20 @@ class SignalManager(models.Manager):
             locked_signal = Signal.objects.select_for_update(nowait=True).get(pk=signal.pk)  # Lock the Signal
 
             priority, prev_priority = self._update_priority_no_transaction(data, signal)
-            transaction.on_commit(lambda: update_priority.send_robust(sender=self.__class__,
-                                                                      signal_obj=locked_signal,
-                                                                      priority=priority,
-                                                                      prev_priority=prev_priority))
+            signal.save(update_fields=['priority', 'updated_at'])
+            self._send_signals_on_commit([(update_priority, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'priority': priority,
+                'prev_priority': prev_priority
+            })])
 
         return priority
 
     def _create_note_no_transaction(self, data, signal):
         """Create a new `Note` object for a given `Signal` object.
            If a transaction is needed use SignalManager.create_note
+           Note: the `Signal` object is not saved, the caller must save the "updated_at" field
 
         :param data: deserialized data dict
         :returns: Note object
@@ -351,7 +529,6 @@ class SignalManager(models.Manager):
         from .models import Note
 
         note = Note.objects.create(**data, _signal_id=signal.id)
-        signal.save()
         return note
 
     def create_note(self, data, signal):
@@ -368,9 +545,12 @@ class SignalManager(models.Manager):
             locked_signal = Signal.objects.select_for_update(nowait=True).get(pk=signal.pk)  # Lock the Signal
 
             note = self._create_note_no_transaction(data, locked_signal)
-            transaction.on_commit(lambda: create_note.send_robust(sender=self.__class__,
-                                                                  signal_obj=locked_signal,
-                                                                  note=note))
+            locked_signal.save(update_fields=['updated_at'])
+            self._send_signals_on_commit([(create_note, {
+                'sender': self.__class__,
+                'signal_obj': locked_signal,
+                'note': note
+            })])
 
         return note
 
@@ -380,6 +560,7 @@ class SignalManager(models.Manager):
 
         Note, this updates:
         - CategoryAssignment, Location, Priority, Note, Status
+        The `Signal` itself is written only once, after all related objects are created.
         :param data: deserialized data dict
         :param signal: Signal object
         :returns: Updated Signal object
@@ -391,9 +572,11 @@ class SignalManager(models.Manager):
 
             to_send = []
             sender = self.__class__
+            update_fields = {'updated_at'}
 
             if 'location' in data:
                 location, prev_location = self._update_location_no_transaction(data['location'], locked_signal)  # noqa: E501
+                update_fields.add('location')
                 to_send.append((update_location, {
                     'sender': sender,
                     'signal_obj': locked_signal,
@@ -403,6 +586,7 @@ class SignalManager(models.Manager):
 
             if 'status' in data:
                 status, prev_status = self._update_status_no_transaction(data['status'], locked_signal)
+                update_fields.add('status')
                 to_send.append((update_status, {
                     'sender': sender,
                     'signal_obj': locked_signal,
@@ -422,6 +606,7 @@ class SignalManager(models.Manager):
                             data['category_assignment'], locked_signal)
 
                     self._clear_routing_and_assigned_user_no_transaction(locked_signal)
+                    update_fields.update(['category_assignment', 'routing_assignment', 'user_assignment'])
                     to_send.append((update_category_assignment, {
                         'sender': sender,
                         'signal_obj': locked_signal,
@@ -432,6 +617,7 @@ class SignalManager(models.Manager):
             if 'priority' in data:
                 priority, prev_priority = \
                     self._update_priority_no_transaction(data['priority'], locked_signal)
+                update_fields.add('priority')
                 to_send.append((update_priority, {
                     'sender': sender,
                     'signal_obj': locked_signal,
@@ -452,6 +638,7 @@ class SignalManager(models.Manager):
             if 'type' in data:
                 previous_type = locked_signal.type_assignment
                 signal_type = self._update_type_no_transaction(data['type'], locked_signal)
+                update_fields.add('type_assignment')
                 to_send.append((update_type, {
                     'sender': sender,
                     'signal_obj': locked_signal,
@@ -463,20 +650,26 @@ class SignalManager(models.Manager):
                 self._update_directing_departments_no_transaction(
                     data['directing_departments_assignment'], locked_signal
                 )
+                update_fields.add('directing_departments_assignment')
 
             if 'routing_assignment' in data:
                 update_detail_data = data['routing_assignment']
                 self._update_routing_departments_no_transaction(
                     update_detail_data, locked_signal
                 )
+                update_fields.update(['routing_assignment', 'user_assignment'])
 
             if 'user_assignment' in data:
                 self._update_user_signal_no_transaction(
                     data, locked_signal
                 )
+                update_fields.add('user_assignment')
+
+            # Write all changes to the Signal at once (and validate it only once)
+            locked_signal.save(update_fields=update_fields)
 
             # Send out all Django signals:
-            transaction.on_commit(lambda: send_signals(to_send))
+            self._send_signals_on_commit(to_send)
 
         locked_signal.refresh_from_db()
         return locked_signal
@@ -484,6 +677,7 @@ class SignalManager(models.Manager):
     def _update_type_no_transaction(self, data, signal):
         """Update (create new) `Type` object for given `Signal` object.
            If a transaction is needed use SignalManager.update_type
+           Note: the `Signal` object is not saved, the caller must save the "type_assignment" field
 
         :param data: deserialized data dict
         :param signal: Signal object
@@ -493,7 +687,6 @@ class SignalManager(models.Manager):
 
         signal_type = Type.objects.create(**data, _signal_id=signal.pk)
         signal.type_assignment = signal_type
-        signal.save()
 
         return signal_type
 
@@ -507,9 +700,14 @@ class SignalManager(models.Manager):
         with transaction.atomic():
             previous_type = signal.type_assignment
             signal_type = self._update_type_no_transaction(data=data, signal=signal)
+            signal.save(update_fields=['type_assignment', 'updated_at'])
 
-            transaction.on_commit(lambda: update_type.send_robust(sender=self.__class__, signal_obj=signal,
-                                                                  type=signal_type, prev_type=previous_type))
+            self._send_signals_on_commit([(update_type, {
+                'sender': self.__class__,
+                'signal_obj': signal,
+                'type': signal_type,
+                'prev_type': previous_type
+            })])
 
         return signal_type
 
@@ -523,7 +721,6 @@ class SignalManager(models.Manager):
                 user=None if not user_email else User.objects.get(email=user_email),
                 created_by=data['created_by'] if 'created_by' in data else None
             )
-            signal.save()
         except Exception:
             raise ValidationError('Could not set user assignment')
         return signal.user_assignment
@@ -553,7 +750,6 @@ class SignalManager(models.Manager):
             signal.routing_assignment = relation
         else:
             raise ValidationError(f'Signal - department relation {relation_type} is not supported')
-        signal.save()
         return relation
 
     def _update_directing_departments_no_transaction(self, data, signal):
@@ -569,7 +765,6 @@ class SignalManager(models.Manager):
             signal.user_assignment = None
         if signal.routing_assignment:
             signal.routing_assignment = None
-        signal.save()
         return signal
 
     def update_routing_departments(self, data, signal):
@@ -581,6 +776,7 @@ class SignalManager(models.Manager):
                 data=data,
                 signal=locked_signal
             )
+            locked_signal.save(update_fields=['routing_assignment', 'user_assignment', 'updated_at'])
 
         return departments
 
@@ -612,6 +808,6 @@ class SignalManager(models.Manager):
                 attachments.append(self._copy_attachment_no_transaction(attachment, locked_signal))
                 to_send.append((add_attachment, {'sender': sender, 'signal_obj': signal, 'attachment': attachment}))
 
-            transaction.on_commit(lambda: send_signals(to_send))  # SIG-2213
+            self._send_signals_on_commit(to_send)  # SIG-2213
 
         return attachments
@@ -0,0 +1,42 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The "icontains" lookup of Django results in: UPPER("column"::text) LIKE UPPER('%value%'), the trigram indexes are
+# created on the same expression so that they are used by the note keyword and address text filters.
+CREATE_TRIGRAM_INDEXES = """
+CREATE INDEX IF NOT EXISTS signals_note_text_trgm_idx
+    ON signals_note USING gin (UPPER("text"::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS signals_location_address_text_trgm_idx
+    ON signals_location USING gin (UPPER("address_text"::text) gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS signals_note_text_trgm_idx;
+DROP INDEX IF EXISTS signals_location_address_text_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0144_outboxevent'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='signal',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='signal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'],
+                                                           name='signals_sig_search__45bcc0_gin'),
+        ),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
@@ -0,0 +1,37 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0145_signal_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=255, unique=True)),
+                ('when', models.DateTimeField(null=True)),
+                ('what', models.CharField(max_length=255)),
+                ('who', models.CharField(max_length=255, null=True)),
+                ('extra', models.CharField(max_length=255, null=True)),
+                ('action', models.CharField(max_length=255)),
+                ('description', models.TextField(null=True)),
+                ('_signal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                              related_name='history_events', to='signals.signal')),
+            ],
+            options={
+                'db_table': 'signals_history_event',
+                'ordering': ('-when', '-id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historyevent',
+            index=models.Index(fields=['_signal', '-when'], name='signals_his__signal_e4a0aa_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.db import migrations
+
+# Expression index on the geography of the locations, used by ST_DWithin in SignalQuerySet.filter_near. The expression
+# must match the expression in the query: ("signals_location"."geometrie")::geography
+CREATE_GEOGRAPHY_INDEX = """
+CREATE INDEX IF NOT EXISTS signals_location_geography_idx
+    ON signals_location USING gist (((geometrie)::geography));
+"""
+
+DROP_GEOGRAPHY_INDEX = """
+DROP INDEX IF EXISTS signals_location_geography_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0146_historyevent'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_GEOGRAPHY_INDEX, DROP_GEOGRAPHY_INDEX),
+    ]
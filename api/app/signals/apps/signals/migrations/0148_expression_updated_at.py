@@ -0,0 +1,20 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0147_location_geography_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expression',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, editable=False),
+            preserve_default=False,
+        ),
+    ]
@@ -9,7 +9,7 @@ from signals.apps.signals.models.category_departments import CategoryDepartment
 from signals.apps.signals.models.category_question import CategoryQuestion
 from signals.apps.signals.models.department import Department
 from signals.apps.signals.models.expression import Expression, ExpressionContext, ExpressionType
-from signals.apps.signals.models.history import History
+from signals.apps.signals.models.history import History, HistoryEvent
 from signals.apps.signals.models.location import (
     STADSDEEL_AMSTERDAMSE_BOS,
     STADSDEEL_CENTRUM,
@@ -26,6 +26,7 @@ from signals.apps.signals.models.location import (
 )
 from signals.apps.signals.models.mixins import CreatedUpdatedModel
 from signals.apps.signals.models.note import Note
+from signals.apps.signals.models.outbox import OutboxEvent
 from signals.apps.signals.models.priority import Priority
 from signals.apps.signals.models.question import Question
 from signals.apps.signals.models.reporter import Reporter
@@ -57,6 +58,7 @@ __all__ = [
     'SignalDepartments',
     'SignalUser',
     'History',
+    'HistoryEvent',
     'STADSDEEL_AMSTERDAMSE_BOS',
     'STADSDEEL_CENTRUM',
     'STADSDEEL_NIEUWWEST',
@@ -71,6 +73,7 @@ __all__ = [
     'Location',
     'CreatedUpdatedModel',
     'Note',
+    'OutboxEvent',
     'Question',
     'Priority',
     'Reporter',
@@ -55,6 +55,7 @@ class Expression(models.Model):
     name = models.CharField(max_length=255)
     code = models.TextField()
     _type = models.ForeignKey(ExpressionType, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(editable=False, auto_now=True)  # Version of the compiled expression
 
     def __str__(self):
         return self.name
@@ -10,6 +10,39 @@ from signals.apps.signals.workflow import STATUS_CHOICES
 EMPTY_HANDLING_MESSAGE_PLACEHOLDER_MESSAGE = 'Servicebelofte onbekend'
 
 
+def get_history_action(what, extra):  # noqa: C901
+    """Generate text for the action field that can serve as title in UI."""
+    if what == 'UPDATE_STATUS':
+        return f'Status gewijzigd naar: {dict(STATUS_CHOICES).get(extra, "Onbekend")}'
+    elif what == 'UPDATE_PRIORITY':
+        # SIG-1727 ad-hoc translation, must match signals.Priority model!
+        translated = {'high': 'Hoog', 'normal': 'Normaal', 'low': 'Laag'}.get(extra, 'Onbekend')
+        return f'Urgentie gewijzigd naar: {translated}'
+    elif what == 'UPDATE_CATEGORY_ASSIGNMENT':
+        return f'Categorie gewijzigd naar: {extra}'
+    elif what == 'UPDATE_LOCATION':
+        return 'Locatie gewijzigd naar:'
+    elif what == 'CREATE_NOTE':
+        return 'Notitie toegevoegd:'
+    elif what == 'RECEIVE_FEEDBACK':
+        return 'Feedback van melder ontvangen'
+    elif what == 'UPDATE_TYPE_ASSIGNMENT':
+        return f'Type gewijzigd naar: {_history_translated_action(extra)}'
+    elif what == 'UPDATE_DIRECTING_DEPARTMENTS_ASSIGNMENT':
+        extra = extra or 'Verantwoordelijke afdeling'
+        return f'Regie gewijzigd naar: {extra}'
+    elif what == 'UPDATE_ROUTING_ASSIGNMENT':
+        extra = extra or 'Verantwoordelijke afdeling (routering)'
+        return f'Routering: afdeling/afdelingen gewijzigd naar: {extra}'
+    elif what == 'UPDATE_USER_ASSIGNMENT':
+        return f'Melding toewijzing gewijzigd naar: {extra}'
+    elif what == 'CHILD_SIGNAL_CREATED':
+        return 'Deelmelding toegevoegd'
+    elif what == 'UPDATE_SLA':
+        return 'Servicebelofte:'
+    return 'Actie onbekend.'
+
+
 class History(models.Model):
     identifier = models.CharField(primary_key=True, max_length=255)
     _signal = models.ForeignKey('signals.Signal',
@@ -29,37 +62,9 @@ class History(models.Model):
     def delete(self, *args, **kwargs):
         raise NotImplementedError
 
-    def get_action(self):  # noqa: C901
+    def get_action(self):
         """Generate text for the action field that can serve as title in UI."""
-        if self.what == 'UPDATE_STATUS':
-            return f'Status gewijzigd naar: {dict(STATUS_CHOICES).get(self.extra, "Onbekend")}'
-        elif self.what == 'UPDATE_PRIORITY':
-            # SIG-1727 ad-hoc translation, must match signals.Priority model!
-            translated = {'high': 'Hoog', 'normal': 'Normaal', 'low': 'Laag'}.get(self.extra, 'Onbekend')
-            return f'Urgentie gewijzigd naar: {translated}'
-        elif self.what == 'UPDATE_CATEGORY_ASSIGNMENT':
-            return f'Categorie gewijzigd naar: {self.extra}'
-        elif self.what == 'UPDATE_LOCATION':
-            return 'Locatie gewijzigd naar:'
-        elif self.what == 'CREATE_NOTE':
-            return 'Notitie toegevoegd:'
-        elif self.what == 'RECEIVE_FEEDBACK':
-            return 'Feedback van melder ontvangen'
-        elif self.what == 'UPDATE_TYPE_ASSIGNMENT':
-            return f'Type gewijzigd naar: {_history_translated_action(self.extra)}'
-        elif self.what == 'UPDATE_DIRECTING_DEPARTMENTS_ASSIGNMENT':
-            extra = self.extra or 'Verantwoordelijke afdeling'
-            return f'Regie gewijzigd naar: {extra}'
-        elif self.what == 'UPDATE_ROUTING_ASSIGNMENT':
-            extra = self.extra or 'Verantwoordelijke afdeling (routering)'
-            return f'Routering: afdeling/afdelingen gewijzigd naar: {extra}'
-        elif self.what == 'UPDATE_USER_ASSIGNMENT':
-            return f'Melding toewijzing gewijzigd naar: {self.extra}'
-        elif self.what == 'CHILD_SIGNAL_CREATED':
-            return 'Deelmelding toegevoegd'
-        elif self.what == 'UPDATE_SLA':
-            return 'Servicebelofte:'
-        return 'Actie onbekend.'
+        return get_history_action(self.what, self.extra)
 
     def get_who(self):
         """Generate string to show in UI, missing users are set to default."""
@@ -86,3 +91,37 @@ class History(models.Model):
     class Meta:
         managed = False
         db_table = 'signals_history_view'
+
+
+class HistoryEvent(models.Model):
+    """
+    Append-only history of a Signal, the events are written when the Signal (or one of its related objects) changes.
+
+    The action and description are rendered when the event is written, see signals.apps.signals.utils.history. The
+    events of Signals created before this table existed are copied from the History view using the management command
+    "backfill_history_events".
+    """
+    identifier = models.CharField(max_length=255, unique=True)
+    _signal = models.ForeignKey('signals.Signal',
+                                related_name='history_events',
+                                null=False,
+                                on_delete=models.CASCADE)
+    when = models.DateTimeField(null=True)
+    what = models.CharField(max_length=255)
+    who = models.CharField(max_length=255, null=True)  # old entries in database may have no user
+    extra = models.CharField(max_length=255, null=True)  # not relevant for every logged model.
+    action = models.CharField(max_length=255)
+    description = models.TextField(null=True)
+
+    class Meta:
+        db_table = 'signals_history_event'
+        ordering = ('-when', '-id')
+        indexes = [
+            models.Index(fields=['_signal', '-when']),
+        ]
+
+    def get_who(self):
+        """Generate string to show in UI, missing users are set to default."""
+        if self.who is None:
+            return 'Signalen systeem'
+        return self.who
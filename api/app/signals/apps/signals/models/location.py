@@ -74,9 +74,12 @@ class Location(CreatedUpdatedModel):
         # openbare_ruimte huisnummerhuiletter-huisnummer_toevoeging
         return AddressFormatter(address=self.address).format('O hlT') if self.address else ''
 
+    def set_address_text(self):
+        self.address_text = AddressFormatter(address=self.address).format('O hlT p W') if self.address else ''
+
     def save(self, *args, **kwargs):
         # Set address_text
-        self.address_text = AddressFormatter(address=self.address).format('O hlT p W') if self.address else ''
+        self.set_address_text()
         super().save(*args, **kwargs)
 
     def get_rd_coordinates(self):
@@ -92,8 +95,11 @@ class Location(CreatedUpdatedModel):
 
 def _get_description_of_update_location(location_id):
     """Get descriptive text for location update history entries."""
-    location = Location.objects.get(id=location_id)
+    return _get_description_of_location(Location.objects.get(id=location_id))
+
 
+def _get_description_of_location(location):
+    """Get descriptive text for the history entry of the given location."""
     # Craft a message for UI
     desc = f'Stadsdeel: {location.get_stadsdeel_display()}' if location.stadsdeel else ''
 
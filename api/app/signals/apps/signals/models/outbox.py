@@ -0,0 +1,38 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.contrib.gis.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    Django signal sent by the `SignalManager`, stored in the same transaction as the mutation it belongs to.
+
+    The events are sent to the receivers by the `dispatch_outbox_events` task,
+    see signals.apps.signals.outbox.
+    """
+    created_at = models.DateTimeField(editable=False, auto_now_add=True)
+
+    # Name of the Django signal (see signals.apps.signals.managers.DJANGO_SIGNALS)
+    event = models.CharField(max_length=255)
+    _signal = models.ForeignKey('signals.Signal', related_name='outbox_events', on_delete=models.CASCADE)
+
+    # References ([model label, pk]) to the model instances sent along with the Django signal
+    kwargs = models.JSONField(default=dict)
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    # Ids of the receivers that handled the event, an event is only retried for the other receivers
+    delivered_receivers = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(dispatched_at__isnull=True),
+                         name='signals_outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event} - {self._signal_id}'
@@ -51,9 +51,9 @@ class Reporter(CreatedUpdatedModel):
         if call_save or always_call_save:
             self.save()
 
-    def save(self, *args, **kwargs):
+    def clear_anonymized(self):
         """
-        Make sure that the email and phone are set to none while saving the Reporter
+        Make sure that the anonymized email and phone are set to none
         """
         if self.email_anonymized:
             self.email = None
@@ -61,4 +61,9 @@ class Reporter(CreatedUpdatedModel):
         if self.phone_anonymized:
             self.phone = None
 
+    def save(self, *args, **kwargs):
+        """
+        Make sure that the email and phone are set to none while saving the Reporter
+        """
+        self.clear_anonymized()
         super().save(*args, **kwargs)
@@ -4,6 +4,8 @@ import uuid
 
 from django.conf import settings
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from pytz import utc
@@ -54,6 +56,9 @@ class Signal(CreatedUpdatedModel):
 
     type_assignment = models.OneToOneField('signals.Type', related_name='signal', null=True, on_delete=models.SET_NULL)
 
+    # Full-text search document, maintained by the Postgres search backend (see signals.apps.search.backends)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # Managers
     objects = SignalQuerySet.as_manager()
     actions = SignalManager()
@@ -74,6 +79,7 @@ class Signal(CreatedUpdatedModel):
         indexes = [
             models.Index(fields=['created_at']),
             models.Index(fields=['id', 'parent']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __init__(self, *args, **kwargs):
@@ -123,7 +129,10 @@ class Signal(CreatedUpdatedModel):
             return self.parent.children.exclude(pk=self.pk) if self.pk else self.parent.children.all()
         return self.__class__.objects.none()
 
-    def _validate(self):
+    def _validate(self, new_siblings=0):
+        """
+        :param new_siblings: number of siblings of this Signal that are created in the same bulk insert, before this one
+        """
         if self.is_parent and self.is_child:
             # We cannot be a parent and a child at once
             raise ValidationError('Cannot be a parent and a child at the once')
@@ -133,7 +142,7 @@ class Signal(CreatedUpdatedModel):
             raise ValidationError('A child of a child is not allowed')
 
         if (self.pk is None and self.is_child and
-                self.siblings.count() >= settings.SIGNAL_MAX_NUMBER_OF_CHILDREN):
+                self.siblings.count() + new_siblings >= settings.SIGNAL_MAX_NUMBER_OF_CHILDREN):
             # we are a new child and our parent already has the max number of children
             raise ValidationError('Maximum number of children reached for the parent Signal')
 
@@ -0,0 +1,189 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Transactional outbox for the Django signals sent by the `SignalManager`.
+
+When the feature flag SIGNAL_OUTBOX_ENABLED is set the `SignalManager` does not
+send its Django signals when the transaction is committed. Instead, the Django
+signals are stored as `OutboxEvent` in the same transaction as the mutation
+itself. The `dispatch_outbox_events` task sends the stored Django signals to
+the receivers (search, email, routing, sigmax, child creation) in batches.
+
+Delivery is "at least once" per receiver: the receivers that handled an event
+are stored on the event. If one of the receivers raises an exception the event
+is retried later for the receivers that failed, until the maximum number of
+attempts is reached. The error is stored on the event and logged.
+"""
+import logging
+import weakref
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Model, Q
+from django.utils import timezone
+
+from signals.apps.signals.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize_kwargs(kwargs):
+    """
+    Replace the model instances in the keyword arguments of a Django signal with a [model label, pk] reference
+    """
+    serialized = {}
+    for key, value in kwargs.items():
+        if key in ['sender', 'signal_obj']:
+            continue
+
+        if value is not None and not isinstance(value, Model):
+            raise TypeError(f'Cannot store keyword argument "{key}" of type {type(value)} in the outbox')
+        serialized[key] = [value._meta.label, value.pk] if value is not None else None
+    return serialized
+
+
+def store_outbox_events(to_send):
+    """
+    Store the Django signals as OutboxEvent, must be called in the transaction of the mutation
+
+    :param to_send: list of tuples of django signal definition and keyword arguments
+    """
+    from signals.apps.signals.managers import DJANGO_SIGNALS
+
+    names = {django_signal: name for name, django_signal in DJANGO_SIGNALS.items()}
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(event=names[django_signal], _signal=kwargs['signal_obj'], kwargs=_serialize_kwargs(kwargs))
+        for django_signal, kwargs in to_send
+    ])
+
+
+def _claim_outbox_events(batch_size):
+    """
+    Claim a batch of pending OutboxEvents, other dispatchers will skip the claimed events
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                dispatched_at__isnull=True,
+                attempts__lt=settings.SIGNAL_OUTBOX_MAX_ATTEMPTS,
+            ).order_by(
+                'id'
+            )[:batch_size]
+        )
+
+        # The claim expires after the timeout, in case the dispatcher dies while sending the events
+        for event in events:
+            event.attempts += 1
+            event.next_attempt_at = now + timedelta(seconds=settings.SIGNAL_OUTBOX_CLAIM_TIMEOUT)
+        OutboxEvent.objects.bulk_update(events, ['attempts', 'next_attempt_at'])
+
+    return events
+
+
+def _load_instances(events):
+    """
+    Load all model instances referenced by the given OutboxEvents, using one query per model
+    """
+    pks_by_label = defaultdict(set)
+    pks_by_label['signals.Signal'] = {event._signal_id for event in events}
+    for event in events:
+        for reference in event.kwargs.values():
+            if reference is not None:
+                pks_by_label[reference[0]].add(reference[1])
+
+    return {
+        label: apps.get_model(label).objects.in_bulk(list(pks))
+        for label, pks in pks_by_label.items()
+    }
+
+
+def _get_receivers(django_signal, sender):
+    """
+    Returns (receiver id, receiver) tuples for the receivers of the given Django signal. The receiver id is the
+    dispatch_uid of the receiver, or the dotted path of the receiver when it is connected without a dispatch_uid.
+    """
+    dispatch_uids = {}
+    for (lookup_key, _), receiver in django_signal.receivers:
+        if isinstance(receiver, weakref.ReferenceType):
+            receiver = receiver()
+        if isinstance(lookup_key, str):
+            dispatch_uids[id(receiver)] = lookup_key
+
+    return [
+        (dispatch_uids.get(id(receiver)) or f'{receiver.__module__}.{receiver.__qualname__}', receiver)
+        for receiver in django_signal._live_receivers(sender)
+    ]
+
+
+def _send_event(event, instances):
+    """
+    Send the given OutboxEvent to the receivers that did not handle it yet
+
+    :returns: list of errors of the receivers that failed
+    """
+    from signals.apps.signals.managers import DJANGO_SIGNALS, SignalManager
+
+    django_signal = DJANGO_SIGNALS[event.event]
+    kwargs = {
+        key: instances[reference[0]].get(reference[1]) if reference is not None else None
+        for key, reference in event.kwargs.items()
+    }
+    signal_obj = instances['signals.Signal'][event._signal_id]
+
+    errors = []
+    for receiver_id, receiver in _get_receivers(django_signal, SignalManager):
+        if receiver_id in event.delivered_receivers:
+            continue
+
+        try:
+            receiver(signal=django_signal, sender=SignalManager, signal_obj=signal_obj, **kwargs)
+        except Exception as e:
+            errors.append(f'{receiver_id}: {e!r}')
+        else:
+            event.delivered_receivers.append(receiver_id)
+    return errors
+
+
+def dispatch_outbox_events(batch_size=None):
+    """
+    Send a batch of pending OutboxEvents to the receivers of the Django signals
+
+    :param batch_size: maximum number of events to send (Default: settings.SIGNAL_OUTBOX_BATCH_SIZE)
+    :returns: number of events sent successfully
+    """
+    events = _claim_outbox_events(batch_size or settings.SIGNAL_OUTBOX_BATCH_SIZE)
+    if not events:
+        return 0
+
+    instances = _load_instances(events)
+    dispatched = 0
+    for event in events:
+        errors = _send_event(event, instances)
+        if errors:
+            event.last_error = '\n'.join(errors)
+            event.next_attempt_at = timezone.now() + timedelta(
+                seconds=settings.SIGNAL_OUTBOX_RETRY_DELAY * 2 ** (event.attempts - 1)
+            )
+            logger.error(f'Sending outbox event #{event.pk} ({event.event}) failed '
+                         f'(attempt {event.attempts}): {event.last_error}')
+        else:
+            event.dispatched_at = timezone.now()
+            dispatched += 1
+
+    OutboxEvent.objects.bulk_update(events, ['dispatched_at', 'next_attempt_at', 'last_error', 'delivered_receivers'])
+    return dispatched
+
+
+def clean_outbox_events(days=7):
+    """
+    Remove the OutboxEvents that were sent more than the given number of days ago
+    """
+    deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
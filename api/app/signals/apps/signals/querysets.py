@@ -1,10 +1,32 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
-from django.db.models import Count, F, Max, QuerySet
+from django.contrib.gis.db.models import GeometryField
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    F,
+    Func,
+    OuterRef,
+    Prefetch,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When
+)
 
 from signals.apps.services.domain.signal_permission import SignalPermissionService
 
 
+class AsGeography(Func):
+    """
+    Casts a geometry (WGS84) to a geography, distances between geographies are in meters
+    """
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(geography=True)
+
+
 class SignalQuerySet(QuerySet):
     permission_service = SignalPermissionService()
 
@@ -15,6 +37,21 @@ class SignalQuerySet(QuerySet):
 
         return self.all()
 
+    def filter_near(self, geometry, distance):
+        """
+        Signals with a location within the given distance (in meters) of the given geometry (WGS84)
+
+        Uses ST_DWithin on the geography of the location, instead of computing the distance to every location. The
+        geography expression index on the locations is used to find the nearby locations.
+        """
+        return self.filter(Func(
+            AsGeography('location__geometrie'),
+            AsGeography(Value(geometry, output_field=GeometryField())),
+            Value(distance),
+            function='ST_DWithin',
+            output_field=BooleanField(),
+        ))
+
     def filter_reporter(self, email=None, phone=None):
         if not email and not phone:
             raise Exception('')
@@ -28,25 +65,51 @@ class SignalQuerySet(QuerySet):
 
         return qs
 
-    def reporter_feedback_count(self, email, is_satisfied=True):
+    def reporter_summary(self, email):
+        """
+        Returns the number of Signals, the number of open Signals and the number of positive and negative feedback of
+        the reporter with the given email address, counted in one query
+
+        Child Signals are not counted, except for the feedback (feedback is not requested for child Signals). The
+        feedback of a Signal is only counted if the latest feedback of the Signal is submitted.
+        """
+        from signals.apps.feedback.models import Feedback
+        from signals.apps.signals import workflow
+
+        latest_feedback = Feedback.objects.filter(
+            _signal_id=OuterRef('pk')
+        ).order_by(
+            '-created_at'
+        ).annotate(
+            submitted_is_satisfied=Case(
+                When(submitted_at__isnull=False, then=F('is_satisfied')),
+                output_field=BooleanField(null=True)
+            )
+        ).values('submitted_is_satisfied')[:1]
+
+        is_parent = Q(parent__isnull=True)
+        is_open = ~Q(status__state__in=[workflow.GEANNULEERD, workflow.AFGEHANDELD, workflow.GESPLITST])
+
         return self.filter_reporter(
             email=email
         ).annotate(
-            feedback_count=Count('feedback')
-        ).filter(
-            feedback_count__gte=1
-        ).annotate(
-            feedback_max_created_at=Max('feedback__created_at'),
-            feedback_max_submitted_at=Max('feedback__submitted_at')
-        ).filter(
-            feedback__is_satisfied=is_satisfied,
-            feedback__submitted_at__isnull=False,
-            feedback__created_at=F('feedback_max_created_at'),
-            feedback__submitted_at=F('feedback_max_submitted_at')
-        ).count()
-
-    def reporter_feedback_satisfied_count(self, email):
-        return self.reporter_feedback_count(email=email, is_satisfied=True)
-
-    def reporter_feedback_not_satisfied_count(self, email):
-        return self.reporter_feedback_count(email=email, is_satisfied=False)
+            feedback_is_satisfied=Subquery(latest_feedback, output_field=BooleanField(null=True))
+        ).aggregate(
+            signal_count=Count('id', filter=is_parent),
+            open_count=Count('id', filter=is_parent & is_open),
+            positive_count=Count('id', filter=Q(feedback_is_satisfied=True)),
+            negative_count=Count('id', filter=Q(feedback_is_satisfied=False)),
+        )
+
+    def prefetch_responsible_departments(self):
+        """
+        Prefetches the responsible departments of the categories of the Signals, available as the
+        "responsible_category_departments" (CategoryDepartment objects) of the category
+        """
+        from signals.apps.signals.models import CategoryDepartment
+
+        return self.prefetch_related(Prefetch(
+            'category_assignment__category__categorydepartment_set',
+            queryset=CategoryDepartment.objects.filter(is_responsible=True).select_related('department'),
+            to_attr='responsible_category_departments'
+        ))
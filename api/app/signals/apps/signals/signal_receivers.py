@@ -1,9 +1,38 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from signals.apps.signals import tasks
-from signals.apps.signals.managers import create_initial, update_status
+from signals.apps.feedback.models import Feedback
+from signals.apps.signals import tasks, workflow
+from signals.apps.signals.managers import (
+    create_child,
+    create_initial,
+    update_category_assignment,
+    update_location,
+    update_reporter,
+    update_status
+)
+from signals.apps.signals.models import (
+    Area,
+    CategoryDepartment,
+    HistoryEvent,
+    Signal,
+    SignalDepartments,
+    Status
+)
+from signals.apps.signals.utils.area_index import bump_area_index_version
+from signals.apps.signals.utils.history import (
+    HISTORY_EVENT_BUILDERS,
+    remove_child_signal_events,
+    write_history_events
+)
+from signals.apps.signals.utils.public_map import bump_public_map_version
+from signals.apps.signals.utils.reporter_context import invalidate_reporter_summary
+from signals.apps.signals.utils.tiles import bump_tile_versions
+from signals.apps.signals.utils.transaction import on_commit_once
+from signals.auth.bundle import bump_auth_bundle_version
 
 
 @receiver(create_initial, dispatch_uid='signals_create_initial')
@@ -15,3 +44,82 @@ def signals_create_initial_handler(sender, signal_obj, **kwargs):
 @receiver(update_status, dispatch_uid='signals_update_status')
 def update_status_handler(sender, signal_obj, status, prev_status, *args, **kwargs):
     tasks.update_status_children_based_on_parent(signal_id=signal_obj.pk)
+
+
+@receiver([post_save, post_delete], sender=Area, dispatch_uid='signals_area_changed')
+def area_changed_handler(sender, instance, *args, **kwargs):
+    # The process local Area indexes must be rebuild when an Area is changed, once per transaction
+    on_commit_once(bump_area_index_version)
+
+
+@receiver([post_save, post_delete], sender=CategoryDepartment, dispatch_uid='signals_category_department_changed')
+def category_department_changed_handler(sender, instance, *args, **kwargs):
+    # The categories in the auth bundles of the users are outdated
+    bump_auth_bundle_version()
+    transaction.on_commit(bump_auth_bundle_version)
+
+
+@receiver([create_initial, create_child, update_location, update_status, update_category_assignment],
+          dispatch_uid='signals_invalidate_tiles')
+def invalidate_tiles_handler(sender, signal_obj, prev_location=None, *args, **kwargs):
+    # The cached vector tiles containing the (previous) location of the Signal are outdated, only these events change
+    # the content of a tile
+    locations = [signal_obj.location, prev_location]
+    bump_tile_versions([location.geometrie for location in locations if location is not None])
+
+
+@receiver([create_initial, update_status, update_location, update_category_assignment],
+          dispatch_uid='signals_invalidate_public_map')
+def invalidate_public_map_handler(sender, *args, **kwargs):
+    # The cached payload of the public map is outdated
+    bump_public_map_version()
+
+
+def history_events_handler(sender, instance, created, raw=False, *args, **kwargs):
+    if raw or (sender is Signal and not created):
+        return  # Only a newly created (child) Signal is shown in the history
+
+    write_history_events(instance)
+    if sender is Status and instance.state == workflow.GESPLITST:
+        # The children of a split Signal are not shown in the history of the Signal
+        remove_child_signal_events(instance._signal_id)
+
+
+for history_model in HISTORY_EVENT_BUILDERS:
+    post_save.connect(history_events_handler, sender=history_model,
+                      dispatch_uid=f'signals_history_events_{history_model._meta.label_lower}')
+
+
+@receiver(m2m_changed, sender=SignalDepartments.departments.through, dispatch_uid='signals_history_events_departments')
+def history_events_departments_handler(sender, instance, action, reverse, *args, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        # The department codes are shown in the history
+        write_history_events(instance)
+
+
+@receiver(post_delete, sender=Signal, dispatch_uid='signals_history_events_signal_deleted')
+def history_events_signal_deleted_handler(sender, instance, *args, **kwargs):
+    HistoryEvent.objects.filter(identifier=f'CHILD_SIGNAL_CREATED_{instance.pk}').delete()
+
+
+def _invalidate_reporter_summary(email):
+    # Removed again after the commit, a summary that is cached by another request before the transaction is committed
+    # contains the old state.
+    invalidate_reporter_summary(email)
+    transaction.on_commit(lambda: invalidate_reporter_summary(email))
+
+
+@receiver([create_initial, update_status, update_reporter], dispatch_uid='signals_invalidate_reporter_summary_actions')
+def invalidate_reporter_summary_actions_handler(sender, signal_obj, prev_reporter=None, *args, **kwargs):
+    # Sent after the commit, the summary counts the Signals (by status) of the reporter, the previous reporter loses a
+    # Signal
+    for reporter in [signal_obj.reporter, prev_reporter]:
+        if reporter is not None:
+            invalidate_reporter_summary(reporter.email)
+
+
+@receiver([post_save, post_delete], sender=Feedback, dispatch_uid='signals_invalidate_reporter_summary_feedback')
+def invalidate_reporter_summary_feedback_handler(sender, instance, raw=False, *args, **kwargs):
+    if not raw:
+        email = Signal.objects.filter(pk=instance._signal_id).values_list('reporter__email', flat=True).first()
+        _invalidate_reporter_summary(email)
@@ -8,6 +8,7 @@ from django.utils import timezone
 
 from signals.apps.services.domain.auto_create_children.service import AutoCreateChildrenService
 from signals.apps.services.domain.dsl import SignalDslService
+from signals.apps.signals import outbox
 from signals.apps.signals.models import Reporter
 from signals.apps.signals.models.signal import Signal
 from signals.apps.signals.workflow import (
@@ -107,3 +108,21 @@ def apply_auto_create_children(signal_id):
     :param signal_id:
     """
     AutoCreateChildrenService.run(signal_id=signal_id)
+
+
+@app.task
+def dispatch_outbox_events(max_batches=10):
+    """
+    Send the pending OutboxEvents to the receivers of the Django signals (see signals.apps.signals.outbox)
+
+    :param max_batches: maximum number of batches to send in one run
+    """
+    dispatched = 0
+    for _ in range(max_batches):
+        n_dispatched = outbox.dispatch_outbox_events()
+        if not n_dispatched:
+            break
+        dispatched += n_dispatched
+
+    outbox.clean_outbox_events()
+    return dispatched
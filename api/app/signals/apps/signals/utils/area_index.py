@@ -0,0 +1,146 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Process local spatial index of the Area geometries.
+
+Determining the Area that contains a location is done for every Signal that is
+created and for every location update. Instead of asking the database (using
+ST_Contains) every time, the geometries of all Areas of a given AreaType are
+loaded once, prepared and indexed in a uniform grid: every cell of the grid
+holds the Areas whose bounding box overlaps the cell, so a lookup only tests
+the Areas of the cell that contains the location.
+
+Every process keeps its own index. The index is invalidated using a version
+stamp that is stored in the shared cache, the stamp is bumped whenever the
+Areas change (see `bump_area_index_version`), also by the management commands
+that load the Areas.
+"""
+import math
+import threading
+from typing import List, Optional
+
+from django.contrib.gis.db.models import PointField
+
+from signals.apps.signals.models import Area
+from signals.apps.signals.utils.cache import VersionStamp
+
+AREA_INDEX_VERSION_CACHE_KEY = 'signals.area_index.version'
+AREA_INDEX_VERSION = VersionStamp(AREA_INDEX_VERSION_CACHE_KEY)
+
+
+def get_area_index_version() -> str:
+    """
+    Returns the current version stamp of the Areas, a new stamp is generated if there is none
+    """
+    return AREA_INDEX_VERSION.get()
+
+
+def bump_area_index_version() -> None:
+    """
+    Invalidate the Area indexes of all processes, must be called whenever Areas are added, changed or removed
+    """
+    AREA_INDEX_VERSION.bump()
+
+
+class AreaTypeIndex:
+    """
+    Prepared geometries of a set of Areas, indexed in a uniform grid of about one cell per Area
+    """
+    def __init__(self, areas: List[Area]):
+        # The entries are kept in the order of the given Areas, so the cells (and the matches) are in that order too
+        self._entries = [(area.geometry.extent, area.geometry.prepared, area) for area in areas]
+        self.srid = areas[0].geometry.srid if areas else None
+        self._cells = {}
+        if not self._entries:
+            return
+
+        extents = [extent for extent, _, _ in self._entries]
+        self._extent = (min(extent[0] for extent in extents), min(extent[1] for extent in extents),
+                        max(extent[2] for extent in extents), max(extent[3] for extent in extents))
+        self._size = max(1, round(math.sqrt(len(self._entries))))  # Number of cells on both axes
+        self._cell_width = (self._extent[2] - self._extent[0]) / self._size or 1.0
+        self._cell_height = (self._extent[3] - self._extent[1]) / self._size or 1.0
+
+        for entry in self._entries:
+            min_x, min_y, max_x, max_y = entry[0]
+            first_col, first_row = self._cell(min_x, min_y)
+            last_col, last_row = self._cell(max_x, max_y)
+            for col in range(first_col, last_col + 1):
+                for row in range(first_row, last_row + 1):
+                    self._cells.setdefault((col, row), []).append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell(self, x, y):
+        """
+        Returns the column and row of the cell containing the given coordinates (inside the extent of the index)
+        """
+        col = int((x - self._extent[0]) / self._cell_width)
+        row = int((y - self._extent[1]) / self._cell_height)
+        return min(col, self._size - 1), min(row, self._size - 1)
+
+    def find_all(self, geometry: PointField) -> List[Area]:
+        """
+        Returns all Areas that contain the given geometry, in the order the Areas were given
+        """
+        if not self._entries:
+            return []
+
+        if geometry.srid and self.srid and geometry.srid != self.srid:
+            geometry = geometry.transform(self.srid, clone=True)
+
+        x, y = geometry.coords[:2]
+        extent_min_x, extent_min_y, extent_max_x, extent_max_y = self._extent
+        if not (extent_min_x <= x <= extent_max_x and extent_min_y <= y <= extent_max_y):
+            return []
+
+        matches = []
+        for extent, prepared, area in self._cells.get(self._cell(x, y), ()):
+            min_x, min_y, max_x, max_y = extent
+            if min_x <= x <= max_x and min_y <= y <= max_y and prepared.contains(geometry):
+                matches.append(area)
+        return matches
+
+    def find(self, geometry: PointField) -> Optional[Area]:
+        """
+        Returns the first Area that contains the given geometry, returns None if no Area is found
+        """
+        areas = self.find_all(geometry)
+        return areas[0] if areas else None
+
+
+class AreaIndex:
+    """
+    Lazily built AreaTypeIndex per AreaType code, all indexes are dropped when the version stamp changes
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._indexes = {}
+
+    def get(self, area_type: Optional[str] = None) -> AreaTypeIndex:
+        """
+        Returns the index for the given AreaType code, or the index of all Areas if no code is given
+        """
+        version = get_area_index_version()
+        with self._lock:
+            if version != self._version:
+                self._indexes = {}
+                self._version = version
+
+            index = self._indexes.get(area_type)
+            if index is None:
+                areas = Area.objects.select_related('_type')
+                if area_type:
+                    areas = areas.filter(_type__code=area_type)
+                index = self._indexes[area_type] = AreaTypeIndex(list(areas))
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes = {}
+            self._version = None
+
+
+area_index = AreaIndex()
@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+The cache that is shared by all processes, the web and the Celery workers (settings.SHARED_CACHE).
+
+The "default" cache is a LocMemCache, every process has its own copy. Data that is invalidated by a change made in
+another process (an update of a Signal, an Area loaded by a management command, ...) must be stored in the shared cache.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def get_shared_cache():
+    return caches[settings.SHARED_CACHE]
+
+
+def is_process_local(cache):
+    """
+    Returns True if the given cache is not shared with other processes
+    """
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+class VersionStamp:
+    """
+    A version stamp stored in the shared cache, bumping the stamp invalidates everything that is cached under the
+    stamp in all processes.
+
+    The stamp is read from the shared cache at most once per settings.SHARED_CACHE_VERSION_CHECK_INTERVAL seconds per
+    process, a bump made in another process is seen within that interval.
+    """
+    def __init__(self, key):
+        self.key = key
+        self._local = (None, 0)  # The last version read from the shared cache and the (monotonic) time it was read
+
+    def get(self):
+        version, checked_at = self._local
+        now = time.monotonic()
+        if version is not None and now - checked_at < settings.SHARED_CACHE_VERSION_CHECK_INTERVAL:
+            return version
+
+        shared_cache = get_shared_cache()
+        version = shared_cache.get(self.key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not shared_cache.add(self.key, version, None):
+                # Another process was first, use the stamp of that process
+                version = shared_cache.get(self.key, version)
+        self._local = (version, now)
+        return version
+
+    def bump(self):
+        version = uuid.uuid4().hex
+        get_shared_cache().set(self.key, version, None)
+        self._local = (version, time.monotonic())
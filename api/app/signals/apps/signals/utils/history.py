@@ -0,0 +1,187 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Writes the HistoryEvents of a Signal.
+
+Every object that is shown in the history of a Signal (status, note, location, etc.) results in one HistoryEvent
+(the category assignment in two, the first category assignment also results in an UPDATE_SLA event). The events are
+written in the transaction that creates the object, see the receivers in signals.apps.signals.signal_receivers. Bulk
+inserts do not send the post_save signal, `create_history_events` must be called explicitly for these objects.
+
+The events contain the same data as the History view, the action and description are rendered when the event is
+written.
+"""
+from typing import Iterable, List
+
+from signals.apps.feedback.models import Feedback, _get_description_of_feedback
+from signals.apps.signals import workflow
+from signals.apps.signals.models import (
+    CategoryAssignment,
+    HistoryEvent,
+    Location,
+    Note,
+    Priority,
+    Signal,
+    SignalDepartments,
+    SignalUser,
+    Status,
+    Type
+)
+from signals.apps.signals.models.history import (
+    EMPTY_HANDLING_MESSAGE_PLACEHOLDER_MESSAGE,
+    get_history_action
+)
+from signals.apps.signals.models.location import _get_description_of_location
+
+
+def _event(identifier, signal_id, when, what, who=None, extra=None, description=None):
+    return HistoryEvent(
+        identifier=identifier,
+        _signal_id=signal_id,
+        when=when,
+        what=what,
+        who=who,
+        extra=extra,
+        action=get_history_action(what, extra),
+        description=description,
+    )
+
+
+def _status_events(status):
+    return [_event(f'UPDATE_STATUS_{status.pk}', status._signal_id, status.created_at, 'UPDATE_STATUS',
+                   who=status.user, extra=status.state, description=status.text)]
+
+
+def _priority_events(priority):
+    return [_event(f'UPDATE_PRIORITY_{priority.pk}', priority._signal_id, priority.created_at, 'UPDATE_PRIORITY',
+                   who=priority.created_by, extra=priority.priority)]
+
+
+def _category_assignment_events(category_assignment, is_first=None):
+    events = [_event(f'UPDATE_CATEGORY_ASSIGNMENT_{category_assignment.pk}', category_assignment._signal_id,
+                     category_assignment.created_at, 'UPDATE_CATEGORY_ASSIGNMENT', who=category_assignment.created_by,
+                     extra=category_assignment.category.name, description=category_assignment.text)]
+
+    if is_first is None:
+        is_first = not CategoryAssignment.objects.filter(
+            _signal_id=category_assignment._signal_id, pk__lt=category_assignment.pk
+        ).exists()
+
+    if is_first:
+        # The handling message of the first category is the service promise (SLA) made to the reporter
+        events.append(_event(f'UPDATE_SLA_{category_assignment.pk}', category_assignment._signal_id,
+                             category_assignment.created_at, 'UPDATE_SLA',
+                             description=(category_assignment.stored_handling_message or
+                                          EMPTY_HANDLING_MESSAGE_PLACEHOLDER_MESSAGE)))
+    return events
+
+
+def _note_events(note):
+    return [_event(f'CREATE_NOTE_{note.pk}', note._signal_id, note.created_at, 'CREATE_NOTE',
+                   who=note.created_by, extra='Notitie toegevoegd', description=note.text)]
+
+
+def _location_events(location):
+    return [_event(f'UPDATE_LOCATION_{location.pk}', location._signal_id, location.created_at, 'UPDATE_LOCATION',
+                   who=location.created_by, extra='Locatie gewijzigd',
+                   description=_get_description_of_location(location))]
+
+
+def _feedback_events(feedback):
+    if feedback.submitted_at is None:
+        return []
+    return [_event(f'RECEIVE_FEEDBACK_{feedback.pk}', feedback._signal_id, feedback.submitted_at, 'RECEIVE_FEEDBACK',
+                   extra='Feedback ontvangen', description=_get_description_of_feedback(feedback))]
+
+
+def _type_events(type_assignment):
+    return [_event(f'UPDATE_TYPE_ASSIGNMENT_{type_assignment.pk}', type_assignment._signal_id,
+                   type_assignment.created_at, 'UPDATE_TYPE_ASSIGNMENT', who=type_assignment.created_by,
+                   extra=type_assignment.name)]
+
+
+def _signal_departments_events(signal_departments):
+    what = {
+        SignalDepartments.REL_ROUTING: 'UPDATE_ROUTING_ASSIGNMENT',
+        SignalDepartments.REL_DIRECTING: 'UPDATE_DIRECTING_DEPARTMENTS_ASSIGNMENT',
+    }.get(signal_departments.relation_type, 'UNKNOWN')
+    identifier = f'{what}_{signal_departments.pk}' if what != 'UNKNOWN' else f'UNKNOWN_{signal_departments.pk}'
+
+    codes = []
+    if signal_departments.pk:
+        codes = sorted(signal_departments.departments.values_list('code', flat=True))
+    return [_event(identifier, signal_departments._signal_id, signal_departments.created_at, what,
+                   who=signal_departments.created_by, extra=', '.join(codes))]
+
+
+def _signal_user_events(signal_user):
+    if signal_user.user_id is None:
+        return []
+    return [_event(f'UPDATE_USER_ASSIGNMENT_{signal_user.pk}', signal_user._signal_id, signal_user.created_at,
+                   'UPDATE_USER_ASSIGNMENT', who=signal_user.created_by, extra=signal_user.user.email)]
+
+
+def _signal_events(signal):
+    if signal.parent_id is None:
+        return []
+
+    # Children of a split Signal are not shown in the history of the parent
+    if Status.objects.filter(signal__pk=signal.parent_id, state=workflow.GESPLITST).exists():
+        return []
+
+    return [_event(f'CHILD_SIGNAL_CREATED_{signal.pk}', signal.parent_id, signal.created_at, 'CHILD_SIGNAL_CREATED',
+                   extra=str(signal.pk),
+                   description='_signal_id contains the parent Signal ID, extra contains the child Signal ID')]
+
+
+HISTORY_EVENT_BUILDERS = {
+    CategoryAssignment: _category_assignment_events,
+    Feedback: _feedback_events,
+    Location: _location_events,
+    Note: _note_events,
+    Priority: _priority_events,
+    Signal: _signal_events,
+    SignalDepartments: _signal_departments_events,
+    SignalUser: _signal_user_events,
+    Status: _status_events,
+    Type: _type_events,
+}
+
+
+def build_history_events(instance) -> List[HistoryEvent]:
+    """
+    Returns the (unsaved) HistoryEvents of the given object
+    """
+    return HISTORY_EVENT_BUILDERS[type(instance)](instance)
+
+
+def create_history_events(instances: Iterable) -> List[HistoryEvent]:
+    """
+    Writes the HistoryEvents of the given newly created objects, used for objects created with a bulk insert
+    """
+    events = []
+    for instance in instances:
+        if isinstance(instance, CategoryAssignment):
+            # Bulk inserts are only used when creating new Signals, these are the first category assignments
+            events.extend(_category_assignment_events(instance, is_first=True))
+        else:
+            events.extend(build_history_events(instance))
+    return HistoryEvent.objects.bulk_create(events, ignore_conflicts=True)
+
+
+def write_history_events(instance) -> None:
+    """
+    Writes (or updates) the HistoryEvents of the given object
+    """
+    for event in build_history_events(instance):
+        HistoryEvent.objects.update_or_create(identifier=event.identifier, defaults={
+            field.attname: getattr(event, field.attname)
+            for field in HistoryEvent._meta.concrete_fields if field.attname not in ['id', 'identifier']
+        })
+
+
+def remove_child_signal_events(signal_id) -> None:
+    """
+    Removes the CHILD_SIGNAL_CREATED events of the given (split) Signal
+    """
+    HistoryEvent.objects.filter(_signal_id=signal_id, what='CHILD_SIGNAL_CREATED').delete()
@@ -1,19 +1,20 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Gemeente Amsterdam
 import re
-from typing import Optional
+from typing import List, Optional
 
 from django.conf import settings
 from django.contrib.gis.db.models import PointField
+from django.contrib.gis.geos import MultiPoint
 from django.db.models import Q
 
 from signals.apps.signals.models import Area
+from signals.apps.signals.utils.area_index import AreaTypeIndex, area_index
 
 
-def _get_area(geometry: PointField, area_type: Optional[str] = None) -> Optional[Area]:
+def _get_area_from_db(geometry: PointField, area_type: Optional[str] = None) -> Optional[Area]:
     """
-    Returns the first Area found based on the given
-    Retrieves the Area based on the geometry and area type, returns None is the Area is not found
+    Retrieves the first Area containing the geometry (and of the area type) from the database
 
     :param geometry:
     :param area_type:
@@ -23,8 +24,25 @@ def _get_area(geometry: PointField, area_type: Optional[str] = None) -> Optional
     if area_type:
         query &= Q(_type__code=area_type)
 
-    areas = Area.objects.filter(query)
-    return areas.first() if areas.exists() else None
+    return Area.objects.filter(query).first()
+
+
+def _get_area(geometry: PointField, area_type: Optional[str] = None) -> Optional[Area]:
+    """
+    Returns the first Area found based on the given
+    Retrieves the Area based on the geometry and area type, returns None is the Area is not found
+
+    The process local Area index is used (if enabled). The index is rebuilt when the Areas change (version stamp), so
+    a location that is not found in the index is not in any Area and the database is not queried.
+
+    :param geometry:
+    :param area_type:
+    :return: Area or None
+    """
+    if not settings.FEATURE_FLAGS.get('AREA_INDEX_ENABLED', False):
+        return _get_area_from_db(geometry, area_type)
+
+    return area_index.get(area_type).find(geometry)
 
 
 def _get_stadsdeel_code(geometry: PointField, default: Optional[str] = None) -> Optional[str]:
@@ -46,6 +64,57 @@ def _get_stadsdeel_code(geometry: PointField, default: Optional[str] = None) ->
     return code or default
 
 
+def _get_areas(geometries: List[PointField], area_type: Optional[str] = None) -> List[Optional[Area]]:
+    """
+    Bulk variant of `_get_area`, retrieves the Area for each of the given geometries.
+    The Areas are returned in the same order as the given geometries, None is returned if no Area is found
+
+    The process local Area index is used (if enabled), otherwise the Areas are retrieved from the database using one
+    spatial query
+
+    :param geometries:
+    :param area_type:
+    :return: list of Area or None
+    """
+    if settings.FEATURE_FLAGS.get('AREA_INDEX_ENABLED', False):
+        index = area_index.get(area_type)
+        return [index.find(geometry) for geometry in geometries]
+
+    if not geometries:
+        return []
+
+    query = Q(geometry__intersects=MultiPoint(*geometries, srid=geometries[0].srid))
+    if area_type:
+        query &= Q(_type__code=area_type)
+
+    # Keep the default ordering of the Area model so the result matches the one of `_get_area`
+    db_index = AreaTypeIndex(list(Area.objects.filter(query)))
+    return [db_index.find(geometry) for geometry in geometries]
+
+
+def _get_stadsdeel_codes(geometries: List[PointField], defaults: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    Bulk variant of `_get_stadsdeel_code`, translates the Area "code" to the STADSDELEN "code" for each geometry
+
+    :param geometries:
+    :param defaults:
+    :return: list of str or None
+    """
+    if not settings.FEATURE_FLAGS.get('API_DETERMINE_STADSDEEL_ENABLED', False):
+        return list(defaults)
+
+    from signals.apps.signals.models.location import AREA_STADSDEEL_TRANSLATION
+
+    area_type = getattr(settings, 'API_DETERMINE_STADSDEEL_ENABLED_AREA_TYPE', 'sia-stadsdeel')
+    areas = _get_areas(geometries=geometries, area_type=area_type)
+
+    codes = []
+    for area, default in zip(areas, defaults):
+        code = AREA_STADSDEEL_TRANSLATION.get(area.code.lower(), None) if area else None
+        codes.append(code or default)
+    return codes
+
+
 class AddressFormatter:
     """
     Based on the format classes found in django.utils.dateformat
@@ -0,0 +1,28 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Version stamp of the payload of the public signal map.
+
+The payload of the public map is cached per version stamp in the shared cache, the stamp is also used as ETag. So all
+processes serve the same payload and ETag. The stamp is bumped whenever a Signal is created or the status, location or
+category of a Signal is changed.
+"""
+from signals.apps.signals.utils.cache import VersionStamp
+
+PUBLIC_MAP_VERSION_CACHE_KEY = 'signals.public_map.version'
+PUBLIC_MAP_PAYLOAD_CACHE_KEY = 'signals.public_map.payload.{version}'
+PUBLIC_MAP_VERSION = VersionStamp(PUBLIC_MAP_VERSION_CACHE_KEY)
+
+
+def get_public_map_version() -> str:
+    """
+    Returns the current version stamp of the public map, a new stamp is generated if there is none
+    """
+    return PUBLIC_MAP_VERSION.get()
+
+
+def bump_public_map_version() -> None:
+    """
+    Invalidate the cached payload of the public map, must be called whenever a Signal on the map changes
+    """
+    PUBLIC_MAP_VERSION.bump()
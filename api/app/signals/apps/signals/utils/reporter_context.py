@@ -0,0 +1,44 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Cached summary of the Signals of a reporter, shown in the context of a Signal.
+
+The summary is cached in the shared cache per (lowercased) email address of the reporter. The cached summary is removed
+whenever a Signal of the reporter is created or changed (status, reporter) or when feedback is given on one of the
+Signals, also when the change is made by another process (e.g. a Celery worker).
+"""
+import hashlib
+
+from django.conf import settings
+
+from signals.apps.signals.models import Signal
+from signals.apps.signals.utils.cache import get_shared_cache
+
+REPORTER_SUMMARY_CACHE_KEY = 'signals.reporter_summary.{email_hash}'
+
+
+def _get_cache_key(email: str) -> str:
+    # The reporter is matched case insensitive, emails are hashed to get a valid cache key
+    email_hash = hashlib.sha256(email.lower().encode('utf-8')).hexdigest()
+    return REPORTER_SUMMARY_CACHE_KEY.format(email_hash=email_hash)
+
+
+def get_reporter_summary(email: str) -> dict:
+    """
+    Returns the signal, open, positive and negative counts of the reporter with the given email address
+    """
+    shared_cache = get_shared_cache()
+    cache_key = _get_cache_key(email)
+    summary = shared_cache.get(cache_key)
+    if summary is None:
+        summary = Signal.objects.reporter_summary(email=email)
+        shared_cache.set(cache_key, summary, settings.SIGNAL_CONTEXT_REPORTER_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_reporter_summary(email: str) -> None:
+    """
+    Removes the cached summary of the reporter with the given email address
+    """
+    if email:
+        get_shared_cache().delete(_get_cache_key(email))
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Web Mercator tiles (z/x/y) and the version stamps used to invalidate the cached vector tiles.
+
+The version stamps are stored in the shared cache (see signals.apps.signals.utils.cache), so a change handled by one
+process invalidates the tiles cached by all processes. The stamps are coarse, a change bumps at most two stamps per
+location:
+
+* the tiles at SIGNAL_TILES_STAMP_ZOOM and higher share the stamp of the tile at SIGNAL_TILES_STAMP_ZOOM that contains
+  them
+* the tiles below SIGNAL_TILES_STAMP_ZOOM share one stamp, a few of these tiles cover the whole municipality so every
+  change invalidates them anyway
+
+A missing stamp is (re)generated, so a stamp that is evicted or expired also invalidates the tiles. The stamps expire
+with the cached tiles (SIGNAL_TILES_CACHE_TIMEOUT).
+"""
+import math
+import uuid
+from typing import Iterable, Tuple
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+from signals.apps.signals.utils.cache import get_shared_cache
+
+# Half the circumference of the earth in Web Mercator (EPSG:3857) meters
+WEB_MERCATOR_MAX = 20037508.342789244
+
+TILE_VERSION_CACHE_KEY = 'signals.tiles.version.{z}.{x}.{y}'
+LOW_ZOOM_TILE_VERSION_CACHE_KEY = 'signals.tiles.version.low_zoom'
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= settings.SIGNAL_TILES_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Returns the bounds (xmin, ymin, xmax, ymax) of the tile in Web Mercator (EPSG:3857)
+    """
+    size = 2 * WEB_MERCATOR_MAX / 2 ** z
+    xmin = -WEB_MERCATOR_MAX + x * size
+    ymax = WEB_MERCATOR_MAX - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def tile_bounds_wgs84(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Returns the bounds (lon min, lat min, lon max, lat max) of the tile in WGS84 (EPSG:4326)
+    """
+    def to_lon_lat(mx, my):
+        return (
+            math.degrees(mx / WEB_MERCATOR_MAX * math.pi),
+            math.degrees(math.atan(math.sinh(my / WEB_MERCATOR_MAX * math.pi))),
+        )
+
+    xmin, ymin, xmax, ymax = tile_bounds(z, x, y)
+    return to_lon_lat(xmin, ymin) + to_lon_lat(xmax, ymax)
+
+
+def point_to_tile(point: Point, z: int) -> Tuple[int, int]:
+    """
+    Returns the x and y of the tile at zoom level z that contains the given point (in WGS84)
+    """
+    n = 2 ** z
+    lat = max(min(point.y, 85.0511287798), -85.0511287798)  # The limits of Web Mercator
+    x = int((point.x + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _get_version_cache_key(z: int, x: int, y: int) -> str:
+    """
+    Returns the key of the version stamp of the tile
+    """
+    stamp_zoom = settings.SIGNAL_TILES_STAMP_ZOOM
+    if z < stamp_zoom:
+        return LOW_ZOOM_TILE_VERSION_CACHE_KEY
+
+    # The tile at the stamp zoom level that contains this tile
+    shift = z - stamp_zoom
+    return TILE_VERSION_CACHE_KEY.format(z=stamp_zoom, x=x >> shift, y=y >> shift)
+
+
+def get_tile_version(z: int, x: int, y: int) -> str:
+    """
+    Returns the version stamp of the tile, a new stamp is generated if there is none
+    """
+    key = _get_version_cache_key(z, x, y)
+    shared_cache = get_shared_cache()
+    version = shared_cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not shared_cache.add(key, version, settings.SIGNAL_TILES_CACHE_TIMEOUT):
+            # Another process was first, use the stamp of that process
+            version = shared_cache.get(key, version)
+    return version
+
+
+def bump_tile_versions(points: Iterable[Point]) -> None:
+    """
+    Invalidate the cached vector tiles containing the given points, for all cached zoom levels
+    """
+    stamp_zoom = settings.SIGNAL_TILES_STAMP_ZOOM
+    keys = {
+        _get_version_cache_key(stamp_zoom, *point_to_tile(point, stamp_zoom)) for point in points if point is not None
+    }
+    if keys and stamp_zoom > 0:
+        keys.add(LOW_ZOOM_TILE_VERSION_CACHE_KEY)
+    if keys:
+        version = uuid.uuid4().hex
+        get_shared_cache().set_many({key: version for key in keys}, settings.SIGNAL_TILES_CACHE_TIMEOUT)
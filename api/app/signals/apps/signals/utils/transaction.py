@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+Helpers for the callbacks that run after the current transaction is committed.
+"""
+from django.db import transaction
+
+
+class _OnCommitOnce:
+    def __init__(self, func):
+        self.func = func
+        self.called = False
+
+    def __call__(self):
+        self.called = True
+        self.func()
+
+
+def on_commit_once(func, using=None):
+    """
+    Register `func` to be called after the current transaction is committed, unless it is already registered (and not
+    yet called) for this transaction.
+
+    Used to bump a version stamp once per transaction, also when a transaction saves many objects (e.g. the dataset
+    loaders that create thousands of Areas).
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        for entry in connection.run_on_commit:  # Tuples of the savepoint ids and the callback
+            callback = entry[1]
+            if isinstance(callback, _OnCommitOnce) and callback.func is func and not callback.called:
+                return
+    transaction.on_commit(_OnCommitOnce(func), using=using)
@@ -1,12 +1,14 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
 
 from signals.apps.signals.models.mixins import CreatedUpdatedModel
+from signals.auth.bundle import bump_auth_bundle_version, invalidate_auth_bundle
 
 User = get_user_model()
 
@@ -38,3 +40,61 @@ class Profile(CreatedUpdatedModel):
 def create_user_profile(sender, instance, created, **kwargs):
     if created and not hasattr(instance, 'profile'):
         Profile.objects.create(user=instance)
+
+
+@receiver(m2m_changed, sender=Profile.departments.through)
+def profile_departments_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if reverse:
+            _bump_auth_bundle_version()  # The profiles of a department changed
+        else:
+            # The permission scope memoized on the user instance is outdated, see SignalPermissionService.get_user_scope
+            instance.user.__dict__.pop('signal_permission_scope', None)
+            _invalidate_auth_bundle(instance.user.username)
+
+
+def _invalidate_auth_bundle(username):
+    # Removed again after the commit, a bundle that is cached by another request before the transaction is committed
+    # contains the old state.
+    invalidate_auth_bundle(username)
+    transaction.on_commit(lambda: invalidate_auth_bundle(username))
+
+
+def _bump_auth_bundle_version():
+    bump_auth_bundle_version()
+    transaction.on_commit(bump_auth_bundle_version)
+
+
+@receiver([post_save, post_delete], sender=User, dispatch_uid='users_invalidate_auth_bundle_user')
+def user_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate_auth_bundle(instance.username)
+
+
+@receiver([post_save, post_delete], sender=Profile, dispatch_uid='users_invalidate_auth_bundle_profile')
+def profile_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate_auth_bundle(instance.user.username)
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='users_invalidate_auth_bundle_user_groups')
+@receiver(m2m_changed, sender=User.user_permissions.through,
+          dispatch_uid='users_invalidate_auth_bundle_user_permissions')
+def user_groups_or_permissions_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if reverse:
+            _bump_auth_bundle_version()  # The users of a group or permission changed
+        else:
+            _invalidate_auth_bundle(instance.username)
+
+
+@receiver([post_save, post_delete], sender=Group, dispatch_uid='users_invalidate_auth_bundle_group')
+def group_changed(sender, raw=False, **kwargs):
+    if not raw:
+        _bump_auth_bundle_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid='users_invalidate_auth_bundle_group_permissions')
+def group_permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _bump_auth_bundle_version()
@@ -1,14 +1,12 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2018 - 2021 Gemeente Amsterdam
 from django.conf import settings
-from django.contrib.auth.models import User
-from django.core.cache import cache
 from rest_framework import exceptions
 
+from .bundle import USER_DOES_NOT_EXIST, get_auth_bundle, load_user
 from .tokens import JWTAccessToken
 
 USER_NOT_AUTHORIZED = "User {} is not authorized"
-USER_DOES_NOT_EXIST = -1
 
 
 class JWTAuthBackend():
@@ -19,21 +17,13 @@ class JWTAuthBackend():
     def get_user(user_id):
         # Now we know we have a Amsterdam municipal employee (may or may not be allowed acceess)
         # or external user with access to the `signals` application, we retrieve the Django user.
-        user = cache.get(user_id)
+        # The user, its permissions and departments are cached in the shared auth cache (see signals.auth.bundle).
+        bundle = get_auth_bundle(user_id)
 
-        if user == USER_DOES_NOT_EXIST:
+        if bundle == USER_DOES_NOT_EXIST:
             raise exceptions.AuthenticationFailed(USER_NOT_AUTHORIZED.format(user_id))
 
-        # We hit the database max once per 5 minutes, and then cache the results.
-        if user is None:  # i.e. cache miss
-            try:
-                user = User.objects.get(username__iexact=user_id)  # insensitive match fixes log-in bug
-            except User.DoesNotExist:
-                cache.set(user_id, USER_DOES_NOT_EXIST, 5 * 60)
-                raise exceptions.AuthenticationFailed(USER_NOT_AUTHORIZED.format(user_id))
-            else:
-                cache.set(user_id, user, 5 * 60)
-
+        user = load_user(bundle)
         if not user.is_active:
             raise exceptions.AuthenticationFailed('User inactive')
         return user
@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+"""
+The "auth bundle" of a user: the user, the permissions and the permission scope (categories and departments) of the
+user. The bundle is stored in the cache that is shared by all processes (settings.SHARED_CACHE), so an authenticated
+request that is authorized with the permissions of the user does not need any database query.
+
+The bundle of a user is removed when the user, the groups or permissions of the user or the profile of the user
+change. All bundles are invalidated (version stamp) when a group or the departments of a category change.
+
+Only the fields of the user in AUTH_BUNDLE_USER_FIELDS are stored, the password (hash) of the user is never cached.
+The bundles are not cached when the shared cache is a process local cache, an invalidation would only reach the
+process that made the change.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from signals.apps.services.domain.signal_permission import SignalPermissionService
+from signals.apps.signals.utils.cache import VersionStamp, get_shared_cache, is_process_local
+
+logger = logging.getLogger(__name__)
+
+AUTH_BUNDLE_VERSION_CACHE_KEY = 'signals.auth_bundle.version'
+AUTH_BUNDLE_CACHE_KEY = 'signals.auth_bundle.{version}.{username}'
+AUTH_BUNDLE_VERSION = VersionStamp(AUTH_BUNDLE_VERSION_CACHE_KEY)
+
+# The fields of the user that are stored in the bundle, the other fields are deferred
+AUTH_BUNDLE_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser',
+)
+
+# Cached instead of the bundle when no user exists with the given username
+USER_DOES_NOT_EXIST = -1
+
+_process_local_warned = False
+
+
+def get_auth_cache():
+    """
+    Returns the cache the bundles are stored in, or None if the bundles must not be cached
+    """
+    global _process_local_warned
+
+    shared_cache = get_shared_cache()
+    if is_process_local(shared_cache):
+        if not _process_local_warned:
+            logger.warning('The shared cache is a process local cache, the auth bundles are not cached')
+            _process_local_warned = True
+        return None
+    return shared_cache
+
+
+def get_auth_bundle_version():
+    """
+    Returns the current version stamp of the auth bundles, a new stamp is generated if there is none
+    """
+    return AUTH_BUNDLE_VERSION.get()
+
+
+def bump_auth_bundle_version():
+    """
+    Invalidate the auth bundles of all users, must be called whenever a group or the departments of a category change
+    """
+    AUTH_BUNDLE_VERSION.bump()
+
+
+def _get_cache_key(username):
+    # Usernames are matched case insensitive
+    return AUTH_BUNDLE_CACHE_KEY.format(version=get_auth_bundle_version(), username=username.lower())
+
+
+def build_auth_bundle(user):
+    """
+    Returns the auth bundle of the given user, the permission scope is queried (the user is read from the database)
+    """
+    category_ids, department_ids = SignalPermissionService().get_user_scope(user)
+    return {
+        'user': {field: getattr(user, field) for field in AUTH_BUNDLE_USER_FIELDS},
+        'permissions': frozenset(user.get_all_permissions()),
+        'category_ids': category_ids,
+        'department_ids': department_ids,
+    }
+
+
+def load_user(bundle):
+    """
+    Returns the user of the given auth bundle, the permissions and permission scope of the user are read from the
+    bundle instead of the database
+    """
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in bundle['user']]
+    user = User.from_db(User.objects.db, field_names, [bundle['user'][name] for name in field_names])
+    user._perm_cache = set(bundle['permissions'])  # Used by the ModelBackend, see ModelBackend.get_all_permissions
+    user.signal_permission_scope = (bundle['category_ids'], bundle['department_ids'])
+    return user
+
+
+def _query_auth_bundle(username):
+    try:
+        user = User.objects.select_related('profile').get(username__iexact=username)
+    except User.DoesNotExist:
+        return USER_DOES_NOT_EXIST
+    return build_auth_bundle(user)
+
+
+def get_auth_bundle(username):
+    """
+    Returns the (cached) auth bundle of the user with the given username, or USER_DOES_NOT_EXIST
+    """
+    auth_cache = get_auth_cache()
+    if auth_cache is None:
+        return _query_auth_bundle(username)
+
+    cache_key = _get_cache_key(username)
+    bundle = auth_cache.get(cache_key)
+    if bundle is None:
+        bundle = _query_auth_bundle(username)
+        auth_cache.set(cache_key, bundle, settings.AUTH_BUNDLE_CACHE_TIMEOUT)
+    return bundle
+
+
+def invalidate_auth_bundle(username):
+    """
+    Removes the cached auth bundle of the user with the given username
+    """
+    auth_cache = get_auth_cache()
+    if auth_cache is not None:
+        auth_cache.delete(_get_cache_key(username))
@@ -23,7 +23,10 @@ _available_settings = {
     ],
     'USER_ID_FIELDS': ''.split(','),  # fieldnames separated by comma's
     'ALWAYS_OK': False,
-    'MIN_INTERVAL_KEYSET_UPDATE': 30
+    'MIN_INTERVAL_KEYSET_UPDATE': 30,
+    'KEYSET_TTL': 5 * 60,  # seconds, the keys from the JWKS_URL are refreshed in the background after the TTL
+    'KEYSET_FETCH_TIMEOUT': 5,  # seconds
+    'VERIFIED_TOKEN_CACHE_SIZE': 1000,  # number of verified tokens cached per process, 0 disables the cache
 }
 
 _settings = {}
@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2020 - 2021 Vereniging van Nederlandse Gemeenten, Gemeente Amsterdam
+import hashlib
+import logging
+import threading
 import time
 
 import requests
@@ -7,16 +10,147 @@ from jwcrypto.common import JWException
 from jwcrypto.jwk import JWKSet
 
 from .config import AuthzConfigurationError, get_settings
+from .token_cache import get_verified_token_cache
 
-_keyset = None
-_keyset_last_update = 0
+logger = logging.getLogger(__name__)
+
+
+class JWKSProvider():
+    """
+    Provides the keyset used to verify the JWTs, loaded from the JWKS setting and/or the JWKS_URL.
+
+    The keys from the JWKS_URL are refreshed in the background once they are older than the TTL, the current (stale)
+    keys are used until the refresh succeeds. A token signed with an unknown key triggers a refresh, at most once per
+    minimal interval. The JWKS_URL can also point to a local file ("file:///path/to/jwks.json").
+    """
+    def __init__(self, jwks=None, jwks_url=None, ttl=300, min_interval=30, timeout=5):
+        self.jwks = jwks
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.timeout = timeout
+
+        self._keyset = None
+        self._fingerprint = None
+        self._loaded_at = 0  # Time of the last successful refresh
+        self._attempted_at = 0  # Time of the last refresh, successful or not
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    def get_keyset(self):
+        if self._keyset is None:
+            self.refresh(raise_exception=True)
+        elif self.jwks_url and time.time() - self._loaded_at >= self.ttl:
+            self.refresh_in_background()
+        return self._keyset
+
+    def refresh_in_background(self):
+        """
+        Refreshes the keyset in a separate thread, unless a refresh is already running
+        """
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if time.time() - self._attempted_at < self.min_interval:
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, name='jwks-refresh', daemon=True)
+            self._refresh_thread.start()
+
+    def refresh_unknown_key(self):
+        """
+        Refreshes the keyset when a token is signed with an unknown key, at most once per minimal interval
+        """
+        if time.time() - self._attempted_at >= self.min_interval:
+            self.refresh()
+
+    def refresh(self, raise_exception=False):
+        """
+        Loads the keyset, when loading fails the current keys are kept
+
+        :returns: True if the keyset is loaded
+        """
+        self._attempted_at = time.time()
+        try:
+            keyset = self.load()
+        except AuthzConfigurationError:
+            if raise_exception or self._keyset is None:
+                raise
+            logger.exception('Failed to refresh the JWKS, the current keys are used')
+            return False
+
+        self._keyset = keyset
+        self._loaded_at = time.time()
+        self._clear_verified_tokens_on_change()
+        return True
+
+    def load(self):
+        keyset = JWKSet()
+
+        if self.jwks:
+            try:
+                keyset.import_keyset(self.jwks)
+            except JWException:
+                raise AuthzConfigurationError('Failed to import keyset from settings')
+
+        if self.jwks_url:
+            try:
+                keyset.import_keyset(self._fetch_jwks_url())
+            except JWException as e:
+                raise AuthzConfigurationError('Failed to import Keycloak keyset') from e
+
+        if len(keyset['keys']) == 0:
+            raise AuthzConfigurationError('No keys loaded!')
+        return keyset
+
+    def _fetch_jwks_url(self):
+        if self.jwks_url.startswith('file://'):
+            try:
+                with open(self.jwks_url[len('file://'):]) as jwks_file:
+                    return jwks_file.read()
+            except OSError as e:
+                raise AuthzConfigurationError(f'Failed to read keyset from file: {self.jwks_url}, error: {e}')
+
+        try:
+            response = requests.get(self.jwks_url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise AuthzConfigurationError(
+                'Failed to get Keycloak keyset from url: {}, error: {}'.format(self.jwks_url, e)
+            )
+        return response.text
+
+    def _clear_verified_tokens_on_change(self):
+        """
+        The verified tokens are cleared when the keys in the keyset have changed, a token that is verified with a key
+        that is removed from the keyset is no longer valid
+        """
+        fingerprint = hashlib.sha256(
+            ''.join(sorted(key.export() for key in self._keyset['keys'])).encode('utf-8')
+        ).hexdigest()
+        if fingerprint != self._fingerprint:
+            get_verified_token_cache().clear()
+            self._fingerprint = fingerprint
+
+
+_provider = None
+
+
+def get_jwks_provider():
+    global _provider
+    if _provider is None:
+        settings = get_settings()
+        _provider = JWKSProvider(
+            jwks=settings.get('JWKS'),
+            jwks_url=settings.get('JWKS_URL'),
+            ttl=settings['KEYSET_TTL'],
+            min_interval=settings['MIN_INTERVAL_KEYSET_UPDATE'],
+            timeout=settings['KEYSET_FETCH_TIMEOUT'],
+        )
+    return _provider
 
 
 def get_keyset():
-    global _keyset
-    if not _keyset:
-        init_keyset()
-    return _keyset
+    return get_jwks_provider().get_keyset()
 
 
 def check_update_keyset():
@@ -25,49 +159,11 @@ def check_update_keyset():
     check sometimes if the JWKS has changed. To avoid too many requests to
     the url, we set a minimal interval between two checks.
     """
-    settings = get_settings()
-    current_time = time.time()
-    if current_time - _keyset_last_update >= settings['MIN_INTERVAL_KEYSET_UPDATE']:
-        init_keyset()
+    get_jwks_provider().refresh_unknown_key()
 
 
 def init_keyset():
     """
     Initialize keyset, by loading keyset from settings
     """
-    global _keyset
-
-    _keyset = JWKSet()
-    settings = get_settings()
-
-    if settings.get('JWKS'):
-        load_jwks(settings['JWKS'])
-
-    if settings.get('JWKS_URL'):
-        load_jwks_from_url(settings['JWKS_URL'])
-
-    if len(_keyset['keys']) == 0:
-        raise AuthzConfigurationError('No keys loaded!')
-
-
-def load_jwks(jwks):
-    global _keyset
-    try:
-        _keyset.import_keyset(jwks)
-    except JWException:
-        raise AuthzConfigurationError("Failed to import keyset from settings")
-
-
-def load_jwks_from_url(jwks_url):
-    global _keyset
-    try:
-        response = requests.get(jwks_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise AuthzConfigurationError(
-            "Failed to get Keycloak keyset from url: {}, error: {}".format(jwks_url, e)
-        )
-    try:
-        _keyset.import_keyset(response.text)
-    except JWException as e:
-        raise AuthzConfigurationError("Failed to import Keycloak keyset") from e
+    get_jwks_provider().refresh(raise_exception=True)
@@ -0,0 +1,78 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from .config import get_settings
+
+
+class VerifiedTokenCache():
+    """
+    Bounded LRU cache of verified JWTs, so the signature of a token is only verified once per process.
+
+    The tokens are keyed by their SHA-256 hash and are kept until the token expires ("exp" claim). The cache must be
+    cleared when the keyset changes, a token verified with a removed key is no longer valid.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        """
+        Returns the verified JWT of the given token, None if the token is not cached or has expired
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None or entry[0] <= time.time():
+                self._tokens.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._tokens.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token, jwt, expires_at):
+        """
+        Caches the verified JWT of the given token until the given expiration time (seconds since the epoch)
+        """
+        if self.maxsize <= 0:
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._tokens[key] = (expires_at, jwt)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self):
+        """
+        Returns the number of hits, misses and cached tokens
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._tokens), 'maxsize': self.maxsize}
+
+
+_verified_token_cache = None
+
+
+def get_verified_token_cache():
+    global _verified_token_cache
+    if _verified_token_cache is None:
+        _verified_token_cache = VerifiedTokenCache(maxsize=get_settings()['VERIFIED_TOKEN_CACHE_SIZE'])
+    return _verified_token_cache
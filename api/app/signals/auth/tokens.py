@@ -10,11 +10,23 @@ from rest_framework.exceptions import AuthenticationFailed
 
 from .config import get_settings
 from .jwks import check_update_keyset, get_keyset
+from .token_cache import get_verified_token_cache
 
 
 class JWTAccessToken():
-    @staticmethod  # noqa: C901
+    @staticmethod
     def decode_token(token=None, missing_key=False):
+        """
+        Returns the verified JWT, the signature of a token that is seen before is not verified again until it expires
+        """
+        jwt = get_verified_token_cache().get(token) if token and not missing_key else None
+        if jwt is None:
+            jwt = JWTAccessToken.verify_token(token=token, missing_key=missing_key)
+            JWTAccessToken.cache_token(token, jwt)
+        return jwt
+
+    @staticmethod  # noqa: C901
+    def verify_token(token=None, missing_key=False):
         settings = get_settings()
         try:
             jwt = JWT(jwt=token, key=get_keyset(), algs=settings['ALLOWED_SIGNING_ALGORITHMS'])
@@ -28,11 +40,20 @@ class JWTAccessToken():
             if missing_key:
                 raise AuthenticationFailed('token key not present')
             check_update_keyset()
-            return JWTAccessToken.decode_token(token=token, missing_key=True)
+            return JWTAccessToken.verify_token(token=token, missing_key=True)
         except InvalidJWSObject as e:
             raise AuthenticationFailed(f'{e}')
         return jwt
 
+    @staticmethod
+    def cache_token(token, jwt):
+        """
+        Caches the verified token until it expires, tokens without an expiration time are not cached
+        """
+        expires_at = loads(jwt.claims).get('exp')
+        if isinstance(expires_at, (int, float)):
+            get_verified_token_cache().set(token, jwt, expires_at)
+
     @staticmethod  # noqa: C901
     def decode_claims(raw_claims):
         settings = get_settings()
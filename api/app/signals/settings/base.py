@@ -240,6 +240,7 @@ SIGNALS_AUTHZ = {
     'JWKS_URL': os.getenv('JWKS_URL'),
     'USER_ID_FIELDS': os.getenv('USER_ID_FIELDS', 'sub').split(','),
     'ALWAYS_OK': False,
+    'VERIFIED_TOKEN_CACHE_SIZE': int(os.getenv('VERIFIED_TOKEN_CACHE_SIZE', 1000)),
 }
 
 # Celery settings
@@ -279,11 +280,26 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@meldingen.amsterda
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 # Django cache settings
+SHARED_CACHE_BACKEND = os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Cache shared by all processes (web and Celery workers), see signals.apps.signals.utils.cache. Defaults to a table
+    # in the database, created with "python manage.py createcachetable". Can be set to memcached using the
+    # SHARED_CACHE_BACKEND and SHARED_CACHE_LOCATION.
+    'shared': {
+        'BACKEND': SHARED_CACHE_BACKEND,
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'signals_shared_cache'),
+    },
 }
+if SHARED_CACHE_BACKEND == 'django.core.cache.backends.db.DatabaseCache':
+    CACHES['shared']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 100000))}
+SHARED_CACHE = 'shared'
+# Version stamps in the shared cache are read at most once per interval per process, see utils.cache.VersionStamp
+SHARED_CACHE_VERSION_CHECK_INTERVAL = int(os.getenv('SHARED_CACHE_VERSION_CHECK_INTERVAL', 5))  # seconds
+# The users, their permissions and departments are cached in the shared cache, see signals.auth.bundle
+AUTH_BUNDLE_CACHE_TIMEOUT = int(os.getenv('AUTH_BUNDLE_CACHE_TIMEOUT', 5 * 60))  # seconds
 
 # Sentry logging
 RAVEN_CONFIG = {
@@ -460,6 +476,7 @@ ML_TOOL_ENDPOINT = os.getenv('SIGNALS_ML_TOOL_ENDPOINT', 'https://api.data.amste
 
 # Search settings
 SEARCH = {
+    'BACKEND': os.getenv('SEARCH_BACKEND', 'elasticsearch'),  # elasticsearch or postgres
     'PAGE_SIZE': 500,
     'CONNECTION': {
         'HOST': os.getenv('ELASTICSEARCH_HOST', 'elastic-index.service.consul:9200'),
@@ -472,9 +489,11 @@ FEATURE_FLAGS = {
     'API_SEARCH_ENABLED': os.getenv('API_SEARCH_ENABLED', True) in TRUE_VALUES,
     'SEARCH_BUILD_INDEX': os.getenv('SEARCH_BUILD_INDEX', True) in TRUE_VALUES,
     'API_DETERMINE_STADSDEEL_ENABLED': os.getenv('API_DETERMINE_STADSDEEL_ENABLED', True) in TRUE_VALUES,
+    'AREA_INDEX_ENABLED': os.getenv('AREA_INDEX_ENABLED', True) in TRUE_VALUES,
     'API_TRANSFORM_SOURCE_BASED_ON_REPORTER': os.getenv('API_TRANSFORM_SOURCE_BASED_ON_REPORTER', True) in TRUE_VALUES,
     'API_TRANSFORM_SOURCE_IF_A_SIGNAL_IS_A_CHILD': os.getenv('API_TRANSFORM_SOURCE_IF_A_SIGNAL_IS_A_CHILD', True) in TRUE_VALUES,  # noqa
     'TASK_UPDATE_CHILDREN_BASED_ON_PARENT': os.getenv('TASK_UPDATE_CHILDREN_BASED_ON_PARENT', True) in TRUE_VALUES,
+    'SIGNAL_OUTBOX_ENABLED': os.getenv('SIGNAL_OUTBOX_ENABLED', False) in TRUE_VALUES,
 
     'API_SIGNAL_CONTEXT': os.getenv('API_SIGNAL_CONTEXT', True) in TRUE_VALUES,
     'API_SIGNAL_CONTEXT_REPORTER': os.getenv('API_SIGNAL_CONTEXT_REPORTER', True) in TRUE_VALUES,
@@ -484,6 +503,32 @@ FEATURE_FLAGS = {
     'AUTOMATICALLY_CREATE_CHILD_SIGNALS_PER_EIKENPROCESSIERUPS_TREE': os.getenv('AUTOMATICALLY_CREATE_CHILD_SIGNALS_PER_EIKENPROCESSIERUPS_TREE', False) in TRUE_VALUES,  # noqa
 }
 
+# Transactional outbox for the Django signals sent by the SignalManager (see signals.apps.signals.outbox)
+SIGNAL_OUTBOX_BATCH_SIZE = int(os.getenv('SIGNAL_OUTBOX_BATCH_SIZE', 100))
+SIGNAL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('SIGNAL_OUTBOX_MAX_ATTEMPTS', 10))
+SIGNAL_OUTBOX_RETRY_DELAY = int(os.getenv('SIGNAL_OUTBOX_RETRY_DELAY', 30))  # seconds, doubled on every attempt
+SIGNAL_OUTBOX_CLAIM_TIMEOUT = int(os.getenv('SIGNAL_OUTBOX_CLAIM_TIMEOUT', 300))  # seconds
+SIGNAL_OUTBOX_DISPATCH_INTERVAL = float(os.getenv('SIGNAL_OUTBOX_DISPATCH_INTERVAL', 5.0))  # seconds
+if FEATURE_FLAGS['SIGNAL_OUTBOX_ENABLED']:
+    CELERY_BEAT_SCHEDULE['dispatch-outbox-events'] = {
+        'task': 'signals.apps.signals.tasks.dispatch_outbox_events',
+        'schedule': SIGNAL_OUTBOX_DISPATCH_INTERVAL,
+    }
+
+# The summary of the signals of a reporter is cached until a signal of the reporter changes, or the timeout is reached
+SIGNAL_CONTEXT_REPORTER_CACHE_TIMEOUT = int(os.getenv('SIGNAL_CONTEXT_REPORTER_CACHE_TIMEOUT', 60 * 60))  # seconds
+
+# Mapbox Vector Tiles of the signals, tiles up to SIGNAL_TILES_CACHE_MAX_ZOOM are cached
+SIGNAL_TILES_MAX_ZOOM = int(os.getenv('SIGNAL_TILES_MAX_ZOOM', 22))
+SIGNAL_TILES_CACHE_MAX_ZOOM = int(os.getenv('SIGNAL_TILES_CACHE_MAX_ZOOM', 18))
+SIGNAL_TILES_CACHE_TIMEOUT = int(os.getenv('SIGNAL_TILES_CACHE_TIMEOUT', 60 * 60))  # seconds
+# The cached tiles are invalidated per tile at this zoom level, all tiles below this zoom level are invalidated at once
+SIGNAL_TILES_STAMP_ZOOM = int(os.getenv('SIGNAL_TILES_STAMP_ZOOM', 12))
+# The payload of the public map is cached until a signal on the map changes, or the timeout is reached
+PUBLIC_MAP_CACHE_TIMEOUT = int(os.getenv('PUBLIC_MAP_CACHE_TIMEOUT', 60 * 60))  # seconds
+# Size of the grid cells (in pixels) used to cluster the signals on a map (?cluster=grid)
+SIGNAL_CLUSTER_GRID_SIZE = int(os.getenv('SIGNAL_CLUSTER_GRID_SIZE', 64))
+
 API_DETERMINE_STADSDEEL_ENABLED_AREA_TYPE = 'sia-stadsdeel'
 API_TRANSFORM_SOURCE_BASED_ON_REPORTER_EXCEPTIONS = os.getenv(
     'API_TRANSFORM_SOURCE_BASED_ON_REPORTER_EXCEPTIONS',
@@ -19,5 +19,9 @@ SIGNALS_AUTHZ = {
 
 FEATURE_FLAGS['API_SEARCH_ENABLED'] = False  # noqa F405
 FEATURE_FLAGS['SEARCH_BUILD_INDEX'] = False  # noqa F405
+# Bumps of the version stamps must be seen immediately by the tests
+SHARED_CACHE_VERSION_CHECK_INTERVAL = 0
+# The process local Area index outlives the test transactions, tests that need it enable it explicitly
+FEATURE_FLAGS['AREA_INDEX_ENABLED'] = False  # noqa F405
 
 FRONTEND_URL = 'http://dummy_link'
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2018 - 2021 Gemeente Amsterdam
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -7,3 +8,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'signals.settings.production')
 
 application = get_wsgi_application()
+
+from signals.auth.jwks import get_keyset  # noqa: E402
+
+# Load the keys used to verify the JWTs at startup, instead of during the first authenticated request
+try:
+    get_keyset()
+except Exception:  # noqa
+    logging.getLogger(__name__).exception('Failed to load the JWKS at startup')
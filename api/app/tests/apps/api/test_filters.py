@@ -4,9 +4,16 @@ from datetime import datetime, timedelta
 from random import shuffle
 
 from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 
+from signals.apps.api.filters.utils import (
+    CHOICES_VERSION_CACHE_KEY,
+    choice_registry,
+    source_choices
+)
 from signals.apps.feedback.factories import FeedbackFactory
 from signals.apps.signals import workflow
 from signals.apps.signals.factories import (
@@ -24,7 +31,8 @@ from signals.apps.signals.factories import (
     StatusFactory,
     TypeFactory
 )
-from signals.apps.signals.models import Priority, Signal, SignalDepartments
+from signals.apps.signals.models import Priority, Signal, SignalDepartments, Source
+from signals.apps.signals.utils.cache import get_shared_cache
 from signals.apps.signals.workflow import BEHANDELING, GEMELD, ON_HOLD
 from tests.test import SignalsBaseApiTestCase
 
@@ -1370,3 +1378,59 @@ class TestPunctualityFilter(SignalsBaseApiTestCase):
             ids = self._request_filter_signals(params)
         late = [self.signal_slo_c.id, self.signal_slo_w.id]
         self.assertEqual(set(late), set(ids))
+
+
+class TestChoiceRegistry(SignalsBaseApiTestCase):
+    def setUp(self):
+        choice_registry.clear()
+
+    def test_choices_are_cached(self):
+        SourceFactory.create(name='source-a')
+        choices = source_choices()
+        self.assertIn(('source-a', 'source-a'), choices)
+
+        # Only the version stamp is read from the shared cache, the sources are not queried
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(source_choices(), choices)
+        self.assertFalse(any('"signals_source"' in query['sql'] for query in context.captured_queries))
+
+    def test_choices_invalidated_by_other_process(self):
+        SourceFactory.create(name='source-a')
+        source_choices()
+
+        # Added and bumped by another process, bulk_create does not send the post_save signal
+        Source.objects.bulk_create([Source(name='source-b')])
+        get_shared_cache().set(CHOICES_VERSION_CACHE_KEY, 'bumped-by-another-process', None)
+
+        self.assertIn(('source-b', 'source-b'), source_choices())
+
+    def test_choices_invalidated_on_save_and_delete(self):
+        source = SourceFactory.create(name='source-a')
+        source_choices()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SourceFactory.create(name='source-b')
+        self.assertIn(('source-b', 'source-b'), source_choices())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            source.delete()
+        self.assertNotIn(('source-a', 'source-a'), source_choices())
+
+    def test_choices_bumped_once_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for i in range(10):
+                SourceFactory.create(name=f'source-{i}')
+        self.assertEqual(len(callbacks), 1)
+
+    def test_filter_on_new_source(self):
+        self.client.force_authenticate(user=self.superuser)
+        response = self.client.get('/signals/v1/private/signals/', {'source': 'source-a'})  # Caches the choices
+        self.assertEqual(response.status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SourceFactory.create(name='source-a')
+        SignalFactory.create(source='source-a')
+
+        response = self.client.get('/signals/v1/private/signals/', {'source': 'source-a'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
@@ -1,8 +1,10 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2019 - 2021 Gemeente Amsterdam
 import copy
+import csv
 import json
 import os
+from base64 import b64encode
 from datetime import timedelta
 from unittest import skip
 from unittest.mock import patch
@@ -12,8 +14,11 @@ from django.contrib.auth.models import Permission
 from django.contrib.gis.geos import MultiPolygon, Polygon
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.http import urlencode
 from freezegun import freeze_time
 from rest_framework import status
@@ -25,8 +30,10 @@ from signals.apps.api.validation.address.base import (
 from signals.apps.signals import workflow
 from signals.apps.signals.factories import (
     AreaFactory,
+    AttachmentFactory,
     CategoryFactory,
     DepartmentFactory,
+    NoteFactory,
     ParentCategoryFactory,
     ServiceLevelObjectiveFactory,
     SignalFactory,
@@ -36,6 +43,7 @@ from signals.apps.signals.factories import (
 )
 from signals.apps.signals.factories.category_departments import CategoryDepartmentFactory
 from signals.apps.signals.models import STADSDEEL_CENTRUM, Attachment, Signal
+from signals.apps.signals.utils.tiles import point_to_tile
 from tests.apps.signals.attachment_helpers import (
     add_image_attachments,
     add_non_image_attachments,
@@ -160,6 +168,155 @@ class TestPrivateSignalViewSet(SIAReadUserMixin, SIAReadWriteUserMixin, SignalsB
 
         # TODO: add GeoJSON schema check?
 
+    def test_geo_list_endpoint_features(self):
+        response = self.client.get(self.geo_list_endpoint)
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['type'], 'FeatureCollection')
+
+        features = {feature['properties']['id']: feature for feature in data['features']}
+        feature = features[self.signal_no_image.pk]
+        self.assertEqual(feature['type'], 'Feature')
+        self.assertEqual(feature['geometry']['type'], 'Point')
+        self.assertEqual(round(feature['geometry']['coordinates'][0], 5),
+                         round(self.signal_no_image.location.geometrie.x, 5))
+        self.assertEqual(round(feature['geometry']['coordinates'][1], 5),
+                         round(self.signal_no_image.location.geometrie.y, 5))
+        self.assertEqual(parse_datetime(feature['properties']['created_at']), self.signal_no_image.created_at)
+
+    def test_geo_list_endpoint_cluster(self):
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=grid&zoom=0')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['type'], 'FeatureCollection')
+        self.assertEqual(len(data['features']), 1)  # At zoom level 0 all signals are in the same cluster
+
+        properties = data['features'][0]['properties']
+        self.assertEqual(properties['count'], 2)
+        self.assertEqual(properties['counts'], {workflow.GEMELD: 2})
+
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=grid&zoom=0&group_by=main_category')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(response.json()['features'][0]['properties']['counts'].values()), 2)
+
+        # Nothing inside the bbox
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=grid&zoom=0&bbox=0,0,1,1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['features'], [])
+
+    def test_geo_list_endpoint_cluster_invalid(self):
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=grid')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=kmeans&zoom=1')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f'{self.geo_list_endpoint}?cluster=grid&zoom=1&bbox=1,2,3')
+        self.assertEqual(response.status_code, 400)
+
+    def test_tiles_endpoint(self):
+        geometry = self.signal_no_image.location.geometrie
+        x, y = point_to_tile(geometry, 14)
+
+        response = self.client.get(f'{self.list_endpoint}tiles/14/{x}/{y}.pbf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertGreater(len(response.content), 0)
+
+        # The tile is cached, the tile is not generated again
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'{self.list_endpoint}tiles/14/{x}/{y}.pbf')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('ST_AsMVT' in query['sql'] for query in context.captured_queries))
+
+        # Updating the status invalidates the cached tile
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.actions.update_status({'state': workflow.AFWACHTING, 'text': 'Afwachting'}, self.signal_no_image)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'{self.list_endpoint}tiles/14/{x}/{y}.pbf')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('ST_AsMVT' in query['sql'] for query in context.captured_queries))
+
+    def test_tiles_endpoint_empty_tile(self):
+        response = self.client.get(f'{self.list_endpoint}tiles/14/0/0.pbf')  # Somewhere near the north pole
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+
+    def test_tiles_endpoint_invalid_tile(self):
+        response = self.client.get(f'{self.list_endpoint}tiles/1/2/0.pbf')
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_endpoint_cursor(self):
+        signal = SignalFactoryValidLocation.create()
+
+        # The first page in cursor mode, no count
+        response = self.client.get(f'{self.list_endpoint}?cursor=&page_size=2&ordering=-created_at')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertIsNone(data['count'])
+        self.assertEqual([signal.pk, self.signal_with_image.pk], [item['id'] for item in data['results']])
+        self.assertIsNone(data['_links']['previous']['href'])
+        self.assertIn('cursor=', data['_links']['next']['href'])
+        self.assertIn('rel="next"', response['Link'])
+
+        # The second (last) page
+        response = self.client.get(data['_links']['next']['href'])
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual([self.signal_no_image.pk], [item['id'] for item in data['results']])
+        self.assertIsNone(data['_links']['next']['href'])
+
+    def test_list_endpoint_cursor_count(self):
+        response = self.client.get(f'{self.list_endpoint}?cursor=&count=exact')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+        response = self.client.get(f'{self.list_endpoint}?cursor=&count=estimate')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json()['count'], int)
+
+    def test_list_endpoint_invalid_cursor(self):
+        response = self.client.get(f'{self.list_endpoint}?cursor=invalid')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+        # A valid encoding of an invalid keyset
+        cursor = b64encode(json.dumps(['2021-01-01', 'not-a-pk']).encode('utf-8')).decode('ascii')
+        response = self.client.get(f'{self.list_endpoint}?{urlencode({"cursor": cursor, "ordering": "-created_at"})}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_endpoint_cursor_multiple_ordering_fields(self):
+        response = self.client.get(f'{self.list_endpoint}?cursor=&ordering=status,-created_at')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.json())
+
+        # Without the cursor the ordering is allowed
+        response = self.client.get(f'{self.list_endpoint}?ordering=status,-created_at')
+        self.assertEqual(response.status_code, 200)
+
+    def test_geo_list_endpoint_cursor(self):
+        response = self.client.get(f'{self.geo_list_endpoint}?cursor=&page_size=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['features']), 1)
+        self.assertFalse(response.has_header('X-Total-Count'))
+
+        links = response['Link'].split(',')
+        self.assertEqual(len(links), 2)
+        self.assertIn('rel="self"', links[0])
+        self.assertIn('rel="next"', links[1])
+
+        response = self.client.get(links[1].split(';')[0][1:-1])  # The next page
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['features']), 1)
+
+        links = response['Link'].split(',')
+        self.assertEqual(len(links), 1)
+        self.assertIn('rel="self"', links[0])
+
     def test_geo_list_endpoint_paginated(self):
         # the first page
         response = self.client.get(f'{self.geo_list_endpoint}?page_size=1')
@@ -1581,6 +1738,64 @@ class TestPrivateSignalViewSet(SIAReadUserMixin, SIAReadWriteUserMixin, SignalsB
         self.assertEqual(deadline_factor_3, signal.category_assignment.deadline_factor_3)
 
 
+@override_settings(FEATURE_FLAGS={
+    'API_SEARCH_ENABLED': False,
+    'SEARCH_BUILD_INDEX': False,
+    'API_DETERMINE_STADSDEEL_ENABLED': True,
+    'API_FILTER_EXTRA_PROPERTIES': True,
+    'API_TRANSFORM_SOURCE_BASED_ON_REPORTER': True,
+    'API_TRANSFORM_SOURCE_IF_A_SIGNAL_IS_A_CHILD': False,
+    'TASK_UPDATE_CHILDREN_BASED_ON_PARENT': False,
+})
+class TestPrivateSignalViewSetQueryCount(SIAReadWriteUserMixin, SignalsBaseApiTestCase):
+    """
+    The number of queries needed to list or retrieve Signals must not depend on the number of Signals (or the number
+    of attachments, children and notes of the Signals)
+    """
+    list_endpoint = '/signals/v1/private/signals/'
+    detail_endpoint = list_endpoint + '{}'
+
+    def setUp(self):
+        self.sia_read_write_user.user_permissions.add(Permission.objects.get(codename='sia_can_view_all_categories'))
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+    def _create_signal(self, n_related):
+        signal = SignalFactoryValidLocation.create()
+        AttachmentFactory.create_batch(n_related, _signal=signal)
+        NoteFactory.create_batch(n_related, _signal=signal)
+        SignalFactoryValidLocation.create_batch(n_related, parent=signal)
+        return signal
+
+    def _count_queries(self, endpoint):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(endpoint)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_endpoint(self):
+        self._create_signal(n_related=1)
+        n_queries = self._count_queries(self.list_endpoint)
+
+        for _ in range(5):
+            self._create_signal(n_related=3)
+        self.assertEqual(self._count_queries(self.list_endpoint), n_queries)
+
+        response = self.client.get(self.list_endpoint)
+        self.assertTrue(all(item['has_attachments'] == (item['has_parent'] is False)
+                            for item in response.json()['results']))
+
+    def test_detail_endpoint(self):
+        signal = self._create_signal(n_related=1)
+        n_queries = self._count_queries(self.detail_endpoint.format(signal.pk))
+
+        signal = self._create_signal(n_related=3)
+        self.assertEqual(self._count_queries(self.detail_endpoint.format(signal.pk)), n_queries)
+
+        response = self.client.get(self.detail_endpoint.format(signal.pk))
+        self.assertTrue(response.json()['has_attachments'])
+        self.assertEqual(len(response.json()['_links']['sia:children']), 3)
+
+
 @override_settings(FEATURE_FLAGS={
     'API_SEARCH_ENABLED': False,
     'SEARCH_BUILD_INDEX': False,
@@ -2064,6 +2279,105 @@ class TestPrivateSignalViewSetPermissions(SIAReadUserMixin, SIAWriteUserMixin, S
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class TestPrivateSignalSparseFields(SignalsBaseApiTestCase):
+    list_endpoint = '/signals/v1/private/signals/'
+    detail_endpoint = '/signals/v1/private/signals/{pk}'
+
+    def setUp(self):
+        self.signals = SignalFactory.create_batch(3)
+        NoteFactory.create(_signal=self.signals[0])
+
+    def test_list_sparse_fields(self):
+        self.client.force_authenticate(user=self.superuser)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_endpoint)
+        self.assertEqual(response.status_code, 200)
+        n_queries = len(context.captured_queries)
+        n_bytes = len(response.content)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_endpoint, {'fields': 'id,status,created_at'})
+        self.assertEqual(response.status_code, 200)
+
+        for item in response.json()['results']:
+            self.assertEqual(set(item.keys()), {'_links', 'id', 'status', 'created_at'})
+        self.assertEqual(response.json()['count'], 3)
+
+        # The related objects of the fields that are not requested are not retrieved
+        self.assertLess(len(context.captured_queries), n_queries)
+        self.assertLess(len(response.content), n_bytes)
+        self.assertFalse(any('"signals_location"' in query['sql'] for query in context.captured_queries))
+
+    def test_detail_sparse_fields(self):
+        self.client.force_authenticate(user=self.superuser)
+
+        response = self.client.get(self.detail_endpoint.format(pk=self.signals[0].pk), {'fields': 'id,notes'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json().keys()), {'_links', 'id', 'notes'})
+        self.assertEqual(len(response.json()['notes']), 1)
+
+
+class TestSignalExportEndpoint(SIAReadWriteUserMixin, SignalsBaseApiTestCase):
+    export_endpoint = '/signals/v1/private/signals/export/'
+
+    def setUp(self):
+        self.department = DepartmentFactory.create()
+        self.category = CategoryFactory.create()
+        CategoryDepartmentFactory.create(category=self.category, department=self.department, can_view=True)
+        self.sia_read_write_user.profile.departments.add(self.department)
+
+        self.signal_gemeld = SignalFactory.create(category_assignment__category=self.category,
+                                                  status__state=workflow.GEMELD)
+        self.signal_afgehandeld = SignalFactory.create(category_assignment__category=self.category,
+                                                       status__state=workflow.AFGEHANDELD)
+        self.signal_other_category = SignalFactory.create()
+
+    def _export(self, **params):
+        response = self.client.get(self.export_endpoint, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_without_permission(self):
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+        response = self.client.get(self.export_endpoint)
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_ndjson(self):
+        self.sia_read_write_user.user_permissions.add(Permission.objects.get(codename='sia_signal_export'))
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+        response, content = self._export(format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        # Only the Signals the user is allowed to see, ordered like the list endpoint
+        self.assertEqual([row['id'] for row in rows], [self.signal_afgehandeld.pk, self.signal_gemeld.pk])
+        self.assertEqual(rows[0]['state'], workflow.AFGEHANDELD)
+        self.assertEqual(rows[0]['sub_category'], self.category.slug)
+        self.assertEqual(rows[0]['signal_uuid'], str(self.signal_afgehandeld.uuid))
+
+    def test_export_csv_filtered(self):
+        self.sia_read_write_user.user_permissions.add(Permission.objects.get(codename='sia_signal_export'))
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+        response, content = self._export(format='csv', status=workflow.GEMELD)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(self.signal_gemeld.pk))
+        self.assertEqual(rows[0]['state'], workflow.GEMELD)
+
+    def test_export_invalid_filter(self):
+        self.sia_read_write_user.user_permissions.add(Permission.objects.get(codename='sia_signal_export'))
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+        response = self.client.get(self.export_endpoint, {'format': 'csv', 'status': 'not-a-state'})
+        self.assertEqual(response.status_code, 400)
+
+
 class TestSignalChildrenEndpoint(SIAReadWriteUserMixin, SignalsBaseApiTestCase):
     def setUp(self):
         self.child_endpoint = '/signals/v1/private/signals/{pk}/children/'
@@ -2226,6 +2540,33 @@ class TestSignalChildrenEndpoint(SIAReadWriteUserMixin, SignalsBaseApiTestCase):
                 # The currently logged in User should NOT have permissions to view the second child
                 self.assertFalse(item['can_view_signal'])
 
+    def test_shows_children_number_of_queries(self):
+        """
+        The number of queries does not depend on the number of children, "can_view_signal" is determined for all
+        children at once
+        """
+        department = DepartmentFactory.create()
+        category = CategoryFactory.create()
+        CategoryDepartmentFactory.create(category=category, department=department, can_view=True)
+
+        self.sia_read_write_user.profile.departments.add(department)
+        self.client.force_authenticate(user=self.sia_read_write_user)
+
+        parent_signal = SignalFactory.create(category_assignment__category=category)
+        SignalFactory.create_batch(2, parent=parent_signal, category_assignment__category=category)
+        url = self.child_endpoint.format(pk=parent_signal.pk)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        n_queries = len(context.captured_queries)
+
+        SignalFactory.create_batch(5, parent=parent_signal)
+
+        with self.assertNumQueries(n_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['count'], 7)
+        self.assertEqual(len([item for item in response.json()['results'] if item['can_view_signal']]), 2)
+
 
 class TestSignalEndpointRouting(SIAReadWriteUserMixin, SIAReadUserMixin, SignalsBaseApiTestCase):
     def setUp(self):
@@ -2,11 +2,16 @@
 # Copyright (C) 2021 Vereniging van Nederlandse Gemeenten, Gemeente Amsterdam
 import os
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from signals.apps.api.generics.routers import SignalsRouter
 from signals.apps.api.views import PublicSignalMapViewSet
+from signals.apps.signals import workflow
 from signals.apps.signals.factories import SignalFactoryValidLocation
+from signals.apps.signals.models import Signal
+from signals.apps.signals.utils.tiles import point_to_tile
 from tests.test import SignalsBaseApiTestCase
 
 THIS_DIR = os.path.dirname(__file__)
@@ -51,6 +56,47 @@ class TestMapSignalEndpoints(SignalsBaseApiTestCase):
         self.assertEqual(obj['properties']['category']['main'], self.signal2.category_assignment.category.parent.name) # noqa
         self.assertEqual(obj['properties']['category']['sub'], self.signal2.category_assignment.category.name)
 
+    def test_map_signals_list_cached(self):
+        response = self.client.get(self.endpoint_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        etag = response['ETag']
+
+        # The payload is cached, the signals are not queried
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.endpoint_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"signals_signal"' in query['sql'] for query in context.captured_queries))
+        self.assertEqual(len(response.json()['features']), 2)
+
+        # Not modified
+        response = self.client.get(self.endpoint_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Updating the status of a signal invalidates the payload
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.actions.update_status({'state': workflow.AFGEHANDELD, 'text': 'Afgehandeld'}, self.signal1)
+
+        response = self.client.get(self.endpoint_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['features']), 1)
+
+    def test_map_signals_cluster(self):
+        response = self.client.get(f'{self.endpoint_url}?cluster=grid&zoom=0')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(len(data['features']), 1)
+        self.assertEqual(data['features'][0]['properties']['count'], 2)
+
+    def test_map_signals_tiles(self):
+        x, y = point_to_tile(self.signal1.location.geometrie, 14)
+        response = self.client.get(f'{self.endpoint_url}tiles/14/{x}/{y}.pbf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertGreater(len(response.content), 0)
+
 
 class TestMapSignalDefaultSettingEndpoints(SignalsBaseApiTestCase):
     def test_map_signals_list_defalt(self):
@@ -1,21 +1,31 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2021 Gemeente Amsterdam
+import os
+import random
 from datetime import timedelta
-from unittest import skip
+from timeit import default_timer as timer
+from unittest import skip, skipUnless
 
+from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db import connection
 from django.db.models import Q
-from django.test import override_settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import include, path, re_path
 from django.utils import timezone
 from freezegun import freeze_time
 from rest_framework.test import APITestCase
 
+from signals.apps.api.serializers.signal_context import get_signals_near
 from signals.apps.api.views import NamespaceView, SignalContextViewSet
 from signals.apps.feedback.factories import FeedbackFactory
 from signals.apps.signals import workflow
 from signals.apps.signals.factories import CategoryFactory, DepartmentFactory, SignalFactory
+from signals.apps.signals.managers import create_initial
 from signals.apps.signals.models import Signal
+from signals.apps.signals.utils.reporter_context import get_reporter_summary
 from tests.apps.signals.valid_locations import ARENA, BLAUWE_THEEHUIS, FILMMUSEUM_EYE, STADHUIS
 from tests.test import SIAReadWriteUserMixin, SignalsBaseApiTestCase, SuperUserMixin
 
@@ -156,6 +166,67 @@ class TestSignalContextView(SuperUserMixin, APITestCase):
         self.assertEqual(response_data['count'], 5)
         self.assertEqual(len(response_data['results']), 5)
 
+    def test_get_signal_context_reporter_detail_fields(self):
+        self.client.force_authenticate(user=self.superuser)
+
+        signal = self.reporter_1_signals.filter(children__isnull=False).first()
+        response = self.client.get(f'/signals/v1/private/signals/{signal.pk}/context/reporter/')
+        self.assertEqual(response.status_code, 200)
+
+        results = {result['id']: result for result in response.json()['results']}
+        self.assertTrue(results[signal.pk]['has_children'])
+        self.assertFalse(results[signal.pk]['feedback']['is_satisfied'])
+        self.assertTrue(all(result['can_view_signal'] for result in results.values()))
+        self.assertEqual(len([result for result in results.values() if result['feedback'] is None]), 2)
+
+    def test_get_signal_context_reporter_detail_number_of_queries(self):
+        self.client.force_authenticate(user=self.superuser)
+        signal_id = self.reporter_1_signals[1].pk
+        url = f'/signals/v1/private/signals/{signal_id}/context/reporter/'
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        n_queries = len(context.captured_queries)
+
+        # The number of queries does not depend on the number of Signals of the reporter
+        for signal in SignalFactory.create_batch(5, reporter__email=self.reporter_1_email):
+            FeedbackFactory.create(_signal=signal, submitted_at=timezone.now(), is_satisfied=True)
+
+        with self.assertNumQueries(n_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['count'], 10)
+
+    def test_get_signal_context_reporter_cached(self):
+        self.client.force_authenticate(user=self.superuser)
+        signal = self.reporter_1_signals[0]
+        url = f'/signals/v1/private/signals/{signal.pk}/context/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['reporter']['positive_count'], 1)
+
+        # The summary is cached per (case insensitive) email address of the reporter
+        with CaptureQueriesContext(connection) as context:
+            get_reporter_summary(self.reporter_1_email.upper())
+        self.assertFalse(any('"signals_signal"' in query['sql'] for query in context.captured_queries))
+
+        # Feedback and a new Signal of the reporter invalidate the cached summary
+        FeedbackFactory.create(_signal=self.reporter_1_signals.filter(feedback__isnull=True).first(),
+                               submitted_at=timezone.now(), is_satisfied=True)
+        signal = SignalFactory.create(reporter__email=self.reporter_1_email, status__state=workflow.GEMELD)
+        create_initial.send_robust(sender=self.__class__, signal_obj=signal)  # Not sent by the SignalFactory
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['reporter']['positive_count'], 2)
+        self.assertEqual(response.json()['reporter']['signal_count'], 6)
+        self.assertEqual(response.json()['reporter']['open_count'], 3)
+
+        # A status update of a Signal of the reporter invalidates the cached summary
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.actions.update_status({'state': workflow.AFGEHANDELD, 'text': 'Opgelost'}, signal)
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['reporter']['open_count'], 2)
+
     @skip('TODO Fix failing test')
     def test_get_signal_context_geography_detail(self):
         self.client.force_authenticate(user=self.superuser)
@@ -270,3 +341,59 @@ class TestSignalContextPermissions(SIAReadWriteUserMixin, SignalsBaseApiTestCase
         url = self.context_near_endpoint.format(self.signal_yes.id)
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
+
+
+class TestSignalContextNear(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory.create()
+        self.stadhuis_point = Point(STADHUIS['lon'], STADHUIS['lat'])
+
+    def test_filter_near(self):
+        signal = SignalFactory.create(location__geometrie=self.stadhuis_point,
+                                      category_assignment__category=self.category)
+        near = SignalFactory.create(location__geometrie=Point(STADHUIS['lon'] + 0.0005, STADHUIS['lat']),  # ~34m
+                                    category_assignment__category=self.category)
+        SignalFactory.create(location__geometrie=Point(STADHUIS['lon'] + 0.001, STADHUIS['lat']),  # ~68m
+                             category_assignment__category=self.category)
+        SignalFactory.create(location__geometrie=Point(ARENA['lon'], ARENA['lat']),
+                             category_assignment__category=self.category)
+
+        self.assertEqual(set(Signal.objects.filter_near(self.stadhuis_point, 50).values_list('id', flat=True)),
+                         {signal.pk, near.pk})
+        self.assertEqual(list(get_signals_near(signal).values_list('id', flat=True)), [near.pk])
+
+    def test_filter_near_uses_geography_index(self):
+        with connection.cursor() as cursor:
+            # Only in this transaction, with a handful of locations a sequential scan is cheaper
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        plan = Signal.objects.filter_near(self.stadhuis_point, 50).explain()
+        self.assertIn('signals_location_geography_idx', plan)
+
+    @skipUnless(os.getenv('SIGNALS_BENCHMARK'), 'Benchmark, set SIGNALS_BENCHMARK to run')
+    def test_benchmark_near(self):
+        n_signals = int(os.getenv('SIGNALS_BENCHMARK_SIZE', 2000))
+        random.seed(42)
+        for _ in range(n_signals):
+            point = Point(STADHUIS['lon'] + random.uniform(-0.05, 0.05), STADHUIS['lat'] + random.uniform(-0.03, 0.03))
+            SignalFactory.create(location__geometrie=point, category_assignment__category=self.category)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE signals_location')
+            cursor.execute('ANALYZE signals_signal')
+
+        def distance_annotation():
+            return Signal.objects.annotate(
+                distance_from_point=Distance('location__geometrie', self.stadhuis_point),
+            ).filter(distance_from_point__lte=D(m=250)).count()
+
+        def dwithin():
+            return Signal.objects.filter_near(self.stadhuis_point, 250).count()
+
+        # Distance uses a sphere, ST_DWithin on a geography the spheroid, locations on the border may differ
+        self.assertAlmostEqual(distance_annotation(), dwithin(), delta=1)
+
+        for name, query in [('Distance annotation', distance_annotation), ('ST_DWithin', dwithin)]:
+            start = timer()
+            for _ in range(10):
+                query()
+            print(f'\n{name}: {(timer() - start) / 10 * 1000:.2f} ms ({n_signals} Signals)')
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from io import StringIO
+from unittest.mock import PropertyMock, patch
+
+from django.contrib.gis import geos
+from django.core.management import call_command
+from django.test import TestCase
+
+from signals.apps.dsl.areas import AreaTypeGeometries
+from signals.apps.dsl.compiler import CompiledExpression, ExpressionCompiler
+from signals.apps.dsl.ExpressionEvaluator import ExpressionEvaluator
+from signals.apps.services.domain.dsl import DslService
+from signals.apps.signals.factories import ExpressionFactory
+from signals.apps.signals.models import Area
+from tests.apps.dsl import test_dsl
+
+
+class CompilerTest(test_dsl.DslTest):
+    """
+    Runs the DslTest with the ExpressionCompiler, the compiled expressions must evaluate the same as the interpreted
+    """
+    def setUp(self):
+        super().setUp()
+        self.compiler = ExpressionCompiler()
+
+    def test_compiled(self):
+        compiled = self.compiler.compile('testint == 1 and maincat == "dieren"')
+        self.assertIsInstance(compiled, CompiledExpression)
+        self.assertTrue(compiled(self.context))
+
+    def test_time_literal_parsed_once(self):
+        compiled = self.compiler.compile('time > 12:00 and time < 20:00')
+
+        with patch('signals.apps.dsl.evaluators.terminal_evaluator.time.strptime') as mocked_strptime:
+            self.assertTrue(compiled.evaluate(self.context))
+        mocked_strptime.assert_not_called()
+
+    def test_geometry_prepared_once(self):
+        compiled = self.compiler.compile('location_2 in area."stadsdeel"."oost"')
+        geometry = self.context['area']['stadsdeel']['oost']
+
+        self.assertTrue(compiled.evaluate(self.context))
+        with patch.object(type(geometry), 'prepared', new_callable=PropertyMock) as mocked_prepared:
+            self.assertTrue(compiled.evaluate(self.context))
+        mocked_prepared.assert_not_called()
+
+    def test_in_area_type_geometries(self):
+        areas = AreaTypeGeometries([
+            Area(code='oost', geometry=self.context['area']['stadsdeel']['oost']),
+            Area(code='west', geometry=geos.MultiPolygon(geos.Polygon.from_bbox((100.0, 100.0, 150.0, 150.0)))),
+        ])
+        context = {**self.context, 'area': {'stadsdeel': areas}}
+
+        in_oost = self.compiler.compile('location_2 in area."stadsdeel"."oost"')
+        in_west = self.compiler.compile('location_2 in area."stadsdeel"."west"')
+        with patch.object(areas._index, 'find_all', wraps=areas._index.find_all) as mocked_find_all:
+            self.assertTrue(in_oost.evaluate(context))
+            self.assertFalse(in_west.evaluate(context))
+            self.assertFalse(self.compiler.compile('location_1 in area."stadsdeel"."oost"').evaluate(context))
+
+        # The index is searched once per location
+        self.assertEqual(mocked_find_all.call_count, 2)
+
+        with self.assertRaisesMessage(Exception, 'Could not resolve stadsdeel.noord'):
+            self.compiler.compile('location_2 in area."stadsdeel"."noord"').evaluate(context)
+
+    def _evaluate(self, expression, context):
+        try:
+            return expression.evaluate(context)
+        except Exception as e:
+            return type(e), str(e)
+
+    def test_in_area_type_geometries_malformed_path(self):
+        areas = AreaTypeGeometries([Area(code='oost', geometry=self.context['area']['stadsdeel']['oost'])])
+        context = {**self.context, 'area': {'stadsdeel': areas}}
+
+        # The Areas are only searched using their index when the path ends with the code of an Area, other paths
+        # raise the same error as the ExpressionEvaluator
+        for code in ['location_2 in area."stadsdeel"."oost"."extra"', 'location_2 in area."stadsdeel"']:
+            compiled = self._evaluate(self.compiler.compile(code), context)
+            self.assertIsInstance(compiled, tuple)
+            self.assertEqual(compiled, self._evaluate(ExpressionEvaluator().compile(code), context))
+
+    def test_runtime_errors(self):
+        with self.assertRaisesMessage(Exception, "Could not resolve ident: 'unknown'"):
+            self.compiler.compile('unknown == 1').evaluate(self.context)
+
+        with self.assertRaisesMessage(Exception, 'Could not resolve stadsdeel.west'):
+            self.compiler.compile('location_2 in area."stadsdeel"."west"').evaluate(self.context)
+
+        with self.assertRaisesMessage(Exception, "No 'in' handler for type: 'unknown'"):
+            self.compiler.compile('testint in list').evaluate(self.context)
+
+
+class TestDslServiceCompiledExpressions(TestCase):
+    def test_compiled_again_when_expression_changes(self):
+        dsl_service = DslService()
+        expression = ExpressionFactory.create(code='testint == 1')
+
+        compiled = dsl_service._compile_expression(expression)
+        self.assertIs(dsl_service._compile_expression(expression), compiled)
+        self.assertTrue(compiled.evaluate({'testint': 1}))
+
+        expression.code = 'testint == 2'
+        expression.save()
+
+        compiled = dsl_service._compile_expression(expression)
+        self.assertFalse(compiled.evaluate({'testint': 1}))
+        self.assertTrue(compiled.evaluate({'testint': 2}))
+
+
+class TestBenchmarkRoutingCommand(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        call_command('benchmark_routing', rules=9, areas=2, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('interpreted:', output)
+        self.assertIn('compiled:', output)
@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.test import override_settings
+
+from signals.apps.search.backends import PostgresBackend
+from signals.apps.search.tasks import rebuild_search_vectors
+from signals.apps.signals.factories import CategoryFactory, NoteFactory, SignalFactory
+from signals.apps.signals.models import Signal
+from tests.test import SignalsBaseApiTestCase
+
+
+@override_settings(SEARCH={'BACKEND': 'postgres', 'PAGE_SIZE': 100})
+class TestPostgresBackend(SignalsBaseApiTestCase):
+    SEARCH_ENDPOINT = '/signals/v1/private/search'
+
+    def setUp(self):
+        self.backend = PostgresBackend()
+        self.search_user = self.superuser
+
+        category = CategoryFactory.create(name='Zwerfafval')
+        self.signal = SignalFactory.create(text='Er staan fietsen op de stoep',
+                                           category_assignment__category=category,
+                                           reporter__email='melder@example.com')
+        NoteFactory.create(_signal=self.signal, text='Handhaving ingeschakeld')
+        self.other_signal = SignalFactory.create(text='Lantaarnpaal kapot')
+
+        for signal in Signal.objects.all():
+            self.backend.update_signal(signal_id=signal.pk)
+
+    def _search(self, q):
+        return list(self.backend.search(q=q, user=self.search_user).values_list('id', flat=True))
+
+    def test_search(self):
+        self.assertEqual(self._search('fietsen'), [self.signal.pk])
+        self.assertEqual(self._search('fiets'), [self.signal.pk])  # Stemmed
+        self.assertEqual(self._search('zwerfafval'), [self.signal.pk])
+        self.assertEqual(self._search('melder@example.com'), [self.signal.pk])
+        self.assertEqual(self._search('handhaving'), [self.signal.pk])
+        self.assertEqual(self._search('lantaarnpaal'), [self.other_signal.pk])
+        self.assertEqual(self._search(str(self.other_signal.pk)), [self.other_signal.pk])
+        self.assertEqual(self._search('fietsen -stoep'), [])
+
+    def test_search_vector_updated_on_create_note(self):
+        data = {'text': 'Buurtbewoners klagen', 'created_by': 'ambtenaar@example.com'}
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.actions.create_note(data, self.other_signal)
+
+        self.assertEqual(self._search('buurtbewoners'), [self.other_signal.pk])
+
+    def test_rebuild_search_vectors(self):
+        Signal.objects.update(search_vector=None)
+        self.assertEqual(self._search('fietsen'), [])
+
+        # One query for the range of ids and one UPDATE per batch
+        with self.assertNumQueries(2):
+            rebuild_search_vectors(batch_size=1000)
+
+        self.assertEqual(self._search('fietsen'), [self.signal.pk])
+        self.assertEqual(self._search('handhaving'), [self.signal.pk])
+        self.assertEqual(self._search('lantaarnpaal'), [self.other_signal.pk])
+
+    def test_search_endpoint(self):
+        self.client.force_authenticate(user=self.search_user)
+
+        response = self.client.get(self.SEARCH_ENDPOINT, {'q': 'fietsen'})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.signal.pk)
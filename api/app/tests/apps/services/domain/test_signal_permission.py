@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from signals.apps.services.domain.signal_permission import SignalPermissionService
+from signals.apps.signals.factories import (
+    CategoryFactory,
+    DepartmentFactory,
+    SignalDepartmentsFactory,
+    SignalFactory
+)
+from signals.apps.signals.models import CategoryDepartment, Signal, SignalDepartments
+from signals.apps.users.factories import UserFactory
+
+
+class TestSignalPermissionService(TestCase):
+    def setUp(self):
+        self.department = DepartmentFactory.create()
+        self.other_department = DepartmentFactory.create()
+
+        self.category = CategoryFactory.create()
+        CategoryDepartment.objects.create(category=self.category, department=self.department,
+                                          is_responsible=True, can_view=True)
+        self.other_category = CategoryFactory.create()
+
+        self.user = UserFactory.create()
+        self.user.profile.departments.add(self.department)
+
+        self.service = SignalPermissionService()
+
+    def _route(self, signal, departments):
+        signal.routing_assignment = SignalDepartmentsFactory.create(
+            _signal=signal,
+            relation_type=SignalDepartments.REL_ROUTING,
+            departments=departments
+        )
+        signal.save()
+
+    def test_user_scope(self):
+        category_ids, department_ids = self.service.get_user_scope(self.user)
+        self.assertEqual(category_ids, {self.category.pk})
+        self.assertEqual(department_ids, {self.department.pk})
+
+        # Memoized on the user instance for the rest of the request
+        with self.assertNumQueries(0):
+            self.assertEqual(self.service.get_user_scope(self.user), (category_ids, department_ids))
+
+    def test_user_scope_read_from_auth_bundle(self):
+        self.user.signal_permission_scope = (frozenset({self.other_category.pk}), frozenset())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.service.get_user_scope(self.user), ({self.other_category.pk}, set()))
+
+    def test_user_scope_when_profile_departments_change(self):
+        self.service.get_user_scope(self.user)
+
+        self.user.profile.departments.add(self.other_department)
+
+        _, department_ids = self.service.get_user_scope(self.user)
+        self.assertEqual(department_ids, {self.department.pk, self.other_department.pk})
+
+    def test_user_scope_when_category_departments_change(self):
+        self.service.get_user_scope(self.user)
+
+        CategoryDepartment.objects.create(category=self.other_category, department=self.department,
+                                          is_responsible=False, can_view=True)
+
+        # The next request has its own user instance
+        category_ids, _ = self.service.get_user_scope(User.objects.get(pk=self.user.pk))
+        self.assertEqual(category_ids, {self.category.pk, self.other_category.pk})
+
+        CategoryDepartment.objects.filter(category=self.category).delete()
+
+        category_ids, _ = self.service.get_user_scope(User.objects.get(pk=self.user.pk))
+        self.assertEqual(category_ids, {self.other_category.pk})
+
+    def test_filter_for_user(self):
+        in_category = SignalFactory.create(category_assignment__category=self.category)
+        routed = SignalFactory.create(category_assignment__category=self.other_category)
+        self._route(routed, [self.department, self.other_department])
+        SignalFactory.create(category_assignment__category=self.other_category)
+
+        # A Signal in one of the categories of the user that is also routed to the departments of the user
+        in_category_and_routed = SignalFactory.create(category_assignment__category=self.category)
+        self._route(in_category_and_routed, [self.department, self.other_department])
+
+        signal_ids = list(Signal.objects.filter_for_user(self.user).values_list('id', flat=True))
+        self.assertEqual(len(signal_ids), 3)  # Every Signal only once
+        self.assertEqual(set(signal_ids), {in_category.pk, routed.pk, in_category_and_routed.pk})
+
+    def test_filter_for_user_without_departments(self):
+        SignalFactory.create(category_assignment__category=self.category)
+        self.user.profile.departments.clear()
+
+        self.assertFalse(Signal.objects.filter_for_user(self.user).exists())
@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from signals.apps.feedback.factories import FeedbackFactory
+from signals.apps.signals import workflow
+from signals.apps.signals.factories import (
+    DepartmentFactory,
+    NoteFactory,
+    SignalDepartmentsFactory,
+    SignalFactory,
+    SignalFactoryValidLocation,
+    SignalUserFactory,
+    StatusFactory
+)
+from signals.apps.signals.models import History, HistoryEvent, SignalDepartments
+
+
+class TestBackfillHistoryEvents(TestCase):
+    def setUp(self):
+        self.signal = SignalFactoryValidLocation.create()
+        NoteFactory.create(_signal=self.signal)
+        SignalUserFactory.create(_signal=self.signal)
+        SignalDepartmentsFactory.create(_signal=self.signal, relation_type=SignalDepartments.REL_ROUTING,
+                                        departments=[DepartmentFactory.create(), DepartmentFactory.create()])
+        feedback = FeedbackFactory.create(_signal=self.signal, is_satisfied=True, text='Goed geholpen')
+        feedback.submitted_at = feedback.created_at + timedelta(days=1)
+        feedback.save()
+        SignalFactory.create(parent=self.signal)
+
+        # The children of a split Signal are not in the history
+        self.split_signal = SignalFactory.create()
+        SignalFactory.create(parent=self.split_signal)
+        self.split_signal.status = StatusFactory.create(_signal=self.split_signal, state=workflow.GESPLITST)
+        self.split_signal.save()
+
+    def _history(self, signal):
+        return sorted(
+            (entry.identifier, entry.when, entry.what, entry.get_who(), entry.extra, entry.get_action(),
+             entry.get_description())
+            for entry in History.objects.filter(_signal=signal)
+        )
+
+    def _history_events(self, signal):
+        return sorted(
+            (event.identifier, event.when, event.what, event.get_who(), event.extra, event.action, event.description)
+            for event in HistoryEvent.objects.filter(_signal=signal)
+        )
+
+    def test_history_events_written_on_change(self):
+        # The events written when the objects are created are the same as the entries of the History view
+        for signal in [self.signal, self.split_signal]:
+            self.assertEqual(self._history_events(signal), self._history(signal))
+
+        whats = [event.what for event in HistoryEvent.objects.filter(_signal=self.signal)]
+        self.assertIn('RECEIVE_FEEDBACK', whats)
+        self.assertIn('CHILD_SIGNAL_CREATED', whats)
+        self.assertNotIn('CHILD_SIGNAL_CREATED', HistoryEvent.objects.filter(
+            _signal=self.split_signal).values_list('what', flat=True))
+
+    def test_backfill(self):
+        HistoryEvent.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_history_events', batch_size=1, stdout=out)
+
+        for signal in [self.signal, self.split_signal]:
+            self.assertEqual(self._history_events(signal), self._history(signal))
+
+        # Running the backfill again does not result in duplicate events
+        n_events = HistoryEvent.objects.count()
+        call_command('backfill_history_events', stdout=out)
+        self.assertEqual(HistoryEvent.objects.count(), n_events)
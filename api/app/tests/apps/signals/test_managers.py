@@ -6,8 +6,9 @@ from django.contrib.gis.geos import MultiPolygon, Point, Polygon
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 
+from signals.apps.signals import workflow
 from signals.apps.signals.factories import AreaFactory, CategoryFactory, SignalFactory
-from signals.apps.signals.models import CategoryAssignment, Signal, Type
+from signals.apps.signals.models import CategoryAssignment, Priority, Signal, Type
 
 
 class TestSignalManager(TestCase):
@@ -57,6 +58,27 @@ class TestSignalManager(TestCase):
 
         self.assertEqual(ve.exception.message, 'Category not found in data')
 
+    def test_update_multiple_saves_signal_once(self):
+        signal = SignalFactory.create()
+        other_category = CategoryFactory.create()
+        data = {
+            'status': {'state': workflow.BEHANDELING, 'text': 'In behandeling'},
+            'category_assignment': {'category': other_category},
+            'priority': {'priority': Priority.PRIORITY_HIGH},
+            'notes': [{'text': 'Dit is een notitie'}],
+            'type': {'name': Type.QUESTION},
+        }
+
+        with patch.object(Signal, '_validate', autospec=True) as patched_validate:
+            updated_signal = Signal.actions.update_multiple(data, signal)
+
+        patched_validate.assert_called_once()
+        self.assertEqual(updated_signal.status.state, workflow.BEHANDELING)
+        self.assertEqual(updated_signal.category_assignment.category, other_category)
+        self.assertEqual(updated_signal.priority.priority, Priority.PRIORITY_HIGH)
+        self.assertEqual(updated_signal.notes.count(), 1)
+        self.assertEqual(updated_signal.type_assignment.name, Type.QUESTION)
+
     def test_create_initial_default_type(self):
         signal_data = {
             'text': 'Bladiebla',
@@ -190,6 +212,31 @@ class TestSignalManager(TestCase):
         self.assertEqual(updated_location.area_type_code, self.area._type.code)
         self.assertEqual(updated_location.area_code, self.area.code)
 
+    def test_create_initial_bulk_default_area(self):
+        data = [{
+            'signal_data': {
+                'text': 'Bladiebla',
+                'incident_date_start': '2020-02-26T12:00:00.000000Z',
+                'source': 'online',
+            },
+            'location_data': {'geometrie': geometrie},
+            'status_data': {},  # Default status
+            'category_assignment_data': {'category': self.category},
+            'reporter_data': {},  # No reporter
+        } for geometrie in [self.pt_in_center, self.pt_out_center, self.pt_in_center]]
+
+        signals = Signal.actions.create_initial_bulk(data)
+
+        self.assertEqual(signals[0].location.area_type_code, self.area._type.code)
+        self.assertEqual(signals[0].location.area_code, self.area.code)
+        self.assertFalse(signals[1].location.area_type_code)
+        self.assertFalse(signals[1].location.area_code)
+        self.assertEqual(signals[2].location.area_code, self.area.code)
+
+        for signal in signals:
+            self.assertEqual(signal.types.count(), 1)
+            self.assertEqual(signal.type_assignment.name, Type.SIGNAL)  # Default is SIGNAL
+
     def test_update_type(self):
         type_data = {'name': Type.QUESTION}
         Signal.actions.update_type(data=type_data, signal=self.signal)
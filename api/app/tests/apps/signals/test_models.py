@@ -98,6 +98,77 @@ class TestSignalManager(TransactionTestCase):
 
         self.assertEqual(signal.priority.priority, Priority.PRIORITY_HIGH)
 
+    @mock.patch('signals.apps.signals.managers.create_initial', autospec=True)
+    def test_create_initial_bulk(self, patched_create_initial):
+        data = [{
+            'signal_data': dict(self.signal_data),
+            'location_data': dict(self.location_data),
+            'status_data': dict(self.status_data),
+            'category_assignment_data': dict(self.category_assignment_data),
+            'reporter_data': dict(self.reporter_data),
+            'priority_data': dict(self.priority_data) if i % 2 else None,
+        } for i in range(3)]
+
+        signals = Signal.actions.create_initial_bulk(data)
+
+        # Check everything is present:
+        self.assertEqual(len(signals), 3)
+        self.assertEqual(Signal.objects.count(), 3)
+        self.assertEqual(Location.objects.count(), 3)
+        self.assertEqual(Status.objects.count(), 3)
+        self.assertEqual(CategoryAssignment.objects.count(), 3)
+        self.assertEqual(Reporter.objects.count(), 3)
+        self.assertEqual(Priority.objects.count(), 3)
+
+        for i, signal in enumerate(signals):
+            signal.refresh_from_db()
+            self.assertEqual(signal.location._signal_id, signal.pk)
+            self.assertEqual(signal.status._signal_id, signal.pk)
+            self.assertEqual(signal.category_assignment._signal_id, signal.pk)
+            self.assertEqual(signal.reporter._signal_id, signal.pk)
+            self.assertEqual(signal.type_assignment._signal_id, signal.pk)
+            self.assertEqual(signal.priority.priority,
+                             Priority.PRIORITY_HIGH if i % 2 else Priority.PRIORITY_NORMAL)
+
+        # Check that we sent the correct Django signals
+        self.assertEqual(patched_create_initial.send_robust.call_count, 3)
+        patched_create_initial.send_robust.assert_has_calls([
+            mock.call(sender=Signal.actions.__class__, signal_obj=signal) for signal in signals
+        ])
+
+    def _bulk_data(self, count, **signal_data):
+        return [{
+            'signal_data': dict(self.signal_data, **signal_data),
+            'location_data': dict(self.location_data),
+            'status_data': dict(self.status_data),
+            'category_assignment_data': dict(self.category_assignment_data),
+            'reporter_data': dict(self.reporter_data),
+        } for _ in range(count)]
+
+    def test_create_initial_bulk_anonymized_reporter(self):
+        data = self._bulk_data(1)
+        data[0]['reporter_data'].update(email_anonymized=True, phone_anonymized=True)
+
+        signal, = Signal.actions.create_initial_bulk(data)
+
+        signal.reporter.refresh_from_db()
+        self.assertIsNone(signal.reporter.email)
+        self.assertIsNone(signal.reporter.phone)
+
+    @override_settings(SIGNAL_MAX_NUMBER_OF_CHILDREN=3)
+    def test_create_initial_bulk_max_children_reached(self):
+        parent = factories.SignalFactory.create()
+        factories.SignalFactory.create(parent=parent)
+
+        # Together with the child in the database the batch exceeds the maximum number of children
+        with self.assertRaisesMessage(ValidationError, 'Maximum number of children reached for the parent Signal'):
+            Signal.actions.create_initial_bulk(self._bulk_data(3, parent=parent))
+        self.assertEqual(parent.children.count(), 1)
+
+        signals = Signal.actions.create_initial_bulk(self._bulk_data(2, parent=parent))
+        self.assertEqual(len(signals), 2)
+        self.assertEqual(parent.children.count(), 3)
+
     @mock.patch('signals.apps.signals.managers.update_location', autospec=True)
     def test_update_location(self, patched_update_location):
         signal = factories.SignalFactory.create()
@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from signals.apps.signals import workflow
+from signals.apps.signals.factories import SignalFactory
+from signals.apps.signals.managers import SignalManager, update_status
+from signals.apps.signals.models import OutboxEvent, Signal
+from signals.apps.signals.outbox import clean_outbox_events, dispatch_outbox_events
+
+
+@override_settings(FEATURE_FLAGS={'SIGNAL_OUTBOX_ENABLED': True})
+class TestOutbox(TestCase):
+    def setUp(self):
+        self.signal = SignalFactory.create(status__state=workflow.GEMELD)
+        self.receiver = mock.MagicMock(return_value=None)
+        update_status.connect(self.receiver, dispatch_uid='test_outbox_receiver')
+
+    def tearDown(self):
+        update_status.disconnect(dispatch_uid='test_outbox_receiver')
+
+    def test_store_and_dispatch(self):
+        prev_status = self.signal.status
+        status = Signal.actions.update_status({'state': workflow.BEHANDELING, 'text': 'test'}, self.signal)
+
+        # Stored in the outbox, not sent yet
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event, 'update_status')
+        self.assertEqual(event._signal_id, self.signal.pk)
+        self.assertEqual(event.kwargs, {'status': ['signals.Status', status.pk],
+                                        'prev_status': ['signals.Status', prev_status.pk]})
+        self.receiver.assert_not_called()
+
+        self.assertEqual(dispatch_outbox_events(), 1)
+
+        self.receiver.assert_called_once()
+        _, kwargs = self.receiver.call_args
+        self.assertEqual(kwargs['sender'], SignalManager)
+        self.assertEqual(kwargs['signal_obj'], self.signal)
+        self.assertEqual(kwargs['status'], status)
+        self.assertEqual(kwargs['prev_status'], prev_status)
+
+        event.refresh_from_db()
+        self.assertIsNotNone(event.dispatched_at)
+        self.assertEqual(event.attempts, 1)
+
+        # Nothing left to send
+        self.assertEqual(dispatch_outbox_events(), 0)
+        self.receiver.assert_called_once()
+
+    def test_dispatch_failed(self):
+        self.receiver.side_effect = Exception('Receiver failed')
+        Signal.actions.update_status({'state': workflow.BEHANDELING, 'text': 'test'}, self.signal)
+
+        self.assertEqual(dispatch_outbox_events(), 0)
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.dispatched_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn('Receiver failed', event.last_error)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+
+        # Not retried before the next attempt is due
+        self.assertEqual(dispatch_outbox_events(), 0)
+        self.assertEqual(self.receiver.call_count, 1)
+
+        # Retried once the next attempt is due
+        self.receiver.side_effect = None
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_outbox_events(), 1)
+        self.assertEqual(self.receiver.call_count, 2)
+
+    def test_retry_failed_receivers_only(self):
+        failing_receiver = mock.MagicMock(side_effect=Exception('Receiver failed'))
+        update_status.connect(failing_receiver, dispatch_uid='test_outbox_failing_receiver')
+        self.addCleanup(update_status.disconnect, dispatch_uid='test_outbox_failing_receiver')
+
+        Signal.actions.update_status({'state': workflow.BEHANDELING, 'text': 'test'}, self.signal)
+        self.assertEqual(dispatch_outbox_events(), 0)
+
+        event = OutboxEvent.objects.get()
+        self.assertIn('test_outbox_receiver', event.delivered_receivers)
+        self.assertNotIn('test_outbox_failing_receiver', event.delivered_receivers)
+        self.assertIn('test_outbox_failing_receiver', event.last_error)
+
+        # Only the failed receiver is retried
+        failing_receiver.side_effect = None
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_outbox_events(), 1)
+        self.assertEqual(self.receiver.call_count, 1)
+        self.assertEqual(failing_receiver.call_count, 2)
+
+    def test_clean_outbox_events(self):
+        Signal.actions.update_status({'state': workflow.BEHANDELING, 'text': 'test'}, self.signal)
+        dispatch_outbox_events()
+
+        self.assertEqual(clean_outbox_events(days=7), 0)
+        OutboxEvent.objects.update(dispatched_at=timezone.now() - timezone.timedelta(days=8))
+        self.assertEqual(clean_outbox_events(days=7), 1)
@@ -3,6 +3,7 @@
 from django.contrib.gis import geos
 from django.test import TestCase
 
+from signals.apps.dsl.areas import AreaTypeGeometries
 from signals.apps.services.domain.dsl import SignalContext, SignalDslService
 from signals.apps.signals.factories import (
     AreaFactory,
@@ -18,6 +19,9 @@ class TestRoutingMechanism(TestCase):
     dsl_service = SignalDslService()
 
     def setUp(self):
+        # The Areas loaded by the shared SignalContext of a previous test are dropped
+        self.dsl_service.context_func.clear()
+
         geometry = geos.MultiPolygon([geos.Polygon.from_bbox([4.877157, 52.357204, 4.929686, 52.385239])], srid=4326)
         self.area = AreaFactory.create(
             geometry=geometry,
@@ -133,6 +137,18 @@ class TestRoutingMechanism(TestCase):
         routing_dep = signal_inside.routing_assignment.departments.first()
         self.assertEqual(routing_dep.id, self.department.id)
 
+    def test_context_areas_reloaded_when_changed(self):
+        ctx_func = SignalContext()
+        areas = ctx_func.areas
+        self.assertIs(ctx_func.areas, areas)
+        self.assertIsInstance(areas[self.area._type.name], AreaTypeGeometries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AreaFactory.create(code='west', _type=self.area._type)
+
+        self.assertIsNot(ctx_func.areas, areas)
+        self.assertEqual(set(ctx_func.areas[self.area._type.name]), {self.area.code, 'west'})
+
     def test_context_func(self):
         # test signal outside center
         signal = SignalFactory.create()
@@ -1,10 +1,23 @@
 # SPDX-License-Identifier: MPL-2.0
 # Copyright (C) 2021 Gemeente Amsterdam
 import copy
+from unittest.mock import patch
 
-from django.test import TransactionTestCase
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.test import TestCase, TransactionTestCase, override_settings
 
-from signals.apps.signals.utils.location import AddressFormatter
+from signals.apps.signals.factories import AreaFactory
+from signals.apps.signals.models import Area
+from signals.apps.signals.utils.area_index import AreaTypeIndex, area_index, bump_area_index_version
+from signals.apps.signals.utils.cache import VersionStamp, get_shared_cache
+from signals.apps.signals.utils.location import AddressFormatter, _get_area, _get_areas
+from signals.apps.signals.utils.tiles import (
+    bump_tile_versions,
+    get_tile_version,
+    is_valid_tile,
+    point_to_tile,
+    tile_bounds_wgs84
+)
 
 
 class TestAddressFormatter(TransactionTestCase):
@@ -129,3 +142,149 @@ class TestAddressFormatter(TransactionTestCase):
 
         formatted_address_str = address_formatter.format(format_str='W')
         self.assertEqual(formatted_address_str, '')
+
+
+@override_settings(FEATURE_FLAGS={'AREA_INDEX_ENABLED': True}, SHARED_CACHE_VERSION_CHECK_INTERVAL=60)
+class TestAreaIndex(TestCase):
+    def setUp(self):
+        area_index.clear()
+
+        geometry = MultiPolygon([Polygon.from_bbox([4.877157, 52.357204, 4.929686, 52.385239])], srid=4326)
+        self.area = AreaFactory.create(geometry=geometry, name='Centrum', code='centrum', _type__code='district')
+        self.pt_in_center = Point(4.88, 52.36, srid=4326)
+        self.pt_out_center = Point(6, 53, srid=4326)
+
+    def tearDown(self):
+        area_index.clear()
+
+    def test_find(self):
+        index = area_index.get('district')
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.find(self.pt_in_center), self.area)
+        self.assertIsNone(index.find(self.pt_out_center))
+
+        # Other area types do not contain the Area
+        self.assertIsNone(area_index.get('other-district').find(self.pt_in_center))
+
+    def test_find_rd_coordinates(self):
+        index = area_index.get('district')
+        self.assertEqual(index.find(self.pt_in_center.transform(28992, clone=True)), self.area)
+
+    def test_get_area_uses_index(self):
+        self.assertEqual(_get_area(self.pt_in_center, 'district'), self.area)
+
+        # The index is build, so finding the Area should not query the database anymore
+        with self.assertNumQueries(0):
+            self.assertEqual(_get_area(self.pt_in_center, 'district'), self.area)
+
+        # Not found in the index, the index is authoritative so the database is not queried
+        with self.assertNumQueries(0):
+            self.assertIsNone(_get_area(self.pt_out_center, 'district'))
+
+    def test_get_areas(self):
+        areas = _get_areas([self.pt_in_center, self.pt_out_center, self.pt_in_center], 'district')
+        self.assertEqual(areas, [self.area, None, self.area])
+
+    @override_settings(FEATURE_FLAGS={'AREA_INDEX_ENABLED': False})
+    def test_get_areas_from_db(self):
+        with self.assertNumQueries(1):
+            areas = _get_areas([self.pt_in_center, self.pt_out_center, self.pt_in_center], 'district')
+        self.assertEqual(areas, [self.area, None, self.area])
+        self.assertEqual(_get_areas([], 'district'), [])
+
+    def test_bump_area_index_version(self):
+        index = area_index.get('district')
+        self.assertIs(area_index.get('district'), index)
+
+        bump_area_index_version()
+        self.assertIsNot(area_index.get('district'), index)
+
+
+class TestAreaTypeIndex(TestCase):
+    def _area(self, code, bbox):
+        return Area(code=code, geometry=MultiPolygon([Polygon.from_bbox(bbox)], srid=4326))
+
+    def test_find_all(self):
+        # A 10 by 10 grid of squares and one Area that covers all of them
+        areas = [self._area(f'{x}-{y}', (x, y, x + 1, y + 1)) for x in range(10) for y in range(10)]
+        areas.insert(50, self._area('all', (0, 0, 10, 10)))
+        index = AreaTypeIndex(areas)
+
+        self.assertEqual(len(index), 101)
+        self.assertEqual([area.code for area in index.find_all(Point(3.5, 7.5, srid=4326))], ['3-7', 'all'])
+        self.assertEqual([area.code for area in index.find_all(Point(7.5, 2.5, srid=4326))], ['all', '7-2'])
+        self.assertEqual(index.find(Point(9.5, 9.5, srid=4326)).code, '9-9')
+        self.assertIsNone(index.find(Point(10.5, 5, srid=4326)))
+        self.assertIsNone(index.find(Point(-0.5, 5, srid=4326)))
+
+    def test_empty(self):
+        self.assertIsNone(AreaTypeIndex([]).find(Point(1, 1, srid=4326)))
+
+
+class TestVersionStamp(TestCase):
+    def test_bumped_by_other_process(self):
+        version_stamp = VersionStamp('test.version')
+        version = version_stamp.get()
+        self.assertEqual(version_stamp.get(), version)
+
+        # Another process bumps the stamp in the shared cache
+        get_shared_cache().set('test.version', 'other-version', None)
+        self.assertEqual(version_stamp.get(), 'other-version')
+
+    @override_settings(SHARED_CACHE_VERSION_CHECK_INTERVAL=60)
+    def test_check_interval(self):
+        version_stamp = VersionStamp('test.version')
+        version = version_stamp.get()
+
+        # The bump of another process is seen once the check interval has passed
+        get_shared_cache().set('test.version', 'other-version', None)
+        with self.assertNumQueries(0):
+            self.assertEqual(version_stamp.get(), version)
+
+        # A bump in this process is seen immediately
+        version_stamp.bump()
+        self.assertNotEqual(version_stamp.get(), version)
+
+
+class TestTiles(TestCase):
+    def setUp(self):
+        self.point = Point(4.898451, 52.379189, srid=4326)  # Amsterdam Centraal
+
+    def test_point_to_tile(self):
+        self.assertEqual(point_to_tile(self.point, 0), (0, 0))
+        self.assertEqual(point_to_tile(self.point, 1), (1, 0))
+
+        x, y = point_to_tile(self.point, 15)
+        lon_min, lat_min, lon_max, lat_max = tile_bounds_wgs84(15, x, y)
+        self.assertTrue(lon_min <= self.point.x <= lon_max)
+        self.assertTrue(lat_min <= self.point.y <= lat_max)
+
+    def test_is_valid_tile(self):
+        self.assertTrue(is_valid_tile(0, 0, 0))
+        self.assertTrue(is_valid_tile(2, 3, 3))
+        self.assertFalse(is_valid_tile(2, 4, 0))
+        self.assertFalse(is_valid_tile(2, 0, 4))
+
+    @override_settings(SIGNAL_TILES_STAMP_ZOOM=12)
+    def test_bump_tile_versions(self):
+        x, y = point_to_tile(self.point, 15)
+        version = get_tile_version(15, x, y)
+        other_version = get_tile_version(15, x + 8, y)  # In another tile at the stamp zoom level
+        low_zoom_version = get_tile_version(10, *point_to_tile(self.point, 10))
+        self.assertEqual(get_tile_version(15, x, y), version)
+
+        bump_tile_versions([self.point])
+
+        # The tiles of the same tile at the stamp zoom level and all low zoom tiles are invalidated
+        self.assertNotEqual(get_tile_version(15, x, y), version)
+        self.assertNotEqual(get_tile_version(10, *point_to_tile(self.point, 10)), low_zoom_version)
+        self.assertEqual(get_tile_version(15, x + 8, y), other_version)
+        self.assertEqual(get_tile_version(13, x >> 2, y >> 2), get_tile_version(15, x, y))
+
+    @override_settings(SIGNAL_TILES_STAMP_ZOOM=12)
+    def test_bump_tile_versions_number_of_keys(self):
+        with patch.object(get_shared_cache(), 'set_many') as mocked_set_many:
+            bump_tile_versions([self.point, self.point, None])
+
+        keys = mocked_set_many.call_args[0][0]
+        self.assertEqual(len(keys), 2)  # The tile at the stamp zoom level and the low zoom stamp
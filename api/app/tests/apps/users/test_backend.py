@@ -7,7 +7,7 @@ from django.test import TestCase
 from rest_framework import exceptions
 
 from signals.apps.users.factories import SuperUserFactory, UserFactory
-from signals.auth import backend
+from signals.auth import backend, bundle
 from signals.auth.config import get_settings
 
 
@@ -30,8 +30,9 @@ class TestJWTAuthBackend(TestCase):
             jwt_auth_backend.authenticate(mocked_request)
 
     @mock.patch('signals.auth.tokens.JWTAccessToken.token_data')
-    @mock.patch('signals.auth.backend.cache')
-    def test_with_scope_wrong_user_cache_miss(self, mocked_cache, mock_token_data):
+    @mock.patch('signals.auth.bundle.get_auth_cache')
+    def test_with_scope_wrong_user_cache_miss(self, mocked_get_auth_cache, mock_token_data):
+        mocked_cache = mocked_get_auth_cache.return_value
         jwt_auth_backend = backend.JWTAuthBackend()
 
         mocked_request = mock.Mock()
@@ -46,18 +47,19 @@ class TestJWTAuthBackend(TestCase):
             with self.assertRaises(exceptions.AuthenticationFailed):
                 jwt_auth_backend.authenticate(mocked_request)
 
-            mocked_cache.get.assert_called_once_with('wrong_user@example.com')
+            mocked_cache.get.assert_called_once_with(bundle._get_cache_key('wrong_user@example.com'))
             mocked_cache.set.assert_called_once_with(
-                'wrong_user@example.com',
+                bundle._get_cache_key('wrong_user@example.com'),
                 backend.USER_DOES_NOT_EXIST,
                 5 * 60
             )
             mocked_cache.reset_mock()
 
     @mock.patch('signals.auth.tokens.JWTAccessToken.token_data')
-    @mock.patch('signals.auth.backend.cache')
-    @mock.patch('signals.auth.backend.User')
-    def test_with_scope_wrong_user_cache_hit(self, mocked_user_model, mocked_cache, mock_token_data):
+    @mock.patch('signals.auth.bundle.get_auth_cache')
+    @mock.patch('signals.auth.bundle.User')
+    def test_with_scope_wrong_user_cache_hit(self, mocked_user_model, mocked_get_auth_cache, mock_token_data):
+        mocked_cache = mocked_get_auth_cache.return_value
         jwt_auth_backend = backend.JWTAuthBackend()
 
         mocked_request = mock.Mock()
@@ -71,7 +73,7 @@ class TestJWTAuthBackend(TestCase):
 
             with self.assertRaises(exceptions.AuthenticationFailed):
                 jwt_auth_backend.authenticate(mocked_request)
-            mocked_cache.get.assert_called_once_with('wrong_user@example.com')
+            mocked_cache.get.assert_called_once_with(bundle._get_cache_key('wrong_user@example.com'))
             mocked_user_model.objects.get.assert_not_called()
             mocked_cache.reset_mock()
 
@@ -93,8 +95,9 @@ class TestJWTAuthBackend(TestCase):
             # self.assertEqual(scope, 'SIG/ALL')
 
     @skip('TODO fix test')
-    @mock.patch('signals.auth.backend.cache')
-    def test_get_token_subject_is_none(self, mocked_cache):
+    @mock.patch('signals.auth.bundle.get_auth_cache')
+    def test_get_token_subject_is_none(self, mocked_get_auth_cache):
+        mocked_cache = mocked_get_auth_cache.return_value
         # In case the subject is not set on the JWT token (as the `sub claim`).
         # This test demonstrates the problem. See SIG-889 for next steps.
 
@@ -124,8 +127,9 @@ class TestJWTAuthBackend(TestCase):
     # user.
     # ---
 
-    @mock.patch('signals.auth.backend.cache')
-    def test_no_test_login_user(self, mocked_cache):
+    @mock.patch('signals.auth.bundle.get_auth_cache')
+    def test_no_test_login_user(self, mocked_get_auth_cache):
+        mocked_cache = mocked_get_auth_cache.return_value
 
         jwt_auth_backend = backend.JWTAuthBackend()
 
@@ -138,8 +142,9 @@ class TestJWTAuthBackend(TestCase):
         with self.assertRaises(exceptions.AuthenticationFailed):
             jwt_auth_backend.authenticate(mocked_request)
 
-    @mock.patch('signals.auth.backend.cache')
-    def test_with_test_login_user(self, mocked_cache):
+    @mock.patch('signals.auth.bundle.get_auth_cache')
+    def test_with_test_login_user(self, mocked_get_auth_cache):
+        mocked_cache = mocked_get_auth_cache.return_value
         test_user = SuperUserFactory.create(
             username=settings.TEST_LOGIN,
             email=settings.TEST_LOGIN,
@@ -0,0 +1,100 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+
+from signals.apps.services.domain.signal_permission import SignalPermissionService
+from signals.apps.signals.factories import CategoryFactory, DepartmentFactory
+from signals.apps.signals.factories.category_departments import CategoryDepartmentFactory
+from signals.apps.signals.utils.cache import get_shared_cache
+from signals.apps.users.factories import GroupFactory, UserFactory
+from signals.auth.backend import JWTAuthBackend
+from signals.auth.bundle import _get_cache_key
+
+
+class TestAuthBundle(TestCase):
+    def setUp(self):
+        self.department = DepartmentFactory.create()
+        self.category = CategoryFactory.create()
+        CategoryDepartmentFactory.create(category=self.category, department=self.department, can_view=True)
+
+        self.group = GroupFactory.create()
+        self.group.permissions.add(Permission.objects.get(codename='sia_read'))
+
+        self.user = UserFactory.create(username='Medewerker@example.com')
+        self.user.groups.add(self.group)
+        self.user.profile.departments.add(self.department)
+
+    def assertOnlySharedCacheQueries(self, context):
+        queries = [query['sql'] for query in context.captured_queries if '"signals_shared_cache"' not in query['sql']]
+        self.assertEqual(queries, [])
+
+    def test_authorize_without_queries(self):
+        JWTAuthBackend.get_user('medewerker@example.com')
+
+        with CaptureQueriesContext(connection) as context:
+            user = JWTAuthBackend.get_user('MEDEWERKER@example.com')
+            self.assertTrue(user.has_perm('signals.sia_read'))
+            self.assertFalse(user.has_perm('signals.sia_write'))
+            self.assertEqual(SignalPermissionService().get_user_scope(user),
+                             (frozenset([self.category.pk]), frozenset([self.department.pk])))
+        self.assertOnlySharedCacheQueries(context)
+
+    def test_user_does_not_exist(self):
+        with self.assertRaises(AuthenticationFailed):
+            JWTAuthBackend.get_user('idonotexist@example.com')
+
+        with CaptureQueriesContext(connection) as context:
+            with self.assertRaises(AuthenticationFailed):
+                JWTAuthBackend.get_user('idonotexist@example.com')
+        self.assertOnlySharedCacheQueries(context)
+
+    def test_password_not_cached(self):
+        JWTAuthBackend.get_user(self.user.username)
+
+        bundle = get_shared_cache().get(_get_cache_key(self.user.username))
+        self.assertNotIn('password', bundle['user'])
+
+        user = JWTAuthBackend.get_user(self.user.username)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+        self.assertIn('password', user.get_deferred_fields())
+
+    @override_settings(SHARED_CACHE='default')
+    def test_not_cached_in_process_local_cache(self):
+        JWTAuthBackend.get_user(self.user.username)
+
+        with CaptureQueriesContext(connection) as context:
+            user = JWTAuthBackend.get_user(self.user.username)
+        self.assertTrue(any('"auth_user"' in query['sql'] for query in context.captured_queries))
+        self.assertTrue(user.has_perm('signals.sia_read'))
+
+    def test_invalidated_by_group_permissions(self):
+        JWTAuthBackend.get_user(self.user.username)
+
+        self.group.permissions.add(Permission.objects.get(codename='sia_write'))
+
+        user = JWTAuthBackend.get_user(self.user.username)
+        self.assertTrue(user.has_perm('signals.sia_write'))
+
+    def test_invalidated_by_profile_departments(self):
+        JWTAuthBackend.get_user(self.user.username)
+
+        other_department = DepartmentFactory.create()
+        self.user.profile.departments.add(other_department)
+
+        user = JWTAuthBackend.get_user(self.user.username)
+        _, department_ids = SignalPermissionService().get_user_scope(user)
+        self.assertEqual(department_ids, frozenset([self.department.pk, other_department.pk]))
+
+    def test_invalidated_by_user_save(self):
+        JWTAuthBackend.get_user(self.user.username)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            JWTAuthBackend.get_user(self.user.username)
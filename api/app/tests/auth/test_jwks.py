@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from signals.auth.config import AuthzConfigurationError
+from signals.auth.jwks import JWKSProvider
+
+
+class TestJWKSProvider(SimpleTestCase):
+    kid = '2aedafba-8170-4064-b704-ce92b7c89cc6'
+
+    def setUp(self):
+        # A local JWKS file instead of the JWKS_URL of the identity provider
+        jwks_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        jwks_file.write(settings.JWKS_TEST_KEY)
+        jwks_file.close()
+        self.jwks_path = jwks_file.name
+        self.addCleanup(lambda: os.path.exists(self.jwks_path) and os.remove(self.jwks_path))
+
+    def _provider(self, **kwargs):
+        return JWKSProvider(jwks_url=f'file://{self.jwks_path}', **kwargs)
+
+    def test_load_from_file(self):
+        provider = self._provider()
+        self.assertIsNotNone(provider.get_keyset().get_key(self.kid))
+
+    def test_initial_load_fails(self):
+        os.remove(self.jwks_path)
+
+        with self.assertRaises(AuthzConfigurationError):
+            self._provider().get_keyset()
+
+    def test_stale_keys_used_when_refresh_fails(self):
+        provider = self._provider(ttl=0, min_interval=0)
+        keyset = provider.get_keyset()
+
+        os.remove(self.jwks_path)
+        self.assertFalse(provider.refresh())
+        self.assertIs(provider.get_keyset(), keyset)
+        provider._refresh_thread.join()
+        self.assertIs(provider.get_keyset(), keyset)
+
+    def test_refresh_in_background_when_stale(self):
+        provider = self._provider(ttl=60, min_interval=0)
+        keyset = provider.get_keyset()
+
+        # Not stale yet
+        provider.get_keyset()
+        self.assertIsNone(provider._refresh_thread)
+
+        provider._loaded_at -= 60
+        self.assertIs(provider.get_keyset(), keyset)  # The stale keys are returned while refreshing
+        provider._refresh_thread.join()
+        self.assertIsNot(provider.get_keyset(), keyset)
+
+    def test_refresh_unknown_key_once_per_interval(self):
+        provider = self._provider(min_interval=30)
+        provider.get_keyset()
+
+        with patch.object(provider, 'load', wraps=provider.load) as mocked_load:
+            provider.refresh_unknown_key()
+            provider.refresh_unknown_key()
+            self.assertEqual(mocked_load.call_count, 0)
+
+            provider._attempted_at -= 30
+            provider.refresh_unknown_key()
+            provider.refresh_unknown_key()
+            self.assertEqual(mocked_load.call_count, 1)
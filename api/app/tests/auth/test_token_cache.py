@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: MPL-2.0
+# Copyright (C) 2021 Gemeente Amsterdam
+import time
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from jwcrypto import jwt
+
+from signals.auth.config import get_settings
+from signals.auth.jwks import get_jwks_provider, get_keyset, init_keyset
+from signals.auth.token_cache import VerifiedTokenCache, get_verified_token_cache
+from signals.auth.tokens import JWTAccessToken
+
+
+class TestVerifiedTokenCache(SimpleTestCase):
+    def test_lru(self):
+        token_cache = VerifiedTokenCache(maxsize=2)
+        expires_at = time.time() + 60
+
+        token_cache.set('token-1', 'jwt-1', expires_at)
+        token_cache.set('token-2', 'jwt-2', expires_at)
+        self.assertEqual(token_cache.get('token-1'), 'jwt-1')
+
+        # The least recently used token is removed
+        token_cache.set('token-3', 'jwt-3', expires_at)
+        self.assertIsNone(token_cache.get('token-2'))
+        self.assertEqual(token_cache.get('token-1'), 'jwt-1')
+        self.assertEqual(token_cache.get('token-3'), 'jwt-3')
+
+        self.assertEqual(token_cache.stats(), {'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2})
+
+    def test_expired(self):
+        token_cache = VerifiedTokenCache(maxsize=2)
+        token_cache.set('token', 'jwt', time.time() - 1)
+
+        self.assertIsNone(token_cache.get('token'))
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_clear(self):
+        token_cache = VerifiedTokenCache(maxsize=2)
+        token_cache.set('token', 'jwt', time.time() + 60)
+        token_cache.clear()
+
+        self.assertIsNone(token_cache.get('token'))
+
+
+class TestDecodeTokenCache(SimpleTestCase):
+    kid = '2aedafba-8170-4064-b704-ce92b7c89cc6'
+
+    def setUp(self):
+        get_verified_token_cache().clear()
+
+    def _token(self, **claims):
+        user_id_field = get_settings()['USER_ID_FIELDS'][0]
+        token = jwt.JWT(header={'kid': self.kid, 'alg': 'ES256'}, claims={user_id_field: 'test@example.com', **claims})
+        token.make_signed_token(get_keyset().get_key(self.kid))
+        return token.serialize()
+
+    def test_decode_token_verified_once(self):
+        token = self._token(exp=round(time.time()) + 60)
+
+        with patch('signals.auth.tokens.JWT', wraps=jwt.JWT) as mocked_jwt:
+            first = JWTAccessToken.decode_token(token=token)
+            second = JWTAccessToken.decode_token(token=token)
+
+        self.assertEqual(mocked_jwt.call_count, 1)
+        self.assertEqual(first.claims, second.claims)
+
+    def test_decode_token_without_expiration_not_cached(self):
+        token = self._token()
+
+        with patch('signals.auth.tokens.JWT', wraps=jwt.JWT) as mocked_jwt:
+            JWTAccessToken.decode_token(token=token)
+            JWTAccessToken.decode_token(token=token)
+
+        self.assertEqual(mocked_jwt.call_count, 2)
+
+    def test_cleared_when_keyset_changes(self):
+        token = self._token(exp=round(time.time()) + 60)
+        JWTAccessToken.decode_token(token=token)
+
+        # Loading the same keys again does not clear the cache
+        init_keyset()
+        self.assertEqual(get_verified_token_cache().stats()['size'], 1)
+
+        with patch.object(get_jwks_provider(), '_fingerprint', 'previous-keyset'):
+            init_keyset()
+        self.assertEqual(get_verified_token_cache().stats()['size'], 0)
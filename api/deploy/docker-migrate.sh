@@ -7,4 +7,6 @@ set -x   # print what we are doing
 cd /app/
 
 yes yes | python manage.py migrate --noinput
+# The table of the shared cache (settings.CACHES['shared'])
+python manage.py createcachetable
 